@@ -0,0 +1,20 @@
+# Generated by Django 3.2.18 on 2026-10-18 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airavata_django_portal_sdk', '0003_auto_20220225_1510'),
+    ]
+
+    operations = [
+        # Existing entries are backfilled from their data product the first
+        # time they are listed, see user_storage.api._get_user_files
+        migrations.AddField(
+            model_name='userfiles',
+            name='file_mime_type',
+            field=models.CharField(max_length=255, null=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.18 on 2026-10-18 07:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airavata_django_portal_sdk', '0004_userfiles_file_mime_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirectorySize',
+            fields=[
+                ('path_hash', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('path', models.TextField()),
+                ('parent_path_hash', models.CharField(db_index=True, max_length=64)),
+                ('mtime_ns', models.BigIntegerField()),
+                ('size', models.BigIntegerField()),
+                ('scanned_time', models.DateTimeField()),
+            ],
+        ),
+    ]
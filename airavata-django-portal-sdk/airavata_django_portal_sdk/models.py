@@ -10,9 +10,29 @@ class UserFiles(models.Model):
     # associated storage preference in the Gateway Resource Profile, or a
     # resource id to a resource defined in MFT
     file_resource_id = models.CharField(max_length=255)
+    # mime type of the data product, so that directory listings don't need to
+    # load each data product. Empty string if the data product has no mime
+    # type, null if not yet known (entries created before this field existed)
+    file_mime_type = models.CharField(max_length=255, null=True)
 
     class Meta:
         indexes = [
             # See also migration #0003 which adds an index on file_path
             models.Index(fields=['username'], name='userfiles_username_idx')
         ]
+
+
+class DirectorySize(models.Model):
+    """
+    Index of the total size of the files in user storage directory trees,
+    maintained by the DjangoFileSystemProvider.
+    """
+    # sha256 hex digest of path, since path may be too long to be indexed
+    path_hash = models.CharField(max_length=64, primary_key=True)
+    path = models.TextField()
+    # path_hash of the parent directory, for looking up subdirectories
+    parent_path_hash = models.CharField(max_length=64, db_index=True)
+    # mtime of the directory when its size was computed or last updated
+    mtime_ns = models.BigIntegerField()
+    size = models.BigIntegerField()
+    scanned_time = models.DateTimeField()
@@ -1,14 +1,31 @@
 
+import io
 import logging
+import threading
+import time
 import warnings
+from http.cookiejar import DefaultCookiePolicy
 from urllib.parse import quote
 
 import requests
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
+# Remote API requests from all threads share a session, so that connections
+# are kept alive and reused
+_session = None
+_session_lock = threading.Lock()
+# GET responses of these paths are cached for the rest of the request, see
+# _get_response_cache_key
+CACHED_PATH_PREFIXES = ("/api/data-products/", "/api/user-storage/~/")
+# Map of endpoint to latency metrics, see get_latency_metrics
+_latency_metrics = {}
+_latency_metrics_lock = threading.Lock()
+
 
 def is_remote_api_configured():
     return getattr(settings, 'GATEWAY_DATA_STORE_REMOTE_API', None) is not None
@@ -34,17 +51,154 @@ def call(request,
     if remote_api_url.endswith("/api"):
         warnings.warn(f"Set GATEWAY_DATA_STORE_REMOTE_API to \"{remote_api_url}\". /api is no longer needed.", DeprecationWarning)
         remote_api_url = remote_api_url[0:remote_api_url.rfind("/api")]
-    r = requests.request(
-        method,
-        f'{remote_api_url}{base_url}{encoded_path}',
-        headers=headers,
-        **kwargs,
-    )
+    response_cache = _get_response_cache(request)
+    cache_key = _get_response_cache_key(method, f"{base_url}{encoded_path}", **kwargs)
+    if cache_key is not None and cache_key in response_cache:
+        logger.debug(f"Using cached response for {cache_key}")
+        r = response_cache[cache_key]
+        if raise_for_status:
+            r.raise_for_status()
+        return r
+    elif method.lower() != "get":
+        # A write may change any of the cached responses
+        response_cache.clear()
+    kwargs.setdefault('timeout', getattr(settings, 'GATEWAY_DATA_STORE_REMOTE_API_TIMEOUT', (5, 60)))
+    endpoint = f"{method.upper()} {base_url}{path}"
+    start = time.perf_counter()
+    try:
+        r = _get_session().request(
+            method,
+            f'{remote_api_url}{base_url}{encoded_path}',
+            headers=headers,
+            **kwargs,
+        )
+    except Exception:
+        _record_latency(endpoint, time.perf_counter() - start, error=True)
+        raise
+    _record_latency(endpoint, time.perf_counter() - start, error=r.status_code >= 500)
+    if cache_key is not None and r.status_code < 500:
+        response_cache[cache_key] = r
     if raise_for_status:
         r.raise_for_status()
     return r
 
 
+def _get_response_cache(request):
+    """Return dict of cached responses for the request."""
+    # Use the Django request of a DRF request so that the cache is shared
+    request = getattr(request, '_request', request)
+    if not hasattr(request, '_remote_api_response_cache'):
+        request._remote_api_response_cache = {}
+    return request._remote_api_response_cache
+
+
+def _get_response_cache_key(method, path, params=None, stream=False, **kwargs):
+    """Return cache key for the response or None if it can't be cached."""
+    if method.lower() != "get" or stream or not path.startswith(CACHED_PATH_PREFIXES):
+        return None
+    # requests leaves out parameters with a value of None
+    params = sorted((k, str(v)) for k, v in (params or {}).items() if v is not None)
+    return (path, tuple(params))
+
+
+def get_latency_metrics():
+    """
+    Return dict of remote API endpoint (method, base URL and path template)
+    to its latency metrics: number of calls, number of errors (connection
+    errors and 5xx responses), and total and max seconds until the response
+    headers were received.
+    """
+    with _latency_metrics_lock:
+        return {endpoint: dict(metrics) for endpoint, metrics in _latency_metrics.items()}
+
+
+def reset_latency_metrics():
+    with _latency_metrics_lock:
+        _latency_metrics.clear()
+
+
+def _record_latency(endpoint, seconds, error=False):
+    logger.debug(f"{endpoint} took {seconds:.3f} seconds")
+    with _latency_metrics_lock:
+        metrics = _latency_metrics.setdefault(
+            endpoint, {'count': 0, 'errors': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+        metrics['count'] += 1
+        if error:
+            metrics['errors'] += 1
+        metrics['total_seconds'] += seconds
+        metrics['max_seconds'] = max(metrics['max_seconds'], seconds)
+
+
+def _get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _create_session()
+    return _session
+
+
+def _create_session():
+    pool_size = getattr(settings, 'GATEWAY_DATA_STORE_REMOTE_API_POOL_SIZE', 10)
+    # By default Retry only retries idempotent methods on read errors and
+    # retryable statuses. Connection errors are retried for any method since
+    # the request wasn't sent.
+    retry = Retry(
+        total=getattr(settings, 'GATEWAY_DATA_STORE_REMOTE_API_RETRIES', 3),
+        backoff_factor=getattr(settings, 'GATEWAY_DATA_STORE_REMOTE_API_RETRY_BACKOFF_FACTOR', 0.5),
+        status_forcelist=(502, 503, 504),
+        # Return the last response instead of raising, callers check the status
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    # The session is shared by all users, so cookies set by the remote API
+    # (session id, CSRF token) must not be sent with other users' requests
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
 def raise_if_404(response, msg, exception_class=ObjectDoesNotExist):
     if response.status_code == 404:
         raise exception_class(msg)
+
+
+class ResponseFile(io.RawIOBase):
+    """
+    Read-only file object that streams the body of a requests response, which
+    must have been made with stream=True. Wrap in io.BufferedReader for
+    buffered reads. Closing the file closes the response. `size` is the
+    response's Content-Length, or None if unknown.
+    """
+
+    def __init__(self, response, name=None, chunk_size=io.DEFAULT_BUFFER_SIZE):
+        self.response = response
+        # Give the file object a name just like a real opened file object
+        self.name = name
+        self.size = None
+        # Content-Length is the size of the encoded body, not what's read
+        if response.headers.get('Content-Encoding', 'identity') == 'identity':
+            content_length = response.headers.get('Content-Length')
+            if content_length is not None and content_length.isdigit():
+                self.size = int(content_length)
+        # iter_content decodes the Content-Encoding, if any
+        self._chunks = response.iter_content(chunk_size=chunk_size)
+        self._chunk = memoryview(b"")
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if len(self._chunk) == 0:
+            self._chunk = memoryview(next(self._chunks, b""))
+        n = min(len(b), len(self._chunk))
+        b[:n] = self._chunk[:n]
+        self._chunk = self._chunk[n:]
+        return n
+
+    def close(self):
+        if not self.closed:
+            self.response.close()
+        super().close()
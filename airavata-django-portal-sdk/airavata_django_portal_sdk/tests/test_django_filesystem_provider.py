@@ -0,0 +1,177 @@
+import io
+import os
+import tempfile
+from unittest.mock import patch
+
+from airavata.model.security.ttypes import AuthzToken
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from airavata_django_portal_sdk.models import DirectorySize
+from airavata_django_portal_sdk.user_storage.backends.django_filesystem_provider import (
+    DjangoFileSystemProvider,
+    _Datastore
+)
+
+
+@override_settings(USER_STORAGE_DIRECTORY_SIZE_INDEX_TTL=600,
+                   FILE_UPLOAD_DIRECTORY_PERMISSIONS=0o777)
+class DirectorySizeIndexTests(TestCase):
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.directory = tmpdir.name
+        self.datastore = _Datastore(directory=self.directory)
+        self._write("project/exp1/a.txt", b"1234")
+        self._write("project/exp1/sub/b.txt", b"12")
+        self._write("project/c.txt", b"1")
+
+    def _write(self, path, content):
+        full_path = os.path.join(self.directory, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, 'wb') as f:
+            f.write(content)
+
+    def _file(self, content, name="new.txt"):
+        file = io.BytesIO(content)
+        file.name = name
+        return file
+
+    def test_size(self):
+        self.assertEqual(7, self.datastore.size("project"))
+        self.assertEqual(6, self.datastore.size("project/exp1"))
+        self.assertEqual(3, DirectorySize.objects.count())
+
+    def test_size_uses_index(self):
+        self.datastore.size("project")
+        with self.assertNumQueries(1):
+            self.assertEqual({"project": 7, "project/exp1": 6},
+                             self.datastore.dir_sizes(["project", "project/exp1"]))
+
+    def test_size_rescanned_when_mtime_changes(self):
+        self.datastore.size("project")
+        # Change made outside of the datastore
+        self._write("project/exp1/d.txt", b"123")
+        self.assertEqual(9, self.datastore.size("project/exp1"))
+        # TODO: the parent's mtime is unchanged, so its size is only updated
+        #       after the TTL
+        self.assertEqual(7, self.datastore.size("project"))
+
+    def test_size_recomputed_from_direct_subdirectories(self):
+        self.datastore.size("project")
+        # Out of date entry for project, its subdirectories are still valid
+        self._write("project/d.txt", b"123")
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(10, self.datastore.size("project"))
+        selects = [q['sql'] for q in queries.captured_queries
+                   if q['sql'].startswith("SELECT")]
+        # Entry of project, then entries of its direct subdirectories
+        self.assertEqual(2, len(selects))
+        self.assertNotIn("LIKE", " ".join(selects))
+        self.assertEqual(6, self.datastore.size("project/exp1"))
+
+    def test_size_queries_per_tree_level(self):
+        for i in range(5):
+            self._write(f"project/exp{i}/sub/d.txt", b"1")
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(12, self.datastore.size("project"))
+        selects = [q['sql'] for q in queries.captured_queries
+                   if q['sql'].startswith("SELECT")]
+        # Entry of project, then the entries of each of the 3 levels of
+        # subdirectories
+        self.assertEqual(4, len(selects))
+        self.assertEqual(3, self.datastore.size("project/exp1/sub"))
+
+    def test_delete_dir_without_valid_entry(self):
+        self.datastore.size("project")
+        self._write("project/exp1/sub/d.txt", b"123")
+        with patch.object(self.datastore.size_index, '_compute_size') as compute_size:
+            self.datastore.delete_dir("project/exp1")
+        compute_size.assert_not_called()
+        self.assertEqual(1, self.datastore.size("project"))
+
+    @override_settings(USER_STORAGE_DIRECTORY_SIZE_INDEX_TTL=0)
+    def test_size_without_index(self):
+        self.assertEqual(7, self.datastore.size("project"))
+        self.assertEqual(0, DirectorySize.objects.count())
+
+    def test_save_and_delete_update_index(self):
+        self.datastore.size("project")
+        self.datastore.save("project/exp1/sub", self._file(b"12345"))
+        self.datastore.save("project/exp2", self._file(b"123"))
+        with self.assertNumQueries(1):
+            self.assertEqual({"project": 15, "project/exp1": 11, "project/exp1/sub": 7},
+                             self.datastore.dir_sizes(["project", "project/exp1", "project/exp1/sub"]))
+        self.datastore.delete("project/exp1/a.txt")
+        self.datastore.delete_dir("project/exp1/sub")
+        with self.assertNumQueries(1):
+            self.assertEqual({"project": 4, "project/exp1": 0},
+                             self.datastore.dir_sizes(["project", "project/exp1"]))
+        self.assertFalse(DirectorySize.objects.filter(path__endswith="sub").exists())
+
+    def test_update_and_create_dir_update_index(self):
+        self.datastore.size("project")
+        self.datastore.update("project/exp1/a.txt", io.StringIO("123456"))
+        self.datastore.create_user_dir("project/exp1/new")
+        with self.assertNumQueries(1):
+            self.assertEqual({"project": 9, "project/exp1": 8},
+                             self.datastore.dir_sizes(["project", "project/exp1"]))
+
+    def test_symlinked_dirs_not_included(self):
+        with tempfile.TemporaryDirectory() as other_dir:
+            with open(os.path.join(other_dir, "e.txt"), 'wb') as f:
+                f.write(b"123")
+            self.datastore.create_symlink(other_dir, "project/link")
+            self.assertEqual(7, self.datastore.size("project"))
+            self.assertEqual(3, self.datastore.size("project/link"))
+            self.datastore.save("project/link", self._file(b"12"))
+            self.assertEqual(5, self.datastore.size("project/link"))
+            self.assertEqual(7, self.datastore.size("project"))
+
+
+class ScanDirTests(TestCase):
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.directory = tmpdir.name
+        os.makedirs(os.path.join(self.directory, "testuser", "dir", "sub"))
+        with open(os.path.join(self.directory, "testuser", "dir", "sub", "a.txt"), 'wb') as f:
+            f.write(b"1234")
+        with open(os.path.join(self.directory, "testuser", "dir", "b.txt"), 'wb') as f:
+            f.write(b"12")
+        os.symlink(os.path.join(self.directory, "does-not-exist"),
+                   os.path.join(self.directory, "testuser", "dir", "broken-symlink"))
+        self.request = RequestFactory().get("/")
+
+    def _get_provider(self):
+        authz_token = AuthzToken(accessToken="dummy", claimsMap={'userName': "testuser"})
+        return DjangoFileSystemProvider(
+            authz_token, "resourceId", context={'request': self.request},
+            directory=self.directory)
+
+    def test_get_metadata(self):
+        dirs, files = self._get_provider().get_metadata("dir")
+        self.assertEqual(["sub"], [d['name'] for d in dirs])
+        self.assertEqual(os.path.join("dir", "sub"), dirs[0]['path'])
+        self.assertEqual(os.path.join(self.directory, "testuser", "dir", "sub"),
+                         dirs[0]['resource_path'])
+        self.assertEqual(4, dirs[0]['size'])
+        self.assertEqual(["b.txt"], [f['name'] for f in files])
+        self.assertEqual(2, files[0]['size'])
+        self.assertAlmostEqual(os.path.getmtime(files[0]['resource_path']),
+                               files[0]['modified_time'].timestamp(), places=5)
+
+        dirs, files = self._get_provider().get_metadata("dir/b.txt")
+        self.assertEqual([], dirs)
+        self.assertEqual("b.txt", files[0]['name'])
+        self.assertEqual(os.path.join("dir", "b.txt"), files[0]['path'])
+        self.assertEqual(2, files[0]['size'])
+
+    def test_datastore_reused_for_request(self):
+        datastore = self._get_provider().datastore
+        self.assertIs(datastore, self._get_provider().datastore)
+        self.request = RequestFactory().get("/")
+        self.assertIsNot(datastore, self._get_provider().datastore)
@@ -0,0 +1,114 @@
+from unittest import skipIf
+from unittest.mock import MagicMock, patch
+
+from airavata.model.security.ttypes import AuthzToken
+from django.test import SimpleTestCase
+
+try:
+    # MFTUserStorageProvider's dependencies may not be loaded
+    from airavata_django_portal_sdk.user_storage.backends import mft_provider
+except Exception:
+    mft_provider = None
+
+
+@skipIf(mft_provider is None, "MFTUserStorageProvider can't be imported")
+class MFTUserStorageProviderTests(SimpleTestCase):
+
+    def setUp(self):
+        patcher = patch.dict(mft_provider._stubs, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.dict(mft_provider._base_resource_paths, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.dict(mft_provider._metadata_cache, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(mft_provider.grpc, 'insecure_channel')
+        self.insecure_channel = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(mft_provider.MFTApi_pb2_grpc, 'MFTApiServiceStub')
+        self.stub = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self.stub.getDirectoryResourceMetadata.return_value.resourcePath = "/data"
+        self.stub.getDirectoryResourceMetadata.return_value.directories = []
+        self.stub.getDirectoryResourceMetadata.return_value.files = []
+
+    def _get_provider(self, username="testuser", **kwargs):
+        authz_token = AuthzToken(accessToken="dummy", claimsMap={'userName': username})
+        return mft_provider.MFTUserStorageProvider(
+            authz_token, "resourceId", resource_token="token",
+            mft_api_endpoint="localhost:7004", resource_per_gateway=True,
+            mft_api_timeout=5, **kwargs)
+
+    def test_channel_and_base_resource_path_shared(self):
+        self.assertTrue(self._get_provider().is_dir("foo"))
+        self.assertTrue(self._get_provider("otheruser").is_file("bar"))
+
+        self.insecure_channel.assert_called_once_with(
+            "localhost:7004", options=mft_provider.CHANNEL_OPTIONS)
+        # Once for the base resource path and once for is_dir
+        self.assertEqual(2, self.stub.getDirectoryResourceMetadata.call_count)
+        request, = self.stub.getFileResourceMetadata.call_args[0]
+        self.assertEqual("/data/otheruser/bar", request.childPath)
+        for rpc_call in (self.stub.getDirectoryResourceMetadata.call_args_list +
+                         self.stub.getFileResourceMetadata.call_args_list):
+            self.assertEqual({'timeout': 5}, rpc_call[1])
+
+    def _set_listing(self, directories=(), files=()):
+        listing = self.stub.getDirectoryResourceMetadata.return_value
+        listing.directories = [MagicMock(friendlyName=name) for name in directories]
+        listing.files = [MagicMock(friendlyName=name) for name in files]
+
+    def test_metadata_from_cached_parent_listing(self):
+        self._set_listing(directories=["foo"], files=["bar"])
+        provider = self._get_provider()
+
+        self.assertTrue(provider.exists("foo"))
+        self.assertTrue(provider.is_dir("foo"))
+        self.assertFalse(provider.is_file("foo"))
+        self.assertTrue(provider.is_file("bar"))
+        self.assertFalse(provider.is_dir("baz"))
+        dirs, files = provider.get_metadata("bar")
+        self.assertEqual([], dirs)
+        self.assertEqual(1, len(files))
+
+        # Once for the base resource path and once for the listing of the
+        # user's directory
+        self.assertEqual(2, self.stub.getDirectoryResourceMetadata.call_count)
+        self.stub.getFileResourceMetadata.assert_called_once()
+        self.assertTrue(self._get_provider().is_dir("foo"))
+        self.assertEqual(2, self.stub.getDirectoryResourceMetadata.call_count)
+
+    def _rpc_error(self, status_code):
+        error = mft_provider.grpc.RpcError()
+        error.code = lambda: status_code
+        return error
+
+    def test_not_found_cached(self):
+        self.stub.getFileResourceMetadata.side_effect = self._rpc_error(
+            mft_provider.grpc.StatusCode.NOT_FOUND)
+        provider = self._get_provider()
+
+        self.assertFalse(provider.is_file("foo"))
+        self.assertFalse(provider.is_file("foo"))
+        self.stub.getFileResourceMetadata.assert_called_once()
+
+    def test_other_errors_not_cached(self):
+        self.stub.getFileResourceMetadata.side_effect = [
+            self._rpc_error(mft_provider.grpc.StatusCode.UNAVAILABLE),
+            MagicMock(),
+        ]
+        provider = self._get_provider()
+
+        self.assertFalse(provider.is_file("foo"))
+        self.assertTrue(provider.is_file("foo"))
+        self.assertEqual(2, self.stub.getFileResourceMetadata.call_count)
+
+    def test_metadata_cache_disabled(self):
+        self._set_listing(directories=["foo"])
+        provider = self._get_provider(metadata_cache_ttl=0)
+
+        self.assertTrue(provider.exists("foo"))
+        self.assertTrue(provider.exists("foo"))
+        self.assertEqual(3, self.stub.getDirectoryResourceMetadata.call_count)
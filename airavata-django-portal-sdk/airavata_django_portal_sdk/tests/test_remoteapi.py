@@ -0,0 +1,153 @@
+from http.client import HTTPMessage
+from unittest.mock import MagicMock, patch
+
+import requests
+from requests.adapters import BaseAdapter
+from airavata.model.security.ttypes import AuthzToken
+from django.test import RequestFactory, TestCase, override_settings
+
+from airavata_django_portal_sdk import remoteapi
+
+
+@override_settings(GATEWAY_DATA_STORE_REMOTE_API="https://remote.example.com")
+class CallTests(TestCase):
+
+    def setUp(self):
+        self.request = RequestFactory().get("/")
+        self.request.authz_token = AuthzToken(accessToken="dummy")
+        remoteapi.reset_latency_metrics()
+        self.addCleanup(remoteapi.reset_latency_metrics)
+        patcher = patch.object(remoteapi._get_session(), 'request')
+        self.session_request = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _response(self, status_code):
+        response = requests.Response()
+        response.status_code = status_code
+        return response
+
+    def test_session_is_reused(self):
+        self.assertIs(remoteapi._get_session(), remoteapi._get_session())
+
+    def test_call(self):
+        self.session_request.return_value = self._response(200)
+
+        remoteapi.call(self.request, "/user-storage/~/{path}", path_params={"path": "a b"})
+
+        self.session_request.assert_called_once_with(
+            "get", "https://remote.example.com/api/user-storage/~/a%20b",
+            headers={'Authorization': "Bearer dummy"}, timeout=(5, 60))
+
+    @override_settings(GATEWAY_DATA_STORE_REMOTE_API_TIMEOUT=10)
+    def test_call_timeout(self):
+        self.session_request.return_value = self._response(200)
+
+        remoteapi.call(self.request, "/experiments/", timeout=1)
+        remoteapi.call(self.request, "/experiments/")
+
+        self.assertEqual([1, 10], [c[1]['timeout'] for c in self.session_request.call_args_list])
+
+    def test_latency_metrics(self):
+        self.session_request.side_effect = [
+            self._response(200), self._response(503), requests.ConnectionError()]
+
+        remoteapi.call(self.request, "/user-storage/~/{path}", path_params={"path": "a"})
+        remoteapi.call(self.request, "/user-storage/~/{path}", path_params={"path": "b"},
+                       raise_for_status=False)
+        with self.assertRaises(requests.ConnectionError):
+            remoteapi.call(self.request, "/download", base_url="/sdk")
+
+        metrics = remoteapi.get_latency_metrics()
+        self.assertEqual({"GET /api/user-storage/~/{path}", "GET /sdk/download"}, set(metrics))
+        self.assertEqual(2, metrics["GET /api/user-storage/~/{path}"]['count'])
+        self.assertEqual(1, metrics["GET /api/user-storage/~/{path}"]['errors'])
+        self.assertEqual(1, metrics["GET /sdk/download"]['errors'])
+        self.assertGreaterEqual(metrics["GET /sdk/download"]['max_seconds'], 0)
+
+    def test_responses_cached_for_request(self):
+        self.session_request.side_effect = [self._response(404), self._response(200)]
+
+        for i in range(2):
+            response = remoteapi.call(self.request, "/data-products/",
+                                      params={'product-uri': "airavata-dp://1"},
+                                      raise_for_status=False)
+            self.assertEqual(404, response.status_code)
+            with self.assertRaises(requests.HTTPError):
+                remoteapi.call(self.request, "/data-products/",
+                               params={'product-uri': "airavata-dp://1"})
+        self.assertEqual(1, self.session_request.call_count)
+
+        # Not cached for another request
+        request = RequestFactory().get("/")
+        request.authz_token = self.request.authz_token
+        remoteapi.call(request, "/data-products/", params={'product-uri': "airavata-dp://1"})
+        self.assertEqual(2, self.session_request.call_count)
+
+    def test_response_cache_cleared_by_write(self):
+        self.session_request.return_value = self._response(200)
+
+        remoteapi.call(self.request, "/user-storage/~/", params={'path': "a", 'experiment-id': None})
+        remoteapi.call(self.request, "/user-storage/~/", params={'path': "a"})
+        self.assertEqual(1, self.session_request.call_count)
+        remoteapi.call(self.request, "/user-storage/~/{path}", path_params={'path': "a"},
+                       method="delete")
+        remoteapi.call(self.request, "/user-storage/~/", params={'path': "a"})
+        self.assertEqual(3, self.session_request.call_count)
+
+    def test_other_responses_not_cached(self):
+        self.session_request.return_value = self._response(200)
+
+        for i in range(2):
+            remoteapi.call(self.request, "/experiments/")
+            remoteapi.call(self.request, "/download", base_url="/sdk")
+            remoteapi.call(self.request, "/data-products/", params={'product-uri': "airavata-dp://1"},
+                           stream=True)
+        self.assertEqual(6, self.session_request.call_count)
+
+
+class CreateSessionTests(TestCase):
+
+    @override_settings(GATEWAY_DATA_STORE_REMOTE_API_POOL_SIZE=4,
+                       GATEWAY_DATA_STORE_REMOTE_API_RETRIES=2)
+    def test_create_session(self):
+        session = remoteapi._create_session()
+        adapter = session.get_adapter("https://remote.example.com")
+        self.assertEqual(4, adapter._pool_maxsize)
+        self.assertEqual(2, adapter.max_retries.total)
+        # Only idempotent methods are retried on read errors
+        self.assertTrue(adapter.max_retries._is_method_retryable("GET"))
+        self.assertFalse(adapter.max_retries._is_method_retryable("POST"))
+
+    def test_cookies_not_stored(self):
+        session = remoteapi._create_session()
+        adapter = _CookieAdapter()
+        session.mount("https://", adapter)
+
+        session.get("https://remote.example.com/api/user-storage/~/")
+        session.get("https://remote.example.com/api/user-storage/~/")
+
+        self.assertEqual(0, len(session.cookies))
+        self.assertEqual([None, None], [r.headers.get('Cookie') for r in adapter.requests])
+
+
+class _CookieAdapter(BaseAdapter):
+    """Adapter that responds with a Set-Cookie header."""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        headers = HTTPMessage()
+        headers['Set-Cookie'] = "sessionid=abc; Path=/"
+        response = requests.Response()
+        response.status_code = 200
+        response.request = request
+        response.url = request.url
+        response.raw = MagicMock()
+        response.raw._original_response.msg = headers
+        return response
+
+    def close(self):
+        pass
@@ -1,10 +1,13 @@
 import io
+import json
 import os
 import tempfile
+import threading
 import uuid
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 from urllib.parse import urlparse
 
+import requests
 from airavata.model.data.replica.ttypes import (
     DataProductModel,
     DataProductType,
@@ -14,8 +17,10 @@ from airavata.model.data.replica.ttypes import (
 from airavata.model.security.ttypes import AuthzToken
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.exceptions import ObjectDoesNotExist
 from django.test import RequestFactory, TestCase, override_settings
 
+from airavata_django_portal_sdk.models import UserFiles
 from airavata_django_portal_sdk.user_storage import api as user_storage
 
 GATEWAY_ID = 'test-gateway'
@@ -236,6 +241,160 @@ class ListDirTests(BaseTestCase):
             self.assertEqual("foo.ext", files[0]["name"])
         pass
 
+    def test_listdir_uses_registered_user_files(self):
+        "Verify listdir looks up data products and mime types in the DB"
+        with tempfile.TemporaryDirectory() as tmpdirname, \
+                self.settings(GATEWAY_DATA_STORE_DIR=tmpdirname,
+                              GATEWAY_DATA_STORE_HOSTNAME="gateway.com"):
+            user_dir = os.path.join(tmpdirname, self.user.username)
+            os.makedirs(user_dir)
+            for i in range(3):
+                with open(os.path.join(user_dir, f"foo{i}.txt"), 'wb') as f:
+                    f.write(b"123")
+            self.request.airavata_client.registerDataProduct.side_effect = [
+                f"airavata-dp://{i}" for i in range(3)]
+
+            dirs, files = user_storage.listdir(self.request, "")
+            self.assertEqual(3, self.request.airavata_client.registerDataProduct.call_count)
+            self.request.airavata_client.getDataProduct.assert_not_called()
+            self.assertEqual(["text/plain"] * 3, [f['mime_type'] for f in files])
+
+            with self.assertNumQueries(1):
+                dirs, files = user_storage.listdir(self.request, "")
+            self.assertEqual(
+                {"airavata-dp://0", "airavata-dp://1", "airavata-dp://2"},
+                {f['data-product-uri'] for f in files})
+            self.assertEqual(["text/plain"] * 3, [f['mime_type'] for f in files])
+            self.assertEqual(3, self.request.airavata_client.registerDataProduct.call_count)
+            self.request.airavata_client.getDataProduct.assert_not_called()
+
+    def test_listdir_backfills_mime_type(self):
+        "Verify listdir loads mime type of UserFiles entries without one"
+        with tempfile.TemporaryDirectory() as tmpdirname, \
+                self.settings(GATEWAY_DATA_STORE_DIR=tmpdirname,
+                              GATEWAY_DATA_STORE_HOSTNAME="gateway.com"):
+            user_dir = os.path.join(tmpdirname, self.user.username)
+            os.makedirs(user_dir)
+            test_file_path = os.path.join(user_dir, "foo.ext")
+            with open(test_file_path, 'wb') as f:
+                f.write(b"123")
+            UserFiles.objects.create(
+                username=self.user.username, file_path=test_file_path,
+                file_dpu=self.product_uri, file_resource_id=settings.GATEWAY_DATA_STORE_RESOURCE_ID)
+            self.request.airavata_client.getDataProduct.return_value = DataProductModel(
+                productUri=self.product_uri, productMetadata={'mime-type': "application/x-foo"})
+
+            dirs, files = user_storage.listdir(self.request, "")
+            self.assertEqual("application/x-foo", files[0]['mime_type'])
+            dirs, files = user_storage.listdir(self.request, "")
+            self.assertEqual("application/x-foo", files[0]['mime_type'])
+            self.request.airavata_client.getDataProduct.assert_called_once()
+            self.request.airavata_client.registerDataProduct.assert_not_called()
+            self.assertEqual("application/x-foo",
+                             UserFiles.objects.get(file_dpu=self.product_uri).file_mime_type)
+
+    def test_listdir_registers_new_files_in_bulk(self):
+        "Verify listdir saves UserFiles for new files with one query"
+        with tempfile.TemporaryDirectory() as tmpdirname, \
+                self.settings(GATEWAY_DATA_STORE_DIR=tmpdirname,
+                              GATEWAY_DATA_STORE_HOSTNAME="gateway.com"):
+            user_dir = os.path.join(tmpdirname, self.user.username)
+            os.makedirs(user_dir)
+            for i in range(5):
+                with open(os.path.join(user_dir, f"foo{i}.txt"), 'wb') as f:
+                    f.write(b"123")
+            self.request.airavata_client.registerDataProduct.side_effect = [
+                f"airavata-dp://{i}" for i in range(5)]
+
+            # One query to look up UserFiles, one to create them
+            with self.assertNumQueries(2):
+                dirs, files = user_storage.listdir(self.request, "")
+            self.assertEqual(5, UserFiles.objects.filter(username=self.user.username).count())
+            self.assertEqual({f"airavata-dp://{i}" for i in range(5)},
+                             {f['data-product-uri'] for f in files})
+
+    def test_listdir_determines_content_types_concurrently(self):
+        "Verify listdir reads files of unknown type concurrently"
+        with tempfile.TemporaryDirectory() as tmpdirname, \
+                self.settings(GATEWAY_DATA_STORE_DIR=tmpdirname,
+                              GATEWAY_DATA_STORE_HOSTNAME="gateway.com"):
+            user_dir = os.path.join(tmpdirname, self.user.username)
+            os.makedirs(user_dir)
+            with open(os.path.join(user_dir, "text"), 'wb') as f:
+                f.write(b"123")
+            with open(os.path.join(user_dir, "binary"), 'wb') as f:
+                f.write(b"\xff\xfe")
+            self.request.airavata_client.registerDataProduct.side_effect = [
+                f"airavata-dp://{i}" for i in range(2)]
+            thread_names = []
+            determine_content_type = user_storage._determine_content_type
+
+            def record_thread(*args, **kwargs):
+                # Files are only read when a backend is passed
+                if kwargs.get('backend') is not None:
+                    thread_names.append(threading.current_thread().name)
+                return determine_content_type(*args, **kwargs)
+
+            with patch.object(user_storage, '_determine_content_type', side_effect=record_thread):
+                dirs, files = user_storage.listdir(self.request, "")
+
+            self.assertEqual({"binary": None, "text": "text/plain"},
+                             {f['name']: f['mime_type'] for f in files})
+            self.assertEqual(2, len(thread_names))
+            for thread_name in thread_names:
+                self.assertTrue(thread_name.startswith("user-storage-content-type"))
+
+    @override_settings(ROOT_URLCONF="airavata_django_portal_sdk.tests.urls")
+    def test_listdir_lazy_registration(self):
+        "Verify listdir doesn't register data products with lazy registration"
+        with tempfile.TemporaryDirectory() as tmpdirname, \
+                self.settings(GATEWAY_DATA_STORE_DIR=tmpdirname,
+                              GATEWAY_DATA_STORE_HOSTNAME="gateway.com"):
+            user_dir = os.path.join(tmpdirname, self.user.username)
+            os.makedirs(os.path.join(user_dir, "subdir"))
+            with open(os.path.join(user_dir, "subdir", "foo.txt"), 'wb') as f:
+                f.write(b"123")
+
+            dirs, files = user_storage.listdir(self.request, "subdir", lazy_registration=True)
+            self.request.airavata_client.registerDataProduct.assert_not_called()
+            self.assertIsNone(files[0]['data-product-uri'])
+            self.assertEqual("text/plain", files[0]['mime_type'])
+            self.assertEqual(
+                "http://testserver/sdk/download/?path=subdir%2Ffoo.txt",
+                files[0]['download-url'])
+
+            file = user_storage.get_file_metadata(self.request, "subdir/foo.txt")
+            self.assertEqual(self.product_uri, file['data-product-uri'])
+            self.request.airavata_client.registerDataProduct.assert_called_once()
+
+    def test_listdir_sorted_filtered_and_paged(self):
+        "Verify listdir only registers data products for the returned page"
+        with tempfile.TemporaryDirectory() as tmpdirname, \
+                self.settings(GATEWAY_DATA_STORE_DIR=tmpdirname,
+                              GATEWAY_DATA_STORE_HOSTNAME="gateway.com"):
+            user_dir = os.path.join(tmpdirname, self.user.username)
+            os.makedirs(os.path.join(user_dir, "foo-dir"))
+            os.makedirs(os.path.join(user_dir, "bar-dir"))
+            for i in range(5):
+                with open(os.path.join(user_dir, f"foo{i}.txt"), 'wb') as f:
+                    f.write(b"1" * (5 - i))
+            self.request.airavata_client.registerDataProduct.side_effect = [
+                f"airavata-dp://{i}" for i in range(5)]
+
+            dirs, files = user_storage.listdir(self.request, "", name_prefix="foo",
+                                               ordering="size", limit=3)
+            self.assertEqual(["foo-dir"], [d['name'] for d in dirs])
+            self.assertEqual(["foo4.txt", "foo3.txt"], [f['name'] for f in files])
+            self.assertEqual(2, self.request.airavata_client.registerDataProduct.call_count)
+
+            dirs, files = user_storage.listdir(self.request, "", ordering="-name", offset=3)
+            self.assertEqual([], dirs)
+            self.assertEqual(["foo3.txt", "foo2.txt", "foo1.txt", "foo0.txt"],
+                             [f['name'] for f in files])
+
+            with self.assertRaises(ValueError):
+                user_storage.listdir(self.request, "", ordering="path")
+
 
 class ExistsTests(BaseTestCase):
     def test_user_storage_configured(self):
@@ -362,3 +521,90 @@ class SaveInputFileTests(BaseTestCase):
             self.assertNotEqual(dp1.replicaLocations[0].filePath, dp2.replicaLocations[0].filePath)
             # Check that the saved location was renamed to not conflict with the first upload
             self.assertTrue(os.path.basename(dp2.replicaLocations[0].filePath).startswith("foo_"))
+
+
+class ListDirRemoteAPITests(BaseTestCase):
+
+    @override_settings(GATEWAY_DATA_STORE_REMOTE_API="https://remote.example.com")
+    @patch("airavata_django_portal_sdk.remoteapi._get_session")
+    def test_listdir_sets_download_url(self, get_session):
+        "Verify remote downloadURL is used for files that aren't registered yet"
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps({
+            "directories": [],
+            "files": [{
+                "name": "foo.txt",
+                "path": "foo.txt",
+                "createdTime": "2023-01-01T00:00:00.000000Z",
+                "modifiedTime": "2023-01-01T00:00:00.000000Z",
+                "mimeType": "text/plain",
+                "dataProductURI": None,
+                "downloadURL": "https://remote.example.com/sdk/download/?path=foo.txt",
+                "size": 3,
+                "hidden": False,
+            }],
+        }).encode()
+        get_session.return_value.request.return_value = response
+
+        _, files = user_storage.listdir(self.request, "")
+
+        self.assertEqual(1, len(files))
+        self.assertIsNone(files[0]['data-product-uri'])
+        self.assertEqual("https://remote.example.com/sdk/download/?path=foo.txt",
+                         files[0]['download-url'])
+
+
+class OpenFileRemoteAPITests(BaseTestCase):
+
+    @override_settings(GATEWAY_DATA_STORE_REMOTE_API="https://remote.example.com")
+    @patch("airavata_django_portal_sdk.remoteapi._get_session")
+    def test_open_file_streams_response(self, get_session):
+        "Verify open_file streams the file from the remote API"
+        content = b"123" * io.DEFAULT_BUFFER_SIZE
+        response = requests.Response()
+        response.status_code = 200
+        response.headers['Content-Disposition'] = 'attachment; filename="foo.txt"'
+        response.headers['Content-Length'] = str(len(content))
+        response.raw = io.BytesIO(content)
+        response.close = MagicMock(wraps=response.close)
+        request_mock = get_session.return_value.request
+        request_mock.return_value = response
+
+        with user_storage.open_file(self.request, data_product_uri=self.product_uri) as f:
+            self.assertTrue(request_mock.call_args[1]['stream'])
+            self.assertEqual("foo.txt", f.name)
+            self.assertEqual(len(content), f.size)
+            self.assertEqual(content[:10], f.read(10))
+            # Body hasn't been read into memory
+            self.assertFalse(response._content_consumed)
+            self.assertEqual(content[10:], f.read())
+        response.close.assert_called_once()
+
+    @override_settings(GATEWAY_DATA_STORE_REMOTE_API="https://remote.example.com")
+    @patch("airavata_django_portal_sdk.remoteapi._get_session")
+    def test_open_file_size_of_encoded_response(self, get_session):
+        "Verify the size is unknown when Content-Length isn't the decoded size"
+        response = requests.Response()
+        response.status_code = 200
+        response.headers['Content-Disposition'] = 'attachment; filename="foo.txt"'
+        response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Content-Length'] = '10'
+        response.raw = io.BytesIO(b"")
+        get_session.return_value.request.return_value = response
+
+        with user_storage.open_file(self.request, data_product_uri=self.product_uri) as f:
+            self.assertIsNone(f.size)
+
+    @override_settings(GATEWAY_DATA_STORE_REMOTE_API="https://remote.example.com")
+    @patch("airavata_django_portal_sdk.remoteapi._get_session")
+    def test_open_file_not_found(self, get_session):
+        response = requests.Response()
+        response.status_code = 404
+        response.raw = io.BytesIO(b"")
+        request_mock = get_session.return_value.request
+        request_mock.return_value = response
+
+        with self.assertRaises(ObjectDoesNotExist):
+            user_storage.open_file(self.request, data_product_uri=self.product_uri)
+        self.assertTrue(response.raw.closed)
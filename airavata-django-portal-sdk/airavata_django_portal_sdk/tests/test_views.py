@@ -1,8 +1,13 @@
 import io
+import os
+import tempfile
 import zipfile
-from unittest.mock import ANY, call, patch
+from datetime import datetime, timezone
+from unittest.mock import ANY, MagicMock, call, patch
 
+from django.core.exceptions import ObjectDoesNotExist
 from django.test import TestCase
+from django.utils.http import http_date
 from rest_framework.test import APIRequestFactory
 
 from airavata_django_portal_sdk import views
@@ -120,3 +125,124 @@ class DownloadDirTestCase(TestCase):
             empty_file.name = name
             return empty_file
         return open_file
+
+
+class _StreamFile(io.BytesIO):
+    """File like object that can't seek, like a file from the remote API."""
+
+    def seekable(self):
+        return False
+
+
+@patch("airavata_django_portal_sdk.views.user_storage")
+class DownloadFileTestCase(TestCase):
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.file_path = os.path.join(tmpdir.name, "file.txt")
+        with open(self.file_path, 'wb') as f:
+            f.write(b"0123456789")
+        mtime = datetime(2023, 1, 2, tzinfo=timezone.utc).timestamp()
+        os.utime(self.file_path, (mtime, mtime))
+        self.etag = f'"{int(mtime):x}-a"'
+        self.last_modified = http_date(mtime)
+
+    def _get(self, user_storage, data_file=None, accept_encoding="gzip", **extra):
+        user_storage.is_input_file.return_value = False
+        user_storage.open_file.return_value = (
+            data_file if data_file is not None else open(self.file_path, 'rb'))
+        request = APIRequestFactory().get("/download-file/", {'data-product-uri': "dp1"},
+                                          HTTP_ACCEPT_ENCODING=accept_encoding, **extra)
+        request.airavata_client = MagicMock()
+        request.airavata_client.getDataProduct.return_value.productMetadata = {'mime-type': "text/plain"}
+        request.authz_token = MagicMock()
+        response = views.download_file(request)
+        self.addCleanup(response.close)
+        return response
+
+    def test_download_file(self, user_storage):
+        response = self._get(user_storage)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(b"0123456789", response.getvalue())
+        # Not compressed, so Content-Length and the strong ETag hold
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual("10", response['Content-Length'])
+        self.assertEqual(self.etag, response['ETag'])
+        self.assertEqual(self.last_modified, response['Last-Modified'])
+        self.assertEqual("bytes", response['Accept-Ranges'])
+        self.assertEqual('inline; filename="file.txt"', response['Content-Disposition'])
+
+    def test_download_file_range(self, user_storage):
+        response = self._get(user_storage, HTTP_RANGE="bytes=2-5")
+
+        self.assertEqual(206, response.status_code)
+        self.assertEqual(b"2345", response.getvalue())
+        self.assertEqual("bytes 2-5/10", response['Content-Range'])
+        self.assertEqual("4", response['Content-Length'])
+        self.assertNotIn('Content-Encoding', response)
+
+        response = self._get(user_storage, HTTP_RANGE="bytes=-3")
+        self.assertEqual(b"789", response.getvalue())
+        response = self._get(user_storage, HTTP_RANGE="bytes=8-")
+        self.assertEqual(b"89", response.getvalue())
+
+    def test_download_file_range_not_satisfiable(self, user_storage):
+        response = self._get(user_storage, HTTP_RANGE="bytes=10-")
+
+        self.assertEqual(416, response.status_code)
+        self.assertEqual("bytes */10", response['Content-Range'])
+        self.assertTrue(user_storage.open_file.return_value.closed)
+
+    def test_download_file_if_range(self, user_storage):
+        response = self._get(user_storage, HTTP_RANGE="bytes=2-5", HTTP_IF_RANGE=self.etag)
+        self.assertEqual(206, response.status_code)
+
+        response = self._get(user_storage, HTTP_RANGE="bytes=2-5", HTTP_IF_RANGE='"changed"')
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(b"0123456789", b"".join(response.streaming_content))
+
+    def test_download_file_not_modified(self, user_storage):
+        response = self._get(user_storage, HTTP_IF_NONE_MATCH=self.etag)
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(self.etag, response['ETag'])
+        self.assertTrue(user_storage.open_file.return_value.closed)
+
+        response = self._get(user_storage, HTTP_IF_MODIFIED_SINCE=self.last_modified)
+        self.assertEqual(304, response.status_code)
+
+    def test_download_file_not_found(self, user_storage):
+        user_storage.is_input_file.side_effect = ObjectDoesNotExist
+
+        response = self._get(user_storage)
+
+        self.assertEqual(404, response.status_code)
+        self.assertTrue(user_storage.open_file.return_value.closed)
+
+    def test_download_file_stream(self, user_storage):
+        user_storage.get_data_product_metadata.return_value = {
+            'size': 10, 'created_time': datetime(2023, 1, 2, tzinfo=timezone.utc)}
+        raw = _StreamFile(b"0123456789")
+        raw.name = "file.txt"
+        # Like a file from the remote API, see user_storage.open_file
+        data_file = io.BufferedReader(raw)
+        data_file.size = 10
+
+        response = self._get(user_storage, data_file=data_file)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("10", response['Content-Length'])
+        self.assertEqual(b"0123456789", response.getvalue())
+
+    def test_download_file_range_of_stream(self, user_storage):
+        user_storage.get_data_product_metadata.return_value = {
+            'size': 10, 'created_time': datetime(2023, 1, 2, tzinfo=timezone.utc)}
+        data_file = _StreamFile(b"0123456789")
+        data_file.name = "file.txt"
+
+        response = self._get(user_storage, data_file=data_file, HTTP_RANGE="bytes=4-")
+
+        self.assertEqual(206, response.status_code)
+        self.assertEqual(b"456789", response.getvalue())
+        self.assertEqual(self.etag, response['ETag'])
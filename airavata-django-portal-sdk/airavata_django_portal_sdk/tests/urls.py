@@ -0,0 +1,5 @@
+from django.urls import include, path
+
+urlpatterns = [
+    path('sdk/', include('airavata_django_portal_sdk.urls')),
+]
@@ -1,4 +1,5 @@
 from .api import (
+    LISTING_ORDERING_KEYS,
     create_symlink,
     create_user_dir,
     delete,
@@ -27,6 +28,7 @@ from .api import (
 )
 
 __all__ = [
+    'LISTING_ORDERING_KEYS',
     'create_symlink',
     'create_user_dir',
     'delete',
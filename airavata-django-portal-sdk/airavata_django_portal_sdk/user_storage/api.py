@@ -5,7 +5,9 @@ import io
 import logging
 import mimetypes
 import os
+import threading
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from http import HTTPStatus
 from urllib.parse import quote, unquote, urlencode, urlparse
 
@@ -30,6 +32,13 @@ from ..util import convert_iso8601_to_datetime
 logger = logging.getLogger(__name__)
 
 TMP_INPUT_FILE_UPLOAD_DIR = "tmp"
+USER_FILES_QUERY_BATCH_SIZE = 900
+# Metadata keys that listings can be sorted by
+LISTING_ORDERING_KEYS = ('name', 'size', 'modified_time')
+# Thread pool for reading files to determine their content type, see
+# _determine_content_types
+_content_type_executor = None
+_content_type_executor_lock = threading.Lock()
 
 
 def get_user_storage_provider(request, owner_username=None, storage_resource_id=None):
@@ -215,12 +224,28 @@ def _build_download_url(request, data_product, force_download=False, mime_type=N
     return request.build_absolute_uri(f"{reverse('airavata_django_portal_sdk:download_file')}?{urlencode(params)}")
 
 
-def get_lazy_download_url(request, data_product=None, data_product_uri=None):
-    if data_product is None:
-        data_product = _get_data_product(request, data_product_uri)
+def get_lazy_download_url(request, data_product=None, data_product_uri=None,
+                          path=None, storage_resource_id=None, experiment_id=None):
+    """
+    Return URL that redirects to the download URL of a data product. One of
+    `data_product`, `data_product_uri` or `path` is required. When `path` (and
+    optionally `storage_resource_id` and `experiment_id`, see `listdir`) is
+    given, a data product is registered for the file, if needed, when the URL
+    is first requested.
+    """
+    if data_product is not None:
+        data_product_uri = data_product.productUri
+    if data_product_uri is not None:
+        params = {"data-product-uri": data_product_uri}
+    else:
+        params = {"path": path}
+        if storage_resource_id is not None:
+            params["storage-resource-id"] = storage_resource_id
+        if experiment_id is not None:
+            params["experiment-id"] = experiment_id
     # /download will call get_download_url and redirect to it
     return request.build_absolute_uri(reverse("airavata_django_portal_sdk:download") + "?" +
-                                      urlencode({"data-product-uri": data_product.productUri}))
+                                      urlencode(params))
 
 
 def open_file(request, data_product=None, data_product_uri=None):
@@ -236,15 +261,21 @@ def open_file(request, data_product=None, data_product_uri=None):
             "/download",
             params={'data-product-uri': data_product.productUri},
             base_url="/sdk",
-            raise_for_status=False)
-        remoteapi.raise_if_404(resp, f"File does not exist for data product {data_product.productUri}")
-        resp.raise_for_status()
-        file = io.BytesIO(resp.content)
+            raise_for_status=False,
+            stream=True)
+        try:
+            remoteapi.raise_if_404(resp, f"File does not exist for data product {data_product.productUri}")
+            resp.raise_for_status()
+        except Exception:
+            resp.close()
+            raise
         disposition = resp.headers['Content-Disposition']
         disp_value, disp_params = cgi.parse_header(disposition)
-        # Give the file object a name just like a real opened file object
-        file.name = disp_params['filename']
-        return file
+        # Stream the file instead of loading it into memory
+        data_file = io.BufferedReader(remoteapi.ResponseFile(resp, name=disp_params['filename']))
+        # Let the download response set Content-Length, like file storage does
+        data_file.size = data_file.raw.size
+        return data_file
     else:
         storage_resource_id, path = _get_replica_resource_id_and_filepath(data_product)
         backend = get_user_storage_provider(request,
@@ -415,6 +446,7 @@ def get_file_metadata(request, path, storage_resource_id=None, experiment_id=Non
         file['modified_time'] = convert_iso8601_to_datetime(file['modifiedTime'])
         file['mime_type'] = file['mimeType']
         file['data-product-uri'] = file['dataProductURI']
+        file['download-url'] = file.get('downloadURL')
         return file
 
     final_path, owner_username = _get_final_path_and_owner_username(request, path, experiment_id)
@@ -422,17 +454,11 @@ def get_file_metadata(request, path, storage_resource_id=None, experiment_id=Non
     if backend.is_file(final_path):
         _, files = backend.get_metadata(final_path)
         file = files[0]
-        data_product_uri = _get_data_product_uri(request, file['resource_path'],
-                                                 storage_resource_id=backend.resource_id,
-                                                 owner=owner_username)
-
-        data_product = request.airavata_client.getDataProduct(
-            request.authz_token, data_product_uri)
-        mime_type = None
-        if 'mime-type' in data_product.productMetadata:
-            mime_type = data_product.productMetadata['mime-type']
-        file['data-product-uri'] = data_product_uri
-        file['mime_type'] = mime_type
+        user_file = _get_user_files(request, [file['resource_path']],
+                                    storage_resource_id=backend.resource_id,
+                                    owner=owner_username)[file['resource_path']]
+        file['data-product-uri'] = user_file.file_dpu
+        file['mime_type'] = user_file.file_mime_type or None
         # TODO: remove this, there's no need for hidden files
         file['hidden'] = False
         return file
@@ -521,17 +547,31 @@ def delete(request, data_product=None, data_product_uri=None):
             raise
 
 
-def listdir(request, path, storage_resource_id=None, experiment_id=None):
+def listdir(request, path, storage_resource_id=None, experiment_id=None, lazy_registration=None,
+            name_prefix=None, ordering=None, offset=0, limit=None):
     """
     Return a tuple of two lists, one for directories, the second for files.  If
     `experiment_id` provided then the path will be relative to the experiment
     data directory.
+
+    Only entries whose name starts with `name_prefix` are returned. Entries
+    are sorted by `ordering`, one of LISTING_ORDERING_KEYS, optionally
+    prefixed with '-' for descending order; directories and files are sorted
+    separately. `offset` and `limit` select a page of the directories followed
+    by the files. Data products are only looked up for the files in the page.
+
+    If `lazy_registration` is True (defaults to the
+    USER_STORAGE_LAZY_DATA_PRODUCT_REGISTRATION setting), data products aren't
+    registered for files that don't have one yet. Such files have a
+    'data-product-uri' of None and a 'download-url' that registers the data
+    product when the file is first downloaded.
     """
 
     if remoteapi.is_remote_api_configured():
         resp = remoteapi.call(request,
                               "/user-storage/~/",
-                              params={"path": path, "experiment-id": experiment_id},
+                              params={"path": path, "experiment-id": experiment_id,
+                                      **_get_listing_params(name_prefix, ordering, offset, limit)},
                               )
         data = resp.json()
         for directory in data['directories']:
@@ -548,36 +588,41 @@ def listdir(request, path, storage_resource_id=None, experiment_id=None):
                 file['modifiedTime'])
             file['mime_type'] = file['mimeType']
             file['data-product-uri'] = file['dataProductURI']
-        return data['directories'], data['files']
+            file['download-url'] = file.get('downloadURL')
+        if 'limit' in data:
+            return data['directories'], data['files']
+        # Remote API didn't paginate the listing
+        return _filter_sort_and_page(data['directories'], data['files'], name_prefix=name_prefix,
+                                     ordering=ordering, offset=offset, limit=limit)
 
     final_path, owner_username = _get_final_path_and_owner_username(request, path, experiment_id)
     backend = get_user_storage_provider(request, storage_resource_id=storage_resource_id,
                                         owner_username=owner_username)
-    directories, files = backend.get_metadata(final_path)
+    directories, files = _filter_sort_and_page(*backend.get_metadata(final_path), name_prefix=name_prefix,
+                                               ordering=ordering, offset=offset, limit=limit)
     # Mark the TMP_INPUT_FILE_UPLOAD_DIR directory as hidden in the UI
     for directory in directories:
         directory['hidden'] = directory['path'] == TMP_INPUT_FILE_UPLOAD_DIR
     # for each file, lookup or register a data product and enrich the file
     # metadata with data-product-uri and mime-type
+    user_files = _get_user_files(request, [file['resource_path'] for file in files],
+                                 storage_resource_id=backend.resource_id,
+                                 owner=owner_username,
+                                 backend=backend,
+                                 lazy_registration=lazy_registration)
     for file in files:
-        data_product_uri = _get_data_product_uri(request, file['resource_path'],
-                                                 storage_resource_id=backend.resource_id,
-                                                 owner=owner_username,
-                                                 backend=backend)
-
-        data_product = request.airavata_client.getDataProduct(
-            request.authz_token, data_product_uri)
-        mime_type = None
-        if 'mime-type' in data_product.productMetadata:
-            mime_type = data_product.productMetadata['mime-type']
-        file['data-product-uri'] = data_product_uri
-        file['mime_type'] = mime_type
+        _set_data_product_metadata(
+            request, file, user_files.get(file['resource_path']),
+            path=os.path.join(path, file['name']),
+            storage_resource_id=storage_resource_id,
+            experiment_id=experiment_id)
         # TODO: remove this, there's no need for hidden files
         file['hidden'] = False
     return directories, files
 
 
-def list_experiment_dir(request, experiment_id, path="", storage_resource_id=None):
+def list_experiment_dir(request, experiment_id, path="", storage_resource_id=None, lazy_registration=None,
+                        name_prefix=None, ordering=None, offset=0, limit=None):
     """
     List files, directories in experiment data directory. Returns a tuple,
     see `listdir`.
@@ -587,6 +632,7 @@ def list_experiment_dir(request, experiment_id, path="", storage_resource_id=Non
                               "/experiment-storage/{experiment_id}/{path}",
                               path_params={"path": path,
                                            "experiment_id": experiment_id},
+                              params=_get_listing_params(name_prefix, ordering, offset, limit),
                               )
         data = resp.json()
         for directory in data['directories']:
@@ -603,7 +649,12 @@ def list_experiment_dir(request, experiment_id, path="", storage_resource_id=Non
                 file['modifiedTime'])
             file['mime_type'] = file['mimeType']
             file['data-product-uri'] = file['dataProductURI']
-        return data['directories'], data['files']
+            file['download-url'] = file.get('downloadURL')
+        if 'limit' in data:
+            return data['directories'], data['files']
+        # Remote API didn't paginate the listing
+        return _filter_sort_and_page(data['directories'], data['files'], name_prefix=name_prefix,
+                                     ordering=ordering, offset=offset, limit=limit)
 
     experiment = request.airavata_client.getExperiment(
         request.authz_token, experiment_id)
@@ -613,26 +664,25 @@ def list_experiment_dir(request, experiment_id, path="", storage_resource_id=Non
     exp_data_dir = experiment.userConfigurationData.experimentDataDir
     exp_data_path = os.path.join(exp_data_dir, path)
     if backend.exists(exp_data_path):
-        directories, files = backend.get_metadata(exp_data_path)
+        directories, files = _filter_sort_and_page(*backend.get_metadata(exp_data_path), name_prefix=name_prefix,
+                                                   ordering=ordering, offset=offset, limit=limit)
         for directory in directories:
             # construct the relative path of the directory within the experiment data dir
             directory['path'] = os.path.relpath(directory['resource_path'], exp_data_dir)
         # for each file, lookup or register a data product and enrich the file
         # metadata with data-product-uri and mime-type
+        user_files = _get_user_files(request, [file['resource_path'] for file in files],
+                                     storage_resource_id=backend.resource_id,
+                                     backend=backend, owner=experiment.userName,
+                                     lazy_registration=lazy_registration)
         for file in files:
-            data_product_uri = _get_data_product_uri(request, file['resource_path'],
-                                                     storage_resource_id=backend.resource_id,
-                                                     backend=backend, owner=experiment.userName)
-
-            data_product = request.airavata_client.getDataProduct(
-                request.authz_token, data_product_uri)
-            mime_type = None
-            if 'mime-type' in data_product.productMetadata:
-                mime_type = data_product.productMetadata['mime-type']
-            file['data-product-uri'] = data_product_uri
-            file['mime_type'] = mime_type
             # construct the relative path of the file within the experiment data dir
             file['path'] = os.path.relpath(file['resource_path'], exp_data_dir)
+            _set_data_product_metadata(
+                request, file, user_files.get(file['resource_path']),
+                path=file['path'],
+                storage_resource_id=storage_resource_id,
+                experiment_id=experiment_id)
             # TODO: remove this, there's no need for hidden files
             file['hidden'] = False
         return directories, files
@@ -761,6 +811,157 @@ def _get_data_product_uri(request, full_path, storage_resource_id, owner=None, b
     return product_uri
 
 
+def _get_user_files(request, full_paths, storage_resource_id, owner=None, backend=None, lazy_registration=False):
+    """
+    Return dict of full path to UserFiles entry for each of full_paths.
+
+    Paths without an entry get a data product registered, unless
+    lazy_registration is True (None means use the
+    USER_STORAGE_LAZY_DATA_PRODUCT_REGISTRATION setting), in which case they
+    are left out of the dict. Entries that don't have a mime type yet get it
+    from their data product.
+    """
+    from airavata_django_portal_sdk import models
+    if owner is None:
+        owner = request.user.username
+    if lazy_registration is None:
+        lazy_registration = getattr(settings, 'USER_STORAGE_LAZY_DATA_PRODUCT_REGISTRATION', False)
+    user_files = {}
+    # Query in batches to stay under database limits on query parameters
+    for i in range(0, len(full_paths), USER_FILES_QUERY_BATCH_SIZE):
+        batch = full_paths[i:i + USER_FILES_QUERY_BATCH_SIZE]
+        for user_file in models.UserFiles.objects.filter(
+                username=owner, file_resource_id=storage_resource_id, file_path__in=batch):
+            user_files.setdefault(user_file.file_path, user_file)
+    missing_mime_type = [user_file for user_file in user_files.values()
+                         if user_file.file_mime_type is None]
+    for user_file in missing_mime_type:
+        data_product = _get_data_product(request, user_file.file_dpu)
+        user_file.file_mime_type = _get_mime_type(data_product)
+    if len(missing_mime_type) > 0:
+        models.UserFiles.objects.bulk_update(missing_mime_type, ['file_mime_type'])
+    unregistered_paths = [full_path for full_path in full_paths if full_path not in user_files]
+    if len(unregistered_paths) > 0 and not lazy_registration:
+        for user_file in _register_data_products(request, unregistered_paths, storage_resource_id,
+                                                 owner=owner, backend=backend):
+            user_files[user_file.file_path] = user_file
+    return user_files
+
+
+def _register_data_products(request, full_paths, storage_resource_id, owner, backend=None):
+    """
+    Create and register data products for full_paths and return the new
+    UserFiles entries, which are saved with bulk_create.
+
+    Content types of the files are determined concurrently. Registration
+    calls are made concurrently when the Airavata client supports it with a
+    `call_concurrently` method (the Airavata Django Portal's client does,
+    using a bounded thread pool). Otherwise they are made one at a time.
+    """
+    from airavata_django_portal_sdk import models
+    content_types = _determine_content_types(full_paths, backend=backend)
+    # The content type is already determined, so don't pass the backend
+    data_products = [_create_data_product(owner, full_path, storage_resource_id, content_type=content_type)
+                     for full_path, content_type in zip(full_paths, content_types)]
+    # Check the class, not the instance, so that mocks don't appear to support it
+    if callable(getattr(type(request.airavata_client), 'call_concurrently', None)):
+        futures = request.airavata_client.call_concurrently(
+            [('registerDataProduct', (request.authz_token, data_product))
+             for data_product in data_products])
+        results = []
+        for future in futures:
+            try:
+                results.append((future.result(), None))
+            except Exception as e:
+                results.append((None, e))
+    else:
+        results = []
+        for data_product in data_products:
+            try:
+                results.append((request.airavata_client.registerDataProduct(
+                    request.authz_token, data_product), None))
+            except Exception as e:
+                results.append((None, e))
+                # Registration failures are likely to repeat, stop early
+                break
+    user_files = []
+    error = None
+    for full_path, data_product, (product_uri, e) in zip(full_paths, data_products, results):
+        if e is not None:
+            logger.error(f"Failed to register data product for {full_path}", exc_info=e)
+            error = error or e
+            continue
+        data_product.productUri = product_uri
+        user_files.append(models.UserFiles(
+            username=owner,
+            file_path=full_path,
+            file_dpu=product_uri,
+            file_resource_id=storage_resource_id,
+            file_mime_type=_get_mime_type(data_product)))
+    # Save the entries of successful registrations even if some failed
+    models.UserFiles.objects.bulk_create(user_files, batch_size=USER_FILES_QUERY_BATCH_SIZE)
+    if error is not None:
+        raise error
+    return user_files
+
+
+def _set_data_product_metadata(request, file, user_file, path, storage_resource_id=None, experiment_id=None):
+    "Set 'data-product-uri' and 'mime_type' of file, see `listdir`."
+    if user_file is not None:
+        file['data-product-uri'] = user_file.file_dpu
+        file['mime_type'] = user_file.file_mime_type or None
+    else:
+        # Data product not registered yet (lazy registration)
+        file['data-product-uri'] = None
+        file['mime_type'] = mimetypes.guess_type(file['resource_path'])[0]
+        file['download-url'] = get_lazy_download_url(
+            request, path=path, storage_resource_id=storage_resource_id,
+            experiment_id=experiment_id)
+
+
+def _filter_sort_and_page(directories, files, name_prefix=None, ordering=None, offset=0, limit=None):
+    "Return the page of directories and files, see `listdir`."
+    if name_prefix:
+        directories = [d for d in directories if d['name'].startswith(name_prefix)]
+        files = [f for f in files if f['name'].startswith(name_prefix)]
+    if ordering:
+        key = ordering[1:] if ordering.startswith('-') else ordering
+        if key not in LISTING_ORDERING_KEYS:
+            raise ValueError(f"Invalid ordering {ordering}, must be one of {LISTING_ORDERING_KEYS}")
+        # Sort by name first, so entries with the same key are ordered by name
+        directories = sorted(sorted(directories, key=lambda d: d['name']),
+                             key=lambda d: d[key], reverse=ordering.startswith('-'))
+        files = sorted(sorted(files, key=lambda f: f['name']),
+                       key=lambda f: f[key], reverse=ordering.startswith('-'))
+    if offset or limit is not None:
+        end = offset + limit if limit is not None else None
+        file_offset = max(offset - len(directories), 0)
+        file_end = max(end - len(directories), 0) if end is not None else None
+        directories, files = directories[offset:end], files[file_offset:file_end]
+    return directories, files
+
+
+def _get_listing_params(name_prefix=None, ordering=None, offset=0, limit=None):
+    "Return remote API query parameters for listing options, see `listdir`."
+    params = {}
+    if name_prefix:
+        params['name-prefix'] = name_prefix
+    if ordering:
+        params['ordering'] = ordering
+    if offset:
+        params['offset'] = offset
+    if limit is not None:
+        params['limit'] = limit
+    return params
+
+
+def _get_mime_type(data_product):
+    "Return data product's mime type, or empty string if it doesn't have one."
+    if data_product.productMetadata and 'mime-type' in data_product.productMetadata:
+        return data_product.productMetadata['mime-type']
+    return ""
+
+
 def _get_data_product(request, data_product_uri):
     return request.airavata_client.getDataProduct(
         request.authz_token, data_product_uri)
@@ -789,7 +990,8 @@ def _register_data_product(request, full_path, data_product, storage_resource_id
         username=owner,
         file_path=full_path,
         file_dpu=product_uri,
-        file_resource_id=storage_resource_id)
+        file_resource_id=storage_resource_id,
+        file_mime_type=_get_mime_type(data_product))
     user_file_instance.save()
     return product_uri
 
@@ -861,6 +1063,29 @@ def _determine_content_type(full_path, content_type=None, backend=None):
     return result
 
 
+def _determine_content_types(full_paths, backend=None):
+    """
+    Return the content type of each of full_paths. Files without a known
+    extension are read to check if they are text, so they are read
+    concurrently.
+    """
+    if backend is None or len(full_paths) < 2:
+        return [_determine_content_type(full_path, backend=backend) for full_path in full_paths]
+    return list(_get_content_type_executor().map(
+        lambda full_path: _determine_content_type(full_path, backend=backend), full_paths))
+
+
+def _get_content_type_executor():
+    global _content_type_executor
+    if _content_type_executor is None:
+        with _content_type_executor_lock:
+            if _content_type_executor is None:
+                _content_type_executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'USER_STORAGE_CONTENT_TYPE_MAX_WORKERS', 8),
+                    thread_name_prefix="user-storage-content-type")
+    return _content_type_executor
+
+
 def _create_replica_location(full_path, file_name, storage_resource_id):
     data_replica_location = DataReplicaLocationModel()
     data_replica_location.storageResourceId = storage_resource_id
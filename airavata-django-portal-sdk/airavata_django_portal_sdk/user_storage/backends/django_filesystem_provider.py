@@ -1,14 +1,24 @@
+import datetime
+import hashlib
 import logging
 import os
 import shutil
+import stat
 
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist, SuspiciousFileOperation
 from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
 
 from .base import UserStorageProvider
 
 logger = logging.getLogger(__name__)
 
+# Stay under database limits on query parameters
+QUERY_BATCH_SIZE = 900
+
 
 class DjangoFileSystemProvider(UserStorageProvider):
     def __init__(self, authz_token, resource_id, context=None, directory=None, **kwargs):
@@ -35,62 +45,9 @@ class DjangoFileSystemProvider(UserStorageProvider):
         # TODO: also return an isDir boolean flag?
         datastore = self.datastore
         if datastore.dir_exists(resource_path):
-            directories, files = datastore.list_user_dir(
-                resource_path)
-            directories_data = []
-            for d in directories:
-                dpath = os.path.join(resource_path, d)
-                created_time = datastore.get_created_time(dpath)
-                modified_time = datastore.get_modified_time(dpath)
-                size = datastore.size(dpath)
-                directories_data.append(
-                    {
-                        "name": d,
-                        "path": datastore.rel_path(dpath),
-                        "resource_path": datastore.path(dpath),
-                        "created_time": created_time,
-                        "modified_time": modified_time,
-                        "size": size,
-                    }
-                )
-            files_data = []
-            for f in files:
-                user_rel_path = os.path.join(resource_path, f)
-                if not datastore.exists(user_rel_path):
-                    logger.warning(f"listdir skipping {user_rel_path}, "
-                                   "does not exist (broken symlink?)")
-                    continue
-                created_time = datastore.get_created_time(user_rel_path)
-                modified_time = datastore.get_modified_time(user_rel_path)
-                size = datastore.size(user_rel_path)
-                full_path = datastore.path(user_rel_path)
-                files_data.append(
-                    {
-                        "name": f,
-                        "path": datastore.rel_path(full_path),
-                        "resource_path": full_path,
-                        "created_time": created_time,
-                        "modified_time": modified_time,
-                        "size": size,
-                    }
-                )
-            return directories_data, files_data
+            return datastore.scan_dir(resource_path)
         elif datastore.exists(resource_path):
-
-            created_time = datastore.get_created_time(resource_path)
-            modified_time = datastore.get_modified_time(resource_path)
-            size = datastore.size(resource_path)
-            full_path = datastore.path(resource_path)
-            return [], [
-                {
-                    "name": os.path.basename(resource_path),
-                    "path": datastore.rel_path(full_path),
-                    "resource_path": full_path,
-                    "created_time": created_time,
-                    "modified_time": modified_time,
-                    "size": size,
-                }
-            ]
+            return [], [datastore.get_metadata(resource_path)]
         else:
             raise ObjectDoesNotExist(f"User storage path does not exist {resource_path}")
 
@@ -103,9 +60,7 @@ class DjangoFileSystemProvider(UserStorageProvider):
             raise ObjectDoesNotExist(f"User resource_path does not exist {resource_path}")
 
     def update(self, resource_path, file):
-        full_path = self.datastore.path(resource_path)
-        with open(full_path, 'w', encoding='utf-8') as f:
-            f.write(file.read())
+        self.datastore.update(resource_path, file)
 
     def create_dirs(self, resource_path, dir_names=[], create_unique=False):
         datastore = self.datastore
@@ -144,7 +99,14 @@ class DjangoFileSystemProvider(UserStorageProvider):
         # When the current user isn't the owner, set the directory based on the owner's username
         if owner_username:
             directory = os.path.join(self.directory, owner_username)
-        return _Datastore(directory=directory)
+        # Reuse the _Datastore for the rest of the request
+        request = self.context.get('request')
+        holder = request if request is not None else self
+        if not hasattr(holder, '_user_storage_datastores'):
+            holder._user_storage_datastores = {}
+        if directory not in holder._user_storage_datastores:
+            holder._user_storage_datastores[directory] = _Datastore(directory=directory)
+        return holder._user_storage_datastores[directory]
 
 
 class _Datastore:
@@ -153,6 +115,7 @@ class _Datastore:
     def __init__(self, directory=None):
         self.directory = directory
         self.storage = self._user_data_storage(self.directory)
+        self.size_index = _DirectorySizeIndex(self.path(""))
 
     def exists(self, path):
         """Check if path exists in this data store."""
@@ -203,10 +166,24 @@ class _Datastore:
         user_data_storage = self.storage
         file_path = os.path.join(
             path, user_data_storage.get_valid_name(file_name))
+        changed_dir, mtime_ns = self._get_existing_dir(
+            os.path.dirname(self.path(file_path)))
         input_file_name = user_data_storage.save(file_path, file)
         input_file_fullpath = user_data_storage.path(input_file_name)
+        self.size_index.record_change(
+            changed_dir, mtime_ns, os.path.getsize(input_file_fullpath))
         return input_file_fullpath
 
+    def update(self, path, file):
+        """Replace contents of file at path in data store."""
+        full_path = self.path(path)
+        old_size = os.path.getsize(full_path) if os.path.isfile(full_path) else 0
+        changed_dir, mtime_ns = self._get_existing_dir(os.path.dirname(full_path))
+        with open(full_path, 'w', encoding='utf-8') as f:
+            f.write(file.read())
+        self.size_index.record_change(
+            changed_dir, mtime_ns, os.path.getsize(full_path) - old_size)
+
     def create_user_dir(self, path):
         user_data_storage = self.storage
         if not user_data_storage.exists(path):
@@ -217,14 +194,22 @@ class _Datastore:
     def create_symlink(self, source_path, dest_path):
         user_data_storage = self.storage
         full_path = user_data_storage.path(dest_path)
+        changed_dir, mtime_ns = self._get_existing_dir(os.path.dirname(full_path))
         os.symlink(source_path, full_path)
+        # Symlinks to directories aren't included in directory sizes
+        size = 0 if os.path.isdir(full_path) else os.path.getsize(full_path)
+        self.size_index.record_change(changed_dir, mtime_ns, size)
         return full_path
 
     def delete(self, path):
         """Delete file in this data store."""
         if self.file_exists(path):
             user_data_storage = self.storage
+            full_path = self.path(path)
+            size = os.path.getsize(full_path)
+            parent_dir, mtime_ns = self._get_existing_dir(os.path.dirname(full_path))
             user_data_storage.delete(path)
+            self.size_index.record_change(parent_dir, mtime_ns, -size)
         else:
             raise ObjectDoesNotExist(
                 "File path does not exist: {}".format(path))
@@ -233,10 +218,19 @@ class _Datastore:
         """Delete entire directory in this data store."""
         if self.symlink_exists(path):
             user_path = self.path(path)
+            parent_dir, mtime_ns = self._get_existing_dir(os.path.dirname(user_path))
             os.unlink(user_path)
+            self.size_index.remove(user_path)
+            self.size_index.record_change(parent_dir, mtime_ns, 0)
         elif self.dir_exists(path):
             user_path = self.path(path)
+            # Don't scan a tree that is about to be deleted, if its size isn't
+            # indexed the sizes of its ancestors are recomputed later
+            size = self.size_index.get_indexed_size(user_path)
+            parent_dir, mtime_ns = self._get_existing_dir(os.path.dirname(user_path))
             shutil.rmtree(user_path)
+            self.size_index.remove(user_path)
+            self.size_index.record_change(parent_dir, mtime_ns, -size if size is not None else None)
         else:
             raise ObjectDoesNotExist(
                 "File path does not exist: {}".format(path))
@@ -282,6 +276,7 @@ class _Datastore:
     def _makedirs(self, dir_path):
         user_experiment_data_storage = self.storage
         full_path = user_experiment_data_storage.path(dir_path)
+        changed_dir, mtime_ns = self._get_existing_dir(full_path)
         os.makedirs(
             full_path,
             mode=user_experiment_data_storage.directory_permissions_mode)
@@ -289,11 +284,65 @@ class _Datastore:
         os.chmod(
             full_path,
             mode=user_experiment_data_storage.directory_permissions_mode)
-
-    def list_user_dir(self, file_path):
-        logger.debug("file_path={}".format(file_path))
-        user_data_storage = self.storage
-        return user_data_storage.listdir(file_path)
+        self.size_index.record_change(changed_dir, mtime_ns, 0)
+
+    def _get_existing_dir(self, full_path):
+        """
+        Return full_path or its closest existing ancestor directory, which is
+        the directory that a write to full_path changes, and its mtime.
+        """
+        while not os.path.isdir(full_path) and os.path.dirname(full_path) != full_path:
+            full_path = os.path.dirname(full_path)
+        return full_path, os.stat(full_path).st_mtime_ns
+
+    def scan_dir(self, path):
+        """
+        Return a tuple of two lists, the metadata of the directories and of the
+        files in path. Each entry is stat-ed once. Broken symlinks are skipped.
+        """
+        logger.debug("path={}".format(path))
+        directories = []
+        files = []
+        dir_stats = {}
+        with os.scandir(self.path(path)) as it:
+            for entry in it:
+                try:
+                    # Follows symlinks, like FileSystemStorage.listdir
+                    entry_stat = entry.stat()
+                except FileNotFoundError:
+                    logger.warning(f"listdir skipping {os.path.join(path, entry.name)}, "
+                                   "does not exist (broken symlink?)")
+                    continue
+                metadata = self._get_metadata(entry.name, entry.path, entry_stat)
+                if stat.S_ISDIR(entry_stat.st_mode):
+                    dir_stats[entry.path] = entry_stat
+                    directories.append(metadata)
+                else:
+                    files.append(metadata)
+        dir_sizes = self.size_index.get_sizes(list(dir_stats), dir_stats=dir_stats)
+        for directory in directories:
+            directory['size'] = dir_sizes[directory['resource_path']]
+        return directories, files
+
+    def get_metadata(self, path):
+        """Return the metadata of the file at path, see scan_dir."""
+        full_path = self.path(path)
+        return self._get_metadata(os.path.basename(path), full_path, os.stat(full_path))
+
+    def _get_metadata(self, name, full_path, entry_stat):
+        return {
+            "name": name,
+            "path": os.path.relpath(full_path, self.size_index.root),
+            "resource_path": full_path,
+            "created_time": self._datetime_from_timestamp(entry_stat.st_ctime),
+            "modified_time": self._datetime_from_timestamp(entry_stat.st_mtime),
+            "size": entry_stat.st_size,
+        }
+
+    def _datetime_from_timestamp(self, ts):
+        # Same as FileSystemStorage.get_created_time/get_modified_time
+        tz = datetime.timezone.utc if settings.USE_TZ else None
+        return datetime.datetime.fromtimestamp(ts, tz=tz)
 
     def get_created_time(self, file_path):
         user_data_storage = self.storage
@@ -307,10 +356,16 @@ class _Datastore:
         user_data_storage = self.storage
         full_path = self.path(file_path)
         if os.path.isdir(full_path):
-            return self._get_dir_size(full_path)
+            return self.size_index.get_sizes([full_path])[full_path]
         else:
             return user_data_storage.size(file_path)
 
+    def dir_sizes(self, dir_paths):
+        """Return dict of the size of each of the directories dir_paths."""
+        full_paths = {dir_path: self.path(dir_path) for dir_path in dir_paths}
+        sizes = self.size_index.get_sizes(list(full_paths.values()))
+        return {dir_path: sizes[full_path] for dir_path, full_path in full_paths.items()}
+
     def path(self, file_path):
         user_data_storage = self.storage
         return user_data_storage.path(file_path)
@@ -322,14 +377,221 @@ class _Datastore:
     def _user_data_storage(self, directory):
         return FileSystemStorage(location=directory)
 
-    # from https://stackoverflow.com/a/1392549
-    def _get_dir_size(self, start_path="."):
-        total_size = 0
-        for dirpath, dirnames, filenames in os.walk(start_path):
-            for f in filenames:
-                fp = os.path.join(dirpath, f)
-                # Check for broken symlinks (.exists return False for broken
-                # symlinks)
-                if os.path.exists(fp):
-                    total_size += os.path.getsize(fp)
-        return total_size
+
+class _DirectorySizeIndex:
+    """
+    Persistent index of directory sizes, stored in the DirectorySize model.
+
+    The size of a directory is the total size of the files in its tree, not
+    following symlinks to directories. An indexed size is used as long as the
+    directory's mtime is unchanged and it was computed less than
+    USER_STORAGE_DIRECTORY_SIZE_INDEX_TTL seconds ago. Otherwise it is
+    recomputed with os.scandir, one level of the tree at a time, reusing the
+    valid indexed sizes of subdirectories. Changes made through _Datastore
+    update the indexed sizes of the changed directory and its ancestors.
+    Changes made outside of it in a directory's subdirectories don't change
+    the directory's mtime, so the TTL bounds how long its size can be out of
+    date.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def get_sizes(self, dir_paths, dir_stats=None):
+        """
+        Return dict of the size of each of the directories dir_paths.
+        dir_stats is an optional dict of their already loaded stat results.
+        """
+        entries = self._get_entries(dir_paths)
+        sizes = {}
+        for dir_path in dir_paths:
+            if dir_stats is not None and dir_path in dir_stats:
+                dir_stat = dir_stats[dir_path]
+            else:
+                dir_stat = os.stat(dir_path)
+            entry = entries.get(dir_path)
+            if self._is_valid(entry, dir_stat):
+                sizes[dir_path] = entry.size
+            else:
+                sizes[dir_path] = self._compute_size(dir_path, dir_stat)
+        return sizes
+
+    def record_change(self, changed_dir, mtime_ns, size_change):
+        """
+        Update the index after a write to changed_dir (a file in it was
+        written or deleted, or a directory created or deleted) changed the
+        size of its tree by size_change bytes. mtime_ns is the mtime of
+        changed_dir before the write. If size_change is None (unknown), the
+        entries of changed_dir and its ancestors are removed.
+        """
+        from airavata_django_portal_sdk import models
+        if not self._is_in_root(changed_dir) or self._get_ttl() <= 0:
+            return
+        ancestors = self._get_ancestors(changed_dir)
+        if size_change is None:
+            models.DirectorySize.objects.filter(
+                path_hash__in=[self._hash(d) for d in [changed_dir] + ancestors]).delete()
+            return
+        # If the entry was up to date before the write, it is afterwards too
+        updated = models.DirectorySize.objects.filter(
+            path_hash=self._hash(changed_dir), mtime_ns=mtime_ns).update(
+                size=F('size') + size_change,
+                mtime_ns=os.stat(changed_dir).st_mtime_ns)
+        if updated == 0:
+            models.DirectorySize.objects.filter(path_hash=self._hash(changed_dir)).delete()
+        if size_change != 0 and len(ancestors) > 0:
+            models.DirectorySize.objects.filter(
+                path_hash__in=[self._hash(a) for a in ancestors]).update(
+                    size=F('size') + size_change)
+
+    def get_indexed_size(self, dir_path):
+        """Return the indexed size of dir_path if it is valid, else None."""
+        if self._get_ttl() <= 0:
+            return None
+        entry = self._get_entries([dir_path]).get(dir_path)
+        if self._is_valid(entry, os.stat(dir_path)):
+            return entry.size
+        return None
+
+    def remove(self, dir_path):
+        """Remove the entries of dir_path and its subdirectories."""
+        from airavata_django_portal_sdk import models
+        path_hashes = [self._hash(dir_path)]
+        # Find the subdirectories one level at a time
+        parent_path_hashes = path_hashes
+        while len(parent_path_hashes) > 0:
+            child_path_hashes = []
+            for i in range(0, len(parent_path_hashes), QUERY_BATCH_SIZE):
+                child_path_hashes.extend(models.DirectorySize.objects.filter(
+                    parent_path_hash__in=parent_path_hashes[i:i + QUERY_BATCH_SIZE]
+                ).values_list('path_hash', flat=True))
+            path_hashes.extend(child_path_hashes)
+            parent_path_hashes = child_path_hashes
+        for i in range(0, len(path_hashes), QUERY_BATCH_SIZE):
+            models.DirectorySize.objects.filter(
+                path_hash__in=path_hashes[i:i + QUERY_BATCH_SIZE]).delete()
+
+    def _compute_size(self, dir_path, dir_stat):
+        from airavata_django_portal_sdk import models
+        # Scan the tree one level at a time, so that the entries of each
+        # level's subdirectories are looked up together. Only subdirectories
+        # without a valid entry are scanned.
+        scanned = {}
+        level = [(dir_path, dir_stat)]
+        while len(level) > 0:
+            subdir_entries = self._get_child_entries([path for path, _ in level])
+            next_level = []
+            for path, path_stat in level:
+                files_size, subdirs, ok = self._scan(path, subdir_entries, next_level)
+                scanned[path] = (path_stat, files_size, subdirs, ok)
+            level = next_level
+        # Subdirectories are scanned after their parents, so add up sizes in
+        # reverse order
+        sizes = {}
+        new_entries = []
+        for path, (path_stat, files_size, subdirs, ok) in reversed(list(scanned.items())):
+            size = files_size + sum(sizes[subdir] for subdir in subdirs)
+            sizes[path] = size
+            if ok:
+                new_entries.append(models.DirectorySize(
+                    path_hash=self._hash(path),
+                    path=path,
+                    parent_path_hash=self._hash(os.path.dirname(path)),
+                    mtime_ns=path_stat.st_mtime_ns,
+                    size=size,
+                    scanned_time=timezone.now()))
+        if self._get_ttl() > 0:
+            self._save(new_entries)
+        return sizes[dir_path]
+
+    def _scan(self, dir_path, subdir_entries, unscanned_subdirs):
+        """
+        Scan dir_path and return the total size of its files and of its
+        subdirectories with valid entries, the paths of its other
+        subdirectories (which are added to unscanned_subdirs along with their
+        stat results) and whether the scan succeeded.
+        """
+        size = 0
+        subdirs = []
+        try:
+            with os.scandir(dir_path) as it:
+                for dir_entry in it:
+                    try:
+                        if dir_entry.is_dir():
+                            # Don't follow symlinks to directories
+                            if dir_entry.is_symlink():
+                                continue
+                            subdir_stat = dir_entry.stat()
+                            entry = subdir_entries.get(dir_entry.path)
+                            if self._is_valid(entry, subdir_stat):
+                                size += entry.size
+                            else:
+                                subdirs.append(dir_entry.path)
+                                unscanned_subdirs.append((dir_entry.path, subdir_stat))
+                        else:
+                            size += dir_entry.stat().st_size
+                    except FileNotFoundError:
+                        # Broken symlink or deleted while scanning
+                        continue
+        except OSError as e:
+            logger.warning(f"Failed to scan {dir_path}: {e}")
+            return size, subdirs, False
+        return size, subdirs, True
+
+    def _save(self, entries):
+        from airavata_django_portal_sdk import models
+        with transaction.atomic():
+            for i in range(0, len(entries), QUERY_BATCH_SIZE):
+                models.DirectorySize.objects.filter(
+                    path_hash__in=[e.path_hash for e in entries[i:i + QUERY_BATCH_SIZE]]).delete()
+            # Ignore conflicts with entries saved concurrently by another request
+            models.DirectorySize.objects.bulk_create(
+                entries, batch_size=QUERY_BATCH_SIZE, ignore_conflicts=True)
+
+    def _get_child_entries(self, dir_paths):
+        """Return dict of the entries of the subdirectories of dir_paths."""
+        from airavata_django_portal_sdk import models
+        if self._get_ttl() <= 0:
+            return {}
+        parent_path_hashes = [self._hash(dir_path) for dir_path in dir_paths]
+        entries = {}
+        for i in range(0, len(parent_path_hashes), QUERY_BATCH_SIZE):
+            for entry in models.DirectorySize.objects.filter(
+                    parent_path_hash__in=parent_path_hashes[i:i + QUERY_BATCH_SIZE]):
+                entries[entry.path] = entry
+        return entries
+
+    def _get_entries(self, dir_paths):
+        from airavata_django_portal_sdk import models
+        path_hashes = [self._hash(dir_path) for dir_path in dir_paths]
+        entries = {}
+        for i in range(0, len(path_hashes), QUERY_BATCH_SIZE):
+            for entry in models.DirectorySize.objects.filter(
+                    path_hash__in=path_hashes[i:i + QUERY_BATCH_SIZE]):
+                entries[entry.path] = entry
+        return entries
+
+    def _get_ancestors(self, dir_path):
+        """Return ancestors of dir_path in root whose size includes dir_path's."""
+        ancestors = []
+        while dir_path != self.root:
+            if os.path.islink(dir_path):
+                # Not included in the sizes of the symlink's ancestors
+                break
+            dir_path = os.path.dirname(dir_path)
+            ancestors.append(dir_path)
+        return ancestors
+
+    def _is_valid(self, entry, dir_stat):
+        return (entry is not None and
+                entry.mtime_ns == dir_stat.st_mtime_ns and
+                entry.scanned_time + datetime.timedelta(seconds=self._get_ttl()) > timezone.now())
+
+    def _is_in_root(self, path):
+        return path == self.root or path.startswith(os.path.join(self.root, ""))
+
+    def _get_ttl(self):
+        return getattr(settings, 'USER_STORAGE_DIRECTORY_SIZE_INDEX_TTL', 600)
+
+    def _hash(self, path):
+        return hashlib.sha256(path.encode()).hexdigest()
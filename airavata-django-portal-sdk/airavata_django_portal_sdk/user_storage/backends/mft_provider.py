@@ -1,210 +1,195 @@
 import logging
 import os
+import threading
+import time
 from datetime import datetime
 
 import grpc
 import requests
+from django.core.exceptions import ObjectDoesNotExist
 
 from . import CredCommon_pb2, MFTApi_pb2, MFTApi_pb2_grpc
 from .base import ProvidesDownloadUrl, UserStorageProvider
 
 logger = logging.getLogger(__name__)
 
+# Keepalive pings keep idle connections to the MFT API open and detect broken
+# ones
+CHANNEL_OPTIONS = [
+    ('grpc.keepalive_time_ms', 30000),
+    ('grpc.keepalive_timeout_ms', 10000),
+    ('grpc.keepalive_permit_without_calls', 1),
+    ('grpc.http2.max_pings_without_data', 0),
+]
+
+# Map of mft_api_endpoint to a stub for a long-lived channel, shared by all
+# provider instances and threads
+_stubs = {}
+_stubs_lock = threading.Lock()
+# Map of (mft_api_endpoint, resource_id) to the resource's base path
+_base_resource_paths = {}
+# Map of (mft_api_endpoint, resource_id, username, child_path, rpc_name) to
+# (expiration time, response) of metadata RPCs. The response is NOT_FOUND if
+# the RPC failed with that status. Other errors may be transient and aren't
+# cached.
+_metadata_cache = {}
+_metadata_cache_lock = threading.Lock()
+# Expired entries are pruned once the cache grows beyond this many entries
+METADATA_CACHE_MAX_ENTRIES = 10000
+DIRECTORY_METADATA_RPC = "getDirectoryResourceMetadata"
+FILE_METADATA_RPC = "getFileResourceMetadata"
+NOT_FOUND = object()
+
 
 class MFTUserStorageProvider(UserStorageProvider, ProvidesDownloadUrl):
 
     def __init__(self, authz_token, resource_id, context=None, resource_token=None,
                  mft_api_endpoint=None, mft_api_secure=False, resource_per_gateway=False,
-                 base_resource_path=None, **kwargs):
+                 base_resource_path=None, mft_api_timeout=30, metadata_cache_ttl=10,
+                 **kwargs):
         super().__init__(authz_token, resource_id, context=context, **kwargs)
         self.resource_token = resource_token
         self.mft_api_endpoint = mft_api_endpoint
         self.mft_api_secure = mft_api_secure
         self.resource_per_gateway = resource_per_gateway
         self.base_resource_path = base_resource_path
+        # Deadline in seconds of MFT API calls
+        self.mft_api_timeout = mft_api_timeout
+        # Seconds that resource metadata is cached for, 0 to disable caching
+        self.metadata_cache_ttl = metadata_cache_ttl
 
     def exists(self, resource_path):
-        with grpc.insecure_channel(self.mft_api_endpoint) as channel:
-            child_path = self._get_child_path(resource_path)
-            # TODO: is this still needed?
-            # parent_path, child_path = os.path.split(f"/tmp/{resource_path}".rstrip("/"))
-            # get metadata for the parent path
-            if child_path is not None:
-                parent_path, child_path = os.path.split(child_path)
-            else:
-                parent_path = None
-            stub = MFTApi_pb2_grpc.MFTApiServiceStub(channel)
-            # Get metadata for parent directory and see if child_path exists
-            request = MFTApi_pb2.FetchResourceMetadataRequest(
-                # resourceId="remote-ssh-dir-resource",
-                resourceId=self.resource_id,
-                resourceType="SCP",
-                # resourceToken="local-ssh-cred",
-                resourceToken=self.resource_token,
-                resourceBackend="FILE",
-                resourceCredentialBackend="FILE",
-                targetAgentId="agent0",
-                childPath=parent_path,
-                mftAuthorizationToken=self.auth_token,
-            )
-            try:
-                response = stub.getDirectoryResourceMetadata(request)
-            except Exception:
-                # Could not find the parent path, so apparently doesn't exist
-                logger.warning(f"Could not get metadata for {parent_path} on {self.resource_id}")
-                return False
-            # if not child_path, then return True since the response was
-            # successful and we just need to confirm the existence of the root dir
-            if child_path is None:
-                return True
-            return child_path in map(lambda f: f.friendlyName, list(response.directories) + list(response.files))
+        child_path = self._get_child_path(resource_path)
+        # TODO: is this still needed?
+        # parent_path, child_path = os.path.split(f"/tmp/{resource_path}".rstrip("/"))
+        # get metadata for the parent path
+        if child_path is not None:
+            parent_path, child_path = os.path.split(child_path)
+        else:
+            parent_path = None
+        # Get metadata for parent directory and see if child_path exists
+        try:
+            response = self._get_resource_metadata(DIRECTORY_METADATA_RPC, parent_path)
+        except Exception:
+            # Could not find the parent path, so apparently doesn't exist
+            logger.warning(f"Could not get metadata for {parent_path} on {self.resource_id}")
+            return False
+        # if not child_path, then return True since the response was
+        # successful and we just need to confirm the existence of the root dir
+        if child_path is None:
+            return True
+        return child_path in map(lambda f: f.friendlyName, list(response.directories) + list(response.files))
 
     def get_metadata(self, resource_path):
-        with grpc.insecure_channel(self.mft_api_endpoint) as channel:
-            child_path = self._get_child_path(resource_path)
-            stub = MFTApi_pb2_grpc.MFTApiServiceStub(channel)
-            request = MFTApi_pb2.FetchResourceMetadataRequest(
-                # resourceId="remote-ssh-dir-resource",
-                resourceId=self.resource_id,
-                resourceType="SCP",
-                # resourceToken="local-ssh-cred",
-                resourceToken=self.resource_token,
-                resourceBackend="FILE",
-                resourceCredentialBackend="FILE",
-                targetAgentId="agent0",
-                childPath=child_path,
-                mftAuthorizationToken=self.auth_token)
+        child_path = self._get_child_path(resource_path)
+        if self._get_cached_type(child_path) == FILE_METADATA_RPC:
+            # Skip the directory metadata request when the parent listing
+            # already shows that this is a file
+            directories = []
+            files = [self._get_resource_metadata(FILE_METADATA_RPC, child_path)]
+        else:
             try:
-                logger.debug(f"getDirectoryResourceMetadata({request})")
-                response = stub.getDirectoryResourceMetadata(request)
-                logger.debug(f"getDirectoryResourceMetadata response={response}")
+                response = self._get_resource_metadata(DIRECTORY_METADATA_RPC, child_path)
                 directories = response.directories
                 files = response.files
             except Exception:
                 # if getting metadata for directory fails, try as file
                 # FIXME is there a better way to determine if directory or file?
-                logger.debug(f"getFileResourceMetadata({request})")
-                response = stub.getFileResourceMetadata(request)
-                logger.debug(f"getFileResourceMetadata response={response}")
+                response = self._get_resource_metadata(FILE_METADATA_RPC, child_path)
                 directories = []
                 files = [response]
-            directories_data = []
-            for d in directories:
+        directories_data = []
+        for d in directories:
 
-                dpath = os.path.join(resource_path, d.friendlyName)
-                created_time = datetime.fromtimestamp(d.createdTime)
-                modified_time = datetime.fromtimestamp(d.updateTime)
-                # TODO MFT API doesn't report size
-                size = 0
-                directories_data.append(
-                    {
-                        "name": d.friendlyName,
-                        # path is the relative path, or at least, relative to given resource_path
-                        "path": dpath,
-                        # resource_path is the id or full path to the resource
-                        "resource_path": d.resourcePath,
-                        "created_time": created_time,
-                        "modified_time": modified_time,
-                        "size": size,
-                    }
-                )
-            files_data = []
-            for f in files:
-                user_rel_path = os.path.join(resource_path, f.friendlyName)
-                # TODO do we need to check for broken symlinks?
-                created_time = datetime.fromtimestamp(f.createdTime)
-                modified_time = datetime.fromtimestamp(f.updateTime)
-                size = f.resourceSize
-                # full_path = datastore.path(request.user.username, user_rel_path)
-                # TODO how do we register these as data products, do we need to?
-                # data_product_uri = _get_data_product_uri(request, full_path)
+            dpath = os.path.join(resource_path, d.friendlyName)
+            created_time = datetime.fromtimestamp(d.createdTime)
+            modified_time = datetime.fromtimestamp(d.updateTime)
+            # TODO MFT API doesn't report size
+            size = 0
+            directories_data.append(
+                {
+                    "name": d.friendlyName,
+                    # path is the relative path, or at least, relative to given resource_path
+                    "path": dpath,
+                    # resource_path is the id or full path to the resource
+                    "resource_path": d.resourcePath,
+                    "created_time": created_time,
+                    "modified_time": modified_time,
+                    "size": size,
+                }
+            )
+        files_data = []
+        for f in files:
+            user_rel_path = os.path.join(resource_path, f.friendlyName)
+            # TODO do we need to check for broken symlinks?
+            created_time = datetime.fromtimestamp(f.createdTime)
+            modified_time = datetime.fromtimestamp(f.updateTime)
+            size = f.resourceSize
+            # full_path = datastore.path(request.user.username, user_rel_path)
+            # TODO how do we register these as data products, do we need to?
+            # data_product_uri = _get_data_product_uri(request, full_path)
 
-                # data_product = request.airavata_client.getDataProduct(
-                #     request.authz_token, data_product_uri)
-                # mime_type = None
-                # if 'mime-type' in data_product.productMetadata:
-                #     mime_type = data_product.productMetadata['mime-type']
-                files_data.append(
-                    {
-                        "name": f.friendlyName,
-                        "path": user_rel_path,
-                        "resource_path": f.resourcePath,
-                        "created_time": created_time,
-                        "modified_time": modified_time,
-                        "size": size,
-                    }
-                )
-            return directories_data, files_data
+            # data_product = request.airavata_client.getDataProduct(
+            #     request.authz_token, data_product_uri)
+            # mime_type = None
+            # if 'mime-type' in data_product.productMetadata:
+            #     mime_type = data_product.productMetadata['mime-type']
+            files_data.append(
+                {
+                    "name": f.friendlyName,
+                    "path": user_rel_path,
+                    "resource_path": f.resourcePath,
+                    "created_time": created_time,
+                    "modified_time": modified_time,
+                    "size": size,
+                }
+            )
+        return directories_data, files_data
 
     def is_file(self, resource_path):
-        with grpc.insecure_channel(self.mft_api_endpoint) as channel:
-            child_path = self._get_child_path(resource_path)
-            stub = MFTApi_pb2_grpc.MFTApiServiceStub(channel)
-            # Get metadata for parent directory and see if child_path exists
-            request = MFTApi_pb2.FetchResourceMetadataRequest(
-                # resourceId="remote-ssh-dir-resource",
-                resourceId=self.resource_id,
-                resourceType="SCP",
-                # resourceToken="local-ssh-cred",
-                resourceToken=self.resource_token,
-                resourceBackend="FILE",
-                resourceCredentialBackend="FILE",
-                targetAgentId="agent0",
-                childPath=child_path,
-                mftAuthorizationToken=self.auth_token,
-            )
-            try:
-                stub.getFileResourceMetadata(request)
-                return True
-            except Exception:
-                # assume that is doesn't exist, or isn't a file
-                logger.warning(f"Could not get metadata for {child_path} on {self.resource_id}")
-                return False
+        child_path = self._get_child_path(resource_path)
+        cached_type = self._get_cached_type(child_path)
+        if cached_type is not None:
+            return cached_type == FILE_METADATA_RPC
+        try:
+            self._get_resource_metadata(FILE_METADATA_RPC, child_path)
+            return True
+        except Exception:
+            # assume that is doesn't exist, or isn't a file
+            logger.warning(f"Could not get metadata for {child_path} on {self.resource_id}")
+            return False
 
     def is_dir(self, resource_path):
-        with grpc.insecure_channel(self.mft_api_endpoint) as channel:
-            child_path = self._get_child_path(resource_path)
-            stub = MFTApi_pb2_grpc.MFTApiServiceStub(channel)
-            # Get metadata for parent directory and see if child_path exists
-            request = MFTApi_pb2.FetchResourceMetadataRequest(
-                # resourceId="remote-ssh-dir-resource",
-                resourceId=self.resource_id,
-                resourceType="SCP",
-                # resourceToken="local-ssh-cred",
-                resourceToken=self.resource_token,
-                resourceBackend="FILE",
-                resourceCredentialBackend="FILE",
-                targetAgentId="agent0",
-                childPath=child_path,
-                mftAuthorizationToken=self.auth_token,
-            )
-            try:
-                stub.getDirectoryResourceMetadata(request)
-                return True
-            except Exception:
-                # assume that it doesn't exist or isn't a file
-                logger.warning(f"Could not get metadata for {child_path} on {self.resource_id}")
-                return False
+        child_path = self._get_child_path(resource_path)
+        cached_type = self._get_cached_type(child_path)
+        if cached_type is not None:
+            return cached_type == DIRECTORY_METADATA_RPC
+        try:
+            self._get_resource_metadata(DIRECTORY_METADATA_RPC, child_path)
+            return True
+        except Exception:
+            # assume that it doesn't exist or isn't a file
+            logger.warning(f"Could not get metadata for {child_path} on {self.resource_id}")
+            return False
 
     def get_download_url(self, resource_path):
-        with grpc.insecure_channel(self.mft_api_endpoint) as channel:
-            child_path = self._get_child_path(resource_path)
-            stub = MFTApi_pb2_grpc.MFTApiServiceStub(channel)
-            download_request = MFTApi_pb2.HttpDownloadApiRequest(
-                sourceResourceId=self.resource_id,
-                sourceResourceChildPath=child_path,
-                sourceToken=self.resource_token,
-                sourceType="SCP",
-                targetAgent="agent0",
-                mftAuthorizationToken=self.auth_token,
-            )
-            try:
-                response = stub.submitHttpDownload(download_request)
-                logger.debug(f"Download request for {self.resource_id}:{child_path}. Response = {response}")
-                return response.url
-            except Exception as e:
-                logger.error(f"submitHttpDownload request {download_request} failed.")
-                raise Exception(f"Failed to get download url for {resource_path}") from e
+        child_path = self._get_child_path(resource_path)
+        stub = self._get_stub()
+        download_request = MFTApi_pb2.HttpDownloadApiRequest(
+            sourceResourceId=self.resource_id,
+            sourceResourceChildPath=child_path,
+            sourceToken=self.resource_token,
+            sourceType="SCP",
+            targetAgent="agent0",
+            mftAuthorizationToken=self.auth_token,
+        )
+        try:
+            response = stub.submitHttpDownload(download_request, timeout=self.mft_api_timeout)
+            logger.debug(f"Download request for {self.resource_id}:{child_path}. Response = {response}")
+            return response.url
+        except Exception as e:
+            logger.error(f"submitHttpDownload request {download_request} failed.")
+            raise Exception(f"Failed to get download url for {resource_path}") from e
 
     def open(self, resource_path):
         download_url = self.get_download_url(resource_path)
@@ -240,20 +225,95 @@ class MFTUserStorageProvider(UserStorageProvider, ProvidesDownloadUrl):
 
     def _get_base_resource_path(self):
         if self.base_resource_path is None:
-            with grpc.insecure_channel(self.mft_api_endpoint) as channel:
-                stub = MFTApi_pb2_grpc.MFTApiServiceStub(channel)
-                request = MFTApi_pb2.FetchResourceMetadataRequest(
-                    resourceId=self.resource_id,
-                    resourceType="SCP",
-                    resourceToken=self.resource_token,
-                    resourceBackend="FILE",
-                    resourceCredentialBackend="FILE",
-                    targetAgentId="agent0",
-                    mftAuthorizationToken=self.auth_token)
-                response = stub.getDirectoryResourceMetadata(request)
-                self.base_resource_path = response.resourcePath
+            self.base_resource_path = _base_resource_paths.get((self.mft_api_endpoint, self.resource_id))
+        if self.base_resource_path is None:
+            stub = self._get_stub()
+            request = MFTApi_pb2.FetchResourceMetadataRequest(
+                resourceId=self.resource_id,
+                resourceType="SCP",
+                resourceToken=self.resource_token,
+                resourceBackend="FILE",
+                resourceCredentialBackend="FILE",
+                targetAgentId="agent0",
+                mftAuthorizationToken=self.auth_token)
+            response = stub.getDirectoryResourceMetadata(request, timeout=self.mft_api_timeout)
+            self.base_resource_path = response.resourcePath
+            _base_resource_paths[(self.mft_api_endpoint, self.resource_id)] = self.base_resource_path
         return self.base_resource_path
 
+    def _get_resource_metadata(self, rpc_name, child_path):
+        """Call metadata RPC rpc_name, caching the response or NOT_FOUND status."""
+        key = (self.mft_api_endpoint, self.resource_id, self.username, child_path, rpc_name)
+        cached = _metadata_cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            expires, response = cached
+        else:
+            request = MFTApi_pb2.FetchResourceMetadataRequest(
+                resourceId=self.resource_id,
+                resourceType="SCP",
+                resourceToken=self.resource_token,
+                resourceBackend="FILE",
+                resourceCredentialBackend="FILE",
+                targetAgentId="agent0",
+                childPath=child_path,
+                mftAuthorizationToken=self.auth_token)
+            try:
+                logger.debug(f"{rpc_name}({request})")
+                response = getattr(self._get_stub(), rpc_name)(request, timeout=self.mft_api_timeout)
+                logger.debug(f"{rpc_name} response={response}")
+            except grpc.RpcError as e:
+                if e.code() != grpc.StatusCode.NOT_FOUND:
+                    raise
+                response = NOT_FOUND
+            if self.metadata_cache_ttl:
+                self._cache_metadata(key, response)
+        if response is NOT_FOUND:
+            raise ObjectDoesNotExist(f"{child_path} does not exist on {self.resource_id}")
+        return response
+
+    def _cache_metadata(self, key, response):
+        now = time.monotonic()
+        with _metadata_cache_lock:
+            if len(_metadata_cache) >= METADATA_CACHE_MAX_ENTRIES:
+                for k, v in list(_metadata_cache.items()):
+                    if v[0] <= now:
+                        del _metadata_cache[k]
+            _metadata_cache[key] = (now + self.metadata_cache_ttl, response)
+
+    def _get_cached_type(self, child_path):
+        """
+        Use a cached listing of child_path's parent directory to determine
+        whether it is a directory or file. Returns the metadata RPC name for
+        the type, False if it doesn't exist or None if it isn't known.
+        """
+        if child_path is None:
+            return None
+        parent_path, name = os.path.split(child_path.rstrip("/"))
+        key = (self.mft_api_endpoint, self.resource_id, self.username, parent_path,
+               DIRECTORY_METADATA_RPC)
+        cached = _metadata_cache.get(key)
+        if cached is None or cached[0] <= time.monotonic():
+            return None
+        expires, response = cached
+        if response is NOT_FOUND:
+            return False
+        if name in (d.friendlyName for d in response.directories):
+            return DIRECTORY_METADATA_RPC
+        if name in (f.friendlyName for f in response.files):
+            return FILE_METADATA_RPC
+        return False
+
+    def _get_stub(self):
+        stub = _stubs.get(self.mft_api_endpoint)
+        if stub is None:
+            with _stubs_lock:
+                stub = _stubs.get(self.mft_api_endpoint)
+                if stub is None:
+                    channel = grpc.insecure_channel(self.mft_api_endpoint, options=CHANNEL_OPTIONS)
+                    stub = MFTApi_pb2_grpc.MFTApiServiceStub(channel)
+                    _stubs[self.mft_api_endpoint] = stub
+        return stub
+
     @property
     def auth_token(self):
         """Instance of CredCommon.AuthToken wrapping user's access token."""
@@ -2,16 +2,24 @@ import fnmatch
 import io
 import logging
 import os
+import re
+import stat
 import uuid
 from string import Template
 
 import zipstream
 from django.core.exceptions import ObjectDoesNotExist
-from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    StreamingHttpResponse
+)
 from django.shortcuts import redirect
 from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from django.utils.text import get_valid_filename
-from django.views.decorators.gzip import gzip_page
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
@@ -20,10 +28,22 @@ from airavata_django_portal_sdk import serializers, user_storage
 
 logger = logging.getLogger(__name__)
 
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
 
 @api_view()
 def download(request):
     data_product_uri = request.GET.get('data-product-uri', '')
+    if not data_product_uri and 'path' in request.GET:
+        # File listed with lazy registration, register its data product now
+        try:
+            file = user_storage.get_file_metadata(
+                request, request.GET['path'],
+                storage_resource_id=request.GET.get('storage-resource-id'),
+                experiment_id=request.GET.get('experiment-id'))
+        except ObjectDoesNotExist as e:
+            raise Http404(str(e)) from e
+        data_product_uri = file['data-product-uri']
     force_download = 'download' in request.GET
     mime_type = request.GET.get('mime-type')
     download_url = user_storage.get_download_url(request,
@@ -33,7 +53,6 @@ def download(request):
     return redirect(download_url)
 
 
-@gzip_page
 @api_view()
 def download_file(request):
     data_product_uri = request.GET.get('data-product-uri', '')
@@ -54,12 +73,50 @@ def download_file(request):
         raise Http404("data product does not exist") from e
     try:
         data_file = user_storage.open_file(request, data_product)
-        as_attachment = (mime_type == 'application/octet-stream' or force_download)
-        if user_storage.is_input_file(request, data_product):
-            file_name = data_product.productName
-        else:
-            file_name = os.path.basename(data_file.name)
-        return FileResponse(data_file, content_type=mime_type, as_attachment=as_attachment, filename=file_name)
+        try:
+            size, last_modified = _get_file_size_and_last_modified(request, data_file, data_product)
+            headers = {}
+            if last_modified is not None:
+                headers['Last-Modified'] = http_date(last_modified)
+                if size is not None:
+                    headers['ETag'] = f'"{last_modified:x}-{size:x}"'
+            conditional_response = get_conditional_response(
+                request, etag=headers.get('ETag'), last_modified=last_modified)
+            if conditional_response is not None:
+                data_file.close()
+                return _set_headers(conditional_response, headers)
+            byte_range = None
+            if size is not None:
+                headers['Accept-Ranges'] = 'bytes'
+                if _is_if_range_satisfied(request, headers):
+                    byte_range = _get_byte_range(request.META.get('HTTP_RANGE'), size)
+            if byte_range is False:
+                data_file.close()
+                response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+                response['Content-Range'] = f"bytes */{size}"
+                return _set_headers(response, headers)
+            as_attachment = (mime_type == 'application/octet-stream' or force_download)
+            if user_storage.is_input_file(request, data_product):
+                file_name = data_product.productName
+            else:
+                file_name = os.path.basename(data_file.name)
+            if byte_range is not None:
+                start, end = byte_range
+                response = FileResponse(_ByteRangeFile(data_file, start, end - start + 1),
+                                        status=status.HTTP_206_PARTIAL_CONTENT,
+                                        content_type=mime_type, as_attachment=as_attachment, filename=file_name)
+                response['Content-Range'] = f"bytes {start}-{end}/{size}"
+                response['Content-Length'] = end - start + 1
+            else:
+                response = FileResponse(data_file, content_type=mime_type, as_attachment=as_attachment, filename=file_name)
+                # FileResponse only knows the size of files in file storage,
+                # open_file gives streamed files a size when it's known
+                if 'Content-Length' not in response and getattr(data_file, 'size', None) is not None:
+                    response['Content-Length'] = data_file.size
+            return _set_headers(response, headers)
+        except Exception:
+            data_file.close()
+            raise
     except ObjectDoesNotExist as e:
         raise Http404(str(e)) from e
 
@@ -119,11 +176,20 @@ def download_experiments(request, download_id=None):
 def _get_directory_zipfile_entries(request, path, directory=""):
     directories, files = user_storage.listdir(request, os.path.join(path, directory))
     for file in files:
-        yield os.path.join(directory, file['name']), file["data-product-uri"], file["size"]
+        data_product_uri = _get_data_product_uri(request, file, os.path.join(path, directory, file['name']))
+        yield os.path.join(directory, file['name']), data_product_uri, file["size"]
     for d in directories:
         yield from _get_directory_zipfile_entries(request, path, os.path.join(directory, d['name']))
 
 
+def _get_data_product_uri(request, file, path, experiment_id=None):
+    """Return data product URI of listed file, registering it if needed."""
+    if file["data-product-uri"] is not None:
+        return file["data-product-uri"]
+    # File listed with lazy registration
+    return user_storage.get_file_metadata(request, path, experiment_id=experiment_id)["data-product-uri"]
+
+
 def _create_zip_response(request, filename, zipfile_entries):
     zf = zipstream.ZipFile(compression=zipstream.ZIP_DEFLATED, allowZip64=True)
     for archive_name, data_product_uri, size in zipfile_entries:
@@ -150,7 +216,9 @@ def _get_experiment_directory_zipfile_entries(request, experiment_id, path, dire
         matches, rename = _matches_filters(file['name'], includes=includes, excludes=excludes)
         if matches:
             archive_name = os.path.join(zipfile_prefix, directory, rename if rename is not None else file['name'])
-            yield archive_name, file["data-product-uri"], file["size"]
+            data_product_uri = _get_data_product_uri(
+                request, file, os.path.join(path, directory, file['name']), experiment_id=experiment_id)
+            yield archive_name, data_product_uri, file["size"]
     for d in directories:
         yield from _get_experiment_directory_zipfile_entries(
             request, experiment_id, path, directory=os.path.join(directory, d['name']),
@@ -191,3 +259,100 @@ def _matches_filters(filename, includes=None, excludes=None):
             else:
                 return True, None
     return False, None
+
+
+def _get_file_size_and_last_modified(request, data_file, data_product):
+    """
+    Return the size and last modified timestamp (in seconds) of the file, or
+    None for either if unknown.
+    """
+    try:
+        # Files in filesystem storage can be stat'ed directly
+        file_stat = os.fstat(data_file.fileno())
+        if stat.S_ISREG(file_stat.st_mode):
+            return file_stat.st_size, int(file_stat.st_mtime)
+    except (AttributeError, OSError):
+        pass
+    try:
+        file = user_storage.get_data_product_metadata(request, data_product=data_product)
+    except Exception:
+        logger.warning(f"Failed to get metadata for {data_product.productUri}", exc_info=True)
+        return None, None
+    modified_time = file.get('modified_time', file.get('created_time'))
+    last_modified = int(modified_time.timestamp()) if modified_time is not None else None
+    return file.get('size'), last_modified
+
+
+def _set_headers(response, headers):
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+def _is_if_range_satisfied(request, headers):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range is None:
+        return True
+    # If-Range requires a strong validator, so weak ETags never match
+    return if_range in (headers.get('ETag'), headers.get('Last-Modified'))
+
+
+def _get_byte_range(range_header, size):
+    """
+    Return (start, end) of range_header's byte range, with end inclusive.
+    Returns None if the whole file should be sent and False if the range
+    can't be satisfied.
+    """
+    # Invalid and multiple range requests are ignored
+    match = RANGE_RE.match(range_header or "")
+    if match is None or match.group(1) == match.group(2) == "":
+        return None
+    if match.group(1) == "":
+        suffix_length = int(match.group(2))
+        if suffix_length == 0 or size == 0:
+            return False
+        return max(size - suffix_length, 0), size - 1
+    start = int(match.group(1))
+    end = int(match.group(2)) if match.group(2) else size - 1
+    if match.group(2) and end < start:
+        return None
+    if start >= size:
+        return False
+    return start, min(end, size - 1)
+
+
+class _ByteRangeFile:
+    """Read length bytes of file starting at offset start."""
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        self._seek(start)
+
+    def _seek(self, offset):
+        try:
+            if self.file.seekable():
+                self.file.seek(offset)
+                return
+        except (AttributeError, OSError):
+            pass
+        # Streams, like files from the remote API, have to be read up to the
+        # start of the range
+        while offset > 0:
+            data = self.file.read(min(offset, self.CHUNK_SIZE))
+            if not data:
+                break
+            offset -= len(data)
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        if size == 0:
+            return b''
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,158 @@
+"""
+Shared cache of the gateway's application catalog.
+
+Application modules, interfaces and deployments and the compute and storage
+resource names change rarely but are loaded on many pages, so they are cached
+with Django's cache framework (shared across workers when a shared cache
+backend is configured) for APPLICATION_CATALOG_CACHE_TTL seconds. The
+gateway's notifications, loaded on every page render, are cached the same way
+for NOTIFICATIONS_CACHE_TTL seconds. Views that modify the catalog or the
+notifications must call the matching invalidate_* function.
+
+Application deployments are filtered by the user's sharing permissions, so
+they are cached per user. Changes to sharing and group membership outside of
+the portal are picked up after the TTL.
+"""
+import logging
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "django_airavata_api:catalog"
+APP_MODULES = "app_modules"
+APP_INTERFACES = "app_interfaces"
+APP_DEPLOYMENTS = "app_deployments"
+COMPUTE_RESOURCE_NAMES = "compute_resource_names"
+STORAGE_RESOURCE_NAMES = "storage_resource_names"
+NOTIFICATIONS = "notifications"
+
+
+def _key(name):
+    return f"{KEY_PREFIX}:{settings.GATEWAY_ID}:{name}"
+
+
+def _user_key(request, name):
+    # Per user entries can't be deleted together, so they are keyed by a
+    # generation that is replaced to invalidate all of them at once
+    generation = cache.get_or_set(
+        _key(f"{name}:generation"), lambda: uuid.uuid4().hex, None)
+    return f"{_key(name)}:{generation}:{request.user.username}"
+
+
+def _get_or_load(name, load, timeout=None, key=None):
+    if key is None:
+        key = _key(name)
+    value = cache.get(key)
+    if value is None:
+        logger.debug(f"Catalog cache miss for {key}")
+        value = load()
+        if timeout is None:
+            timeout = settings.APPLICATION_CATALOG_CACHE_TTL
+        cache.set(key, value, timeout)
+    return value
+
+
+def _index_by_module(items, get_module_ids):
+    index = {}
+    for item in items:
+        for module_id in get_module_ids(item) or []:
+            index.setdefault(module_id, []).append(item)
+    return index
+
+
+def get_all_app_modules(request):
+    return _get_or_load(
+        APP_MODULES,
+        lambda: request.airavata_client.getAllAppModules(
+            request.authz_token, settings.GATEWAY_ID))
+
+
+def _load_app_interfaces(request):
+    interfaces = request.airavata_client.getAllApplicationInterfaces(
+        request.authz_token, settings.GATEWAY_ID)
+    return {
+        'all': interfaces,
+        'by_module': _index_by_module(
+            interfaces, lambda i: i.applicationModules),
+    }
+
+
+def get_all_application_interfaces(request):
+    return _get_or_load(
+        APP_INTERFACES, lambda: _load_app_interfaces(request))['all']
+
+
+def get_application_interfaces_for_module(request, app_module_id):
+    by_module = _get_or_load(
+        APP_INTERFACES, lambda: _load_app_interfaces(request))['by_module']
+    return by_module.get(app_module_id, [])
+
+
+def _load_app_deployments(request):
+    deployments = request.airavata_client.getAllApplicationDeployments(
+        request.authz_token, settings.GATEWAY_ID)
+    return {
+        'all': deployments,
+        'by_module': _index_by_module(
+            deployments, lambda d: [d.appModuleId]),
+    }
+
+
+def get_application_deployments_for_module(request, app_module_id):
+    by_module = _get_or_load(
+        APP_DEPLOYMENTS, lambda: _load_app_deployments(request),
+        key=_user_key(request, APP_DEPLOYMENTS))['by_module']
+    return by_module.get(app_module_id, [])
+
+
+def get_all_compute_resource_names(request):
+    return _get_or_load(
+        COMPUTE_RESOURCE_NAMES,
+        lambda: request.airavata_client.getAllComputeResourceNames(
+            request.authz_token))
+
+
+def get_all_storage_resource_names(request):
+    return _get_or_load(
+        STORAGE_RESOURCE_NAMES,
+        lambda: request.airavata_client.getAllStorageResourceNames(
+            request.authz_token))
+
+
+def get_all_notifications(request):
+    return _get_or_load(
+        NOTIFICATIONS,
+        lambda: request.airavata_client.getAllNotifications(
+            request.authz_token, settings.GATEWAY_ID),
+        timeout=settings.NOTIFICATIONS_CACHE_TTL)
+
+
+def invalidate(*names):
+    cache.delete_many([_key(name) for name in names])
+
+
+def _invalidate_per_user(name):
+    cache.delete(_key(f"{name}:generation"))
+
+
+def invalidate_app_modules():
+    # Interfaces and deployments are indexed by module id
+    invalidate(APP_MODULES, APP_INTERFACES)
+    _invalidate_per_user(APP_DEPLOYMENTS)
+
+
+def invalidate_app_interfaces():
+    invalidate(APP_INTERFACES)
+
+
+def invalidate_app_deployments():
+    # Also called when sharing changes, since that can change which
+    # deployments a user can access
+    _invalidate_per_user(APP_DEPLOYMENTS)
+
+
+def invalidate_notifications():
+    invalidate(NOTIFICATIONS)
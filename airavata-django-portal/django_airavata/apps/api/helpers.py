@@ -1,9 +1,12 @@
 import logging
+from concurrent.futures import Future, TimeoutError, wait
 
 from airavata.model.group.ttypes import ResourcePermissionType
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 
+from django_airavata.utils import LazyThriftClient
+
 from . import models
 
 logger = logging.getLogger(__name__)
@@ -91,3 +94,62 @@ class WorkspacePreferencesHelper:
             request.authz_token,
             entity_id,
             ResourcePermissionType.READ)
+
+
+def call_concurrently(request, calls):
+    """Make independent Airavata API calls concurrently.
+
+    ``calls`` is a list of ``(method_name, args)`` tuples. Returns a list of
+    completed futures, in the same order; result() returns the call's result
+    or raises its exception. A call that doesn't complete within
+    THRIFT_CLIENT_CONCURRENT_CALLS_TIMEOUT seconds raises TimeoutError.
+    Falls back to sequential calls when the request's client isn't a pooled
+    LazyThriftClient.
+    """
+    client = request.airavata_client
+    if isinstance(client, LazyThriftClient):
+        futures = client.call_concurrently(calls)
+        timeout = settings.THRIFT_CLIENT_CONCURRENT_CALLS_TIMEOUT
+        done, _ = wait(futures, timeout=timeout)
+        return [future if future in done
+                else _timed_out_future(future, name, timeout)
+                for future, (name, _) in zip(futures, calls)]
+    futures = []
+    for name, args in calls:
+        future = Future()
+        try:
+            future.set_result(getattr(client, name)(*args))
+        except Exception as e:
+            future.set_exception(e)
+        futures.append(future)
+    return futures
+
+
+def _timed_out_future(future, name, timeout):
+    future.cancel()
+    timed_out = Future()
+    timed_out.set_exception(
+        TimeoutError(f"{name} didn't complete within {timeout} seconds"))
+    return timed_out
+
+
+def load_user_has_access(request, entity_ids, permission_type):
+    """Check the user's access to several entities at once.
+
+    Returns a dict of entity id to userHasAccess result. The Airavata API has
+    no bulk access check, so the checks are made concurrently.
+    Entities whose check failed are left out of the result.
+    """
+    entity_ids = list(dict.fromkeys(entity_ids))
+    futures = call_concurrently(
+        request,
+        [('userHasAccess', (request.authz_token, entity_id, permission_type))
+         for entity_id in entity_ids])
+    result = {}
+    for entity_id, future in zip(entity_ids, futures):
+        try:
+            result[entity_id] = future.result()
+        except Exception:
+            logger.warning(f"userHasAccess check failed for {entity_id}",
+                           exc_info=True)
+    return result
@@ -0,0 +1,46 @@
+import logging
+
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """
+    JSONRenderer that uses orjson, if it is installed, to render responses.
+
+    Output is compact like DRF's default JSON rendering. Falls back to DRF's
+    JSONRenderer when orjson isn't installed, when indentation is requested
+    or when orjson can't serialize the data.
+    """
+
+    _default = encoders.JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or
+                self.get_indent(accepted_media_type or '',
+                                renderer_context or {})):
+            return super().render(
+                data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self._default,
+                option=(orjson.OPT_NON_STR_KEYS |
+                        orjson.OPT_PASSTHROUGH_DATETIME))
+        except orjson.JSONEncodeError as e:
+            logger.debug(f"orjson failed to render data, falling back: {e}")
+            return super().render(
+                data, accepted_media_type, renderer_context)
+        # Like DRF, escape the unicode line terminators which aren't allowed
+        # in JavaScript string literals (this JSON is embedded in templates)
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+                b'\xe2\x80\xa9', b'\\u2029')
+        return ret
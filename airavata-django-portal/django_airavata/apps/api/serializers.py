@@ -72,7 +72,7 @@ from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework import serializers
 
-from . import models, thrift_utils, view_utils
+from . import helpers, models, thrift_utils, view_utils
 
 log = logging.getLogger(__name__)
 
@@ -166,6 +166,46 @@ class OrderedListField(serializers.ListField):
         return validated_data
 
 
+class UserHasWriteAccessListSerializer(serializers.ListSerializer):
+    """Checks the user's write access to all items before serializing them.
+
+    This replaces one userHasAccess API call per item with concurrent calls
+    made once per list (page). Used with UserHasWriteAccessMixin.
+    """
+
+    def to_representation(self, data):
+        items = list(data)
+        self.child.prefetch_user_has_write_access(items)
+        return super().to_representation(items)
+
+
+class UserHasWriteAccessMixin:
+    """Provides get_userHasWriteAccess for serializers of sharable entities.
+
+    Subclasses set ``write_access_id_field`` to the attribute holding the
+    entity id and set ``list_serializer_class`` in Meta to
+    UserHasWriteAccessListSerializer.
+    """
+    write_access_id_field = None
+
+    def prefetch_user_has_write_access(self, instances):
+        request = self.context['request']
+        self._user_has_write_access = helpers.load_user_has_access(
+            request,
+            [getattr(instance, self.write_access_id_field)
+             for instance in instances],
+            ResourcePermissionType.WRITE)
+
+    def get_userHasWriteAccess(self, instance):
+        entity_id = getattr(instance, self.write_access_id_field)
+        prefetched = getattr(self, '_user_has_write_access', {})
+        if entity_id in prefetched:
+            return prefetched[entity_id]
+        request = self.context['request']
+        return request.airavata_client.userHasAccess(
+            request.authz_token, entity_id, ResourcePermissionType.WRITE)
+
+
 class GroupSerializer(thrift_utils.create_serializer_class(GroupModel)):
     url = FullyEncodedHyperlinkedIdentityField(
         view_name='django_airavata_api:group-detail',
@@ -252,10 +292,14 @@ class GroupSerializer(thrift_utils.create_serializer_class(GroupModel)):
 
 
 class ProjectSerializer(
+        UserHasWriteAccessMixin,
         thrift_utils.create_serializer_class(Project)):
     class Meta:
         required = ('name',)
         read_only = ('owner', 'gatewayId')
+        list_serializer_class = UserHasWriteAccessListSerializer
+
+    write_access_id_field = 'projectID'
 
     url = FullyEncodedHyperlinkedIdentityField(
         view_name='django_airavata_api:project-detail',
@@ -278,12 +322,6 @@ class ProjectSerializer(
             'description', instance.description)
         return instance
 
-    def get_userHasWriteAccess(self, project):
-        request = self.context['request']
-        return request.airavata_client.userHasAccess(
-            request.authz_token, project.projectID,
-            ResourcePermissionType.WRITE)
-
     def get_isOwner(self, project):
         request = self.context['request']
         return project.owner == request.user.username
@@ -442,8 +480,13 @@ class SetEnvPathsSerializer(
 
 
 class ApplicationDeploymentDescriptionSerializer(
+    UserHasWriteAccessMixin,
     thrift_utils.create_serializer_class(
         ApplicationDeploymentDescription)):
+    class Meta:
+        list_serializer_class = UserHasWriteAccessListSerializer
+
+    write_access_id_field = 'appDeploymentId'
     url = FullyEncodedHyperlinkedIdentityField(
         view_name='django_airavata_api:application-deployment-detail',
         lookup_field='appDeploymentId',
@@ -480,12 +523,6 @@ class ApplicationDeploymentDescriptionSerializer(
         child=SetEnvPathsSerializer(),
         allow_null=True)
 
-    def get_userHasWriteAccess(self, appDeployment):
-        request = self.context['request']
-        return request.airavata_client.userHasAccess(
-            request.authz_token, appDeployment.appDeploymentId,
-            ResourcePermissionType.WRITE)
-
 
 class ComputeResourceDescriptionSerializer(
         thrift_utils.create_serializer_class(ComputeResourceDescription)):
@@ -507,10 +544,14 @@ class ProcessStatusSerializer(
 
 
 class ExperimentSerializer(
+        UserHasWriteAccessMixin,
         thrift_utils.create_serializer_class(ExperimentModel)):
     class Meta:
         required = ('projectId', 'experimentType', 'experimentName')
         read_only = ('userName', 'gatewayId')
+        list_serializer_class = UserHasWriteAccessListSerializer
+
+    write_access_id_field = 'experimentId'
 
     url = FullyEncodedHyperlinkedIdentityField(
         view_name='django_airavata_api:experiment-detail',
@@ -543,12 +584,6 @@ class ExperimentSerializer(
     experimentStatus = ExperimentStatusSerializer(many=True, allow_null=True)
     userHasWriteAccess = serializers.SerializerMethodField()
 
-    def get_userHasWriteAccess(self, experiment):
-        request = self.context['request']
-        return request.airavata_client.userHasAccess(
-            request.authz_token, experiment.experimentId,
-            ResourcePermissionType.WRITE)
-
     def to_representation(self, experiment):
         result = super().to_representation(experiment)
         self._add_intermediate_output_information(experiment, result)
@@ -696,14 +731,13 @@ class BaseExperimentSummarySerializer(
         lookup_url_kwarg='project_id')
 
 
-class ExperimentSummarySerializer(BaseExperimentSummarySerializer):
-    userHasWriteAccess = serializers.SerializerMethodField()
+class ExperimentSummarySerializer(UserHasWriteAccessMixin,
+                                  BaseExperimentSummarySerializer):
+    class Meta:
+        list_serializer_class = UserHasWriteAccessListSerializer
 
-    def get_userHasWriteAccess(self, experiment):
-        request = self.context['request']
-        return request.airavata_client.userHasAccess(
-            request.authz_token, experiment.experimentId,
-            ResourcePermissionType.WRITE)
+    write_access_id_field = 'experimentId'
+    userHasWriteAccess = serializers.SerializerMethodField()
 
 
 class UserProfileSerializer(
@@ -960,17 +994,16 @@ class SharedEntitySerializer(serializers.Serializer):
 
 
 class CredentialSummarySerializer(
+        UserHasWriteAccessMixin,
         thrift_utils.create_serializer_class(CredentialSummary)):
+    class Meta:
+        list_serializer_class = UserHasWriteAccessListSerializer
+
+    write_access_id_field = 'token'
     type = thrift_utils.ThriftEnumField(SummaryType)
     persistedTime = UTCPosixTimestampDateTimeField()
     userHasWriteAccess = serializers.SerializerMethodField()
 
-    def get_userHasWriteAccess(self, credential_summary):
-        request = self.context['request']
-        return request.airavata_client.userHasAccess(
-            request.authz_token, credential_summary.token,
-            ResourcePermissionType.WRITE)
-
 
 class StoragePreferenceSerializer(
         thrift_utils.create_serializer_class(StoragePreference)):
@@ -1059,6 +1092,13 @@ class UserStorageFileSerializer(UserHasWriteAccessToPathSerializer):
     def get_downloadURL(self, file):
         """Getter for downloadURL field."""
         request = self.context['request']
+        if file['data-product-uri'] is None:
+            # Data product will be registered when the file is downloaded,
+            # see USER_STORAGE_LAZY_DATA_PRODUCT_REGISTRATION
+            download_url = file.get('download-url')
+            if download_url is None:
+                download_url = user_storage.get_lazy_download_url(request, path=file['path'])
+            return download_url
         return user_storage.get_lazy_download_url(request, data_product_uri=file['data-product-uri'])
 
 
@@ -1089,6 +1129,11 @@ class UserStoragePathSerializer(UserHasWriteAccessToPathSerializer):
     path = serializers.CharField(required=False)
     # uploaded is populated after a file upload
     uploaded = DataProductSerializer(read_only=True)
+    # pagination fields are populated when listing is paginated
+    next = serializers.URLField(required=False, allow_null=True)
+    previous = serializers.URLField(required=False, allow_null=True)
+    limit = serializers.IntegerField(required=False)
+    offset = serializers.IntegerField(required=False)
 
 
 # Fields for ExperimentStorageFileSerializer are the same as UserStorageFileSerializer
@@ -1118,6 +1163,11 @@ class ExperimentStoragePathSerializer(serializers.Serializer):
     directories = ExperimentStorageDirectorySerializer(many=True)
     files = ExperimentStorageFileSerializer(many=True)
     parts = serializers.ListField(child=serializers.CharField())
+    # pagination fields are populated when listing is paginated
+    next = serializers.URLField(required=False, allow_null=True)
+    previous = serializers.URLField(required=False, allow_null=True)
+    limit = serializers.IntegerField(required=False)
+    offset = serializers.IntegerField(required=False)
 
 
 # ModelSerializers
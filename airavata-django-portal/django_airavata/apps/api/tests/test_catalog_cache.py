@@ -0,0 +1,122 @@
+from unittest.mock import MagicMock
+
+from airavata.model.appcatalog.appdeployment.ttypes import (
+    ApplicationDeploymentDescription
+)
+from airavata.model.appcatalog.appinterface.ttypes import (
+    ApplicationInterfaceDescription
+)
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+
+from django_airavata.apps.api import catalog_cache
+
+GATEWAY_ID = "test-gateway"
+
+
+@override_settings(GATEWAY_ID=GATEWAY_ID)
+class CatalogCacheTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.request = RequestFactory().get("/")
+        self.request.user = MagicMock(username="testuser")
+        self.request.authz_token = "dummy"
+        self.request.airavata_client = MagicMock(name="airavata_client")
+        self.request.airavata_client.getAllApplicationInterfaces.return_value = [
+            ApplicationInterfaceDescription(
+                applicationInterfaceId="interface1",
+                applicationModules=["module1"]),
+            ApplicationInterfaceDescription(
+                applicationInterfaceId="interface2",
+                applicationModules=["module2"]),
+            ApplicationInterfaceDescription(
+                applicationInterfaceId="interface3",
+                applicationModules=None),
+        ]
+        self.request.airavata_client.getAllApplicationDeployments.return_value = [
+            ApplicationDeploymentDescription(
+                appDeploymentId="deployment1", appModuleId="module1"),
+            ApplicationDeploymentDescription(
+                appDeploymentId="deployment2", appModuleId="module1"),
+        ]
+
+    def test_application_interfaces_indexed_by_module(self):
+        interfaces = catalog_cache.get_application_interfaces_for_module(
+            self.request, "module2")
+        self.assertEqual(
+            ["interface2"], [i.applicationInterfaceId for i in interfaces])
+        self.assertEqual(
+            [], catalog_cache.get_application_interfaces_for_module(
+                self.request, "module3"))
+        self.assertEqual(
+            3, len(catalog_cache.get_all_application_interfaces(self.request)))
+        self.request.airavata_client.getAllApplicationInterfaces.assert_called_once_with(
+            "dummy", GATEWAY_ID)
+
+    def test_application_deployments_indexed_by_module(self):
+        deployments = catalog_cache.get_application_deployments_for_module(
+            self.request, "module1")
+        self.assertEqual(["deployment1", "deployment2"],
+                         [d.appDeploymentId for d in deployments])
+        catalog_cache.get_application_deployments_for_module(
+            self.request, "module1")
+        self.request.airavata_client.getAllApplicationDeployments.assert_called_once()
+
+    def test_application_deployments_cached_per_user(self):
+        other_request = RequestFactory().get("/")
+        other_request.user = MagicMock(username="otheruser")
+        other_request.authz_token = "other"
+        other_request.airavata_client = MagicMock(name="airavata_client")
+        # Deployment2 hasn't been shared with otheruser
+        other_request.airavata_client.getAllApplicationDeployments.return_value = [
+            ApplicationDeploymentDescription(
+                appDeploymentId="deployment1", appModuleId="module1"),
+        ]
+
+        deployments = catalog_cache.get_application_deployments_for_module(
+            self.request, "module1")
+        other_deployments = catalog_cache.get_application_deployments_for_module(
+            other_request, "module1")
+
+        self.assertEqual(["deployment1", "deployment2"],
+                         [d.appDeploymentId for d in deployments])
+        self.assertEqual(["deployment1"],
+                         [d.appDeploymentId for d in other_deployments])
+        other_request.airavata_client.getAllApplicationDeployments.assert_called_once_with(
+            "other", GATEWAY_ID)
+
+    def test_invalidate_app_deployments(self):
+        catalog_cache.get_application_deployments_for_module(
+            self.request, "module1")
+        catalog_cache.invalidate_app_deployments()
+        catalog_cache.get_application_deployments_for_module(
+            self.request, "module1")
+        self.assertEqual(
+            2,
+            self.request.airavata_client.getAllApplicationDeployments.call_count)
+
+    def test_invalidate_app_interfaces(self):
+        catalog_cache.get_all_application_interfaces(self.request)
+        catalog_cache.invalidate_app_interfaces()
+        catalog_cache.get_all_application_interfaces(self.request)
+        self.assertEqual(
+            2,
+            self.request.airavata_client.getAllApplicationInterfaces.call_count)
+
+    def test_invalidate_app_modules_invalidates_indexes(self):
+        catalog_cache.get_application_interfaces_for_module(
+            self.request, "module1")
+        catalog_cache.get_application_deployments_for_module(
+            self.request, "module1")
+        catalog_cache.invalidate_app_modules()
+        catalog_cache.get_application_interfaces_for_module(
+            self.request, "module1")
+        catalog_cache.get_application_deployments_for_module(
+            self.request, "module1")
+        self.assertEqual(
+            2,
+            self.request.airavata_client.getAllApplicationInterfaces.call_count)
+        self.assertEqual(
+            2,
+            self.request.airavata_client.getAllApplicationDeployments.call_count)
@@ -0,0 +1,50 @@
+import threading
+from concurrent.futures import TimeoutError
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase, override_settings
+
+from django_airavata import utils
+from django_airavata.apps.api import helpers
+from django_airavata.tests.test_utils import FakeService, FakeSocket
+
+
+class CallConcurrentlyTestCase(SimpleTestCase):
+
+    def setUp(self):
+        patcher = patch.object(utils.TSocket, 'TSocket', FakeSocket)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = utils.SimpleThriftPool(FakeService, "localhost", 8930, size=2)
+        self.request = MagicMock()
+        self.request.airavata_client = self.pool.lazy_client()
+        self.addCleanup(self.request.airavata_client.release)
+
+    def test_results(self):
+        futures = helpers.call_concurrently(
+            self.request, [('getProject', ("token", "proj1")),
+                           ('getExperiment', ("token", "exp1"))])
+        self.assertEqual(["proj1", "exp1"],
+                         [f.result()['args'][1] for f in futures])
+
+    @override_settings(THRIFT_CLIENT_CONCURRENT_CALLS_TIMEOUT=0.1)
+    def test_timeout(self):
+        unblock = threading.Event()
+        self.addCleanup(unblock.set)
+        get_project = FakeService.Client.getProject
+
+        def slow_get_project(client, authzToken, projectId):
+            if projectId == "slow":
+                unblock.wait(5)
+            return get_project(client, authzToken, projectId)
+        patcher = patch.object(FakeService.Client, 'getProject', slow_get_project)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        fast, slow = helpers.call_concurrently(
+            self.request, [('getProject', ("token", "fast")),
+                           ('getProject', ("token", "slow"))])
+
+        self.assertEqual("fast", fast.result()['args'][1])
+        with self.assertRaises(TimeoutError):
+            slow.result()
@@ -0,0 +1,69 @@
+import json
+import time
+from unittest.mock import MagicMock
+
+from airavata.model.workspace.ttypes import Notification
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+
+from django_airavata import context_processors
+from django_airavata.apps.api.models import User_Notifications
+
+GATEWAY_ID = "test-gateway"
+
+
+@override_settings(GATEWAY_ID=GATEWAY_ID)
+class GetNotificationsTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user("testuser")
+        now = int(time.time() * 1000)
+        self.notifications = [
+            Notification(notificationId=f"notification{i}",
+                         gatewayId=GATEWAY_ID, title=f"Notification {i}",
+                         publishedTime=now - 60000,
+                         expirationTime=now + 60000)
+            for i in range(5)
+        ]
+        # Expired notification
+        self.notifications.append(
+            Notification(notificationId="expired", gatewayId=GATEWAY_ID,
+                         publishedTime=now - 120000,
+                         expirationTime=now - 60000))
+        self.airavata_client = MagicMock(name="airavata_client")
+        self.airavata_client.getAllNotifications.return_value = self.notifications
+
+    def _get_notifications(self):
+        request = RequestFactory().get("/")
+        request.user = self.user
+        request.authz_token = "dummy"
+        request.airavata_client = self.airavata_client
+        return context_processors.get_notifications(request)
+
+    def test_get_notifications(self):
+        User_Notifications.objects.create(
+            username="testuser", notification_id="notification1",
+            is_read=True)
+        result = self._get_notifications()
+        notifications = json.loads(result['notifications'])
+        self.assertEqual([f"notification{i}" for i in range(5)],
+                         [n['notificationId'] for n in notifications])
+        self.assertEqual([False, True, False, False, False],
+                         [n['is_read'] for n in notifications])
+        self.assertEqual(4, result['unread_notifications'])
+        self.assertEqual(
+            5, User_Notifications.objects.filter(username="testuser").count())
+        self.assertTrue(
+            notifications[0]['url'].endswith("?id=notification0"))
+
+    def test_notifications_cached(self):
+        self._get_notifications()
+        # Read state exists for all notifications, so only one query needed
+        with self.assertNumQueries(1):
+            result = self._get_notifications()
+        self.assertEqual(5, result['unread_notifications'])
+        self.airavata_client.getAllNotifications.assert_called_once_with(
+            "dummy", GATEWAY_ID)
@@ -0,0 +1,41 @@
+import datetime
+import decimal
+import json
+from collections import OrderedDict
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from rest_framework.renderers import JSONRenderer
+
+from django_airavata.apps.api import renderers
+
+
+class FastJSONRendererTestCase(SimpleTestCase):
+
+    data = OrderedDict([
+        ('name', "caf\u00e9\u2028line"),
+        ('size', 12),
+        ('ratio', decimal.Decimal("1.5")),
+        ('created', datetime.datetime(
+            2023, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc)),
+        ('counts', {1: "one"}),
+        ('results', [None, True, 1.25]),
+    ])
+
+    def test_same_as_json_renderer(self):
+        expected = JSONRenderer().render(self.data)
+        rendered = renderers.FastJSONRenderer().render(self.data)
+        self.assertEqual(json.loads(expected), json.loads(rendered))
+        self.assertNotIn(b'\xe2\x80\xa8', rendered)
+
+    def test_without_orjson(self):
+        with patch.object(renderers, 'orjson', None):
+            rendered = renderers.FastJSONRenderer().render(self.data)
+        self.assertEqual(JSONRenderer().render(self.data), rendered)
+
+    def test_indent_uses_json_renderer(self):
+        rendered = renderers.FastJSONRenderer().render(
+            self.data, 'application/json; indent=4')
+        self.assertEqual(
+            JSONRenderer().render(self.data, 'application/json; indent=4'),
+            rendered)
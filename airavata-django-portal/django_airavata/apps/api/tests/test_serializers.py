@@ -0,0 +1,88 @@
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, call
+
+from airavata.model.group.ttypes import ResourcePermissionType
+from airavata.model.workspace.ttypes import Project
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase, override_settings
+
+from django_airavata.apps.api import serializers
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class UserHasWriteAccessListSerializerTestCase(TestCase):
+
+    def setUp(self):
+        self.request = RequestFactory().get("/")
+        self.request.user = User(username="testuser")
+        self.request.authz_token = "dummy"
+        self.request.airavata_client = MagicMock(name="airavata_client")
+        self.request.airavata_client.userHasAccess.side_effect = (
+            lambda authz_token, entity_id, permission_type: entity_id == "p1")
+
+    def _project(self, project_id):
+        return Project(projectID=project_id, name=project_id,
+                       owner="testuser", gatewayId="gateway")
+
+    def test_list_checks_each_entity_once(self):
+        projects = [self._project("p1"), self._project("p2"),
+                    self._project("p1")]
+        serializer = serializers.ProjectSerializer(
+            projects, many=True, context={'request': self.request})
+        data = serializer.data
+
+        self.assertIsInstance(
+            serializer, serializers.UserHasWriteAccessListSerializer)
+        self.assertEqual([True, False, True],
+                         [p['userHasWriteAccess'] for p in data])
+        self.request.airavata_client.userHasAccess.assert_has_calls([
+            call("dummy", "p1", ResourcePermissionType.WRITE),
+            call("dummy", "p2", ResourcePermissionType.WRITE),
+        ])
+        self.assertEqual(
+            2, self.request.airavata_client.userHasAccess.call_count)
+
+    def test_single_instance(self):
+        serializer = serializers.ProjectSerializer(
+            self._project("p2"), context={'request': self.request})
+        self.assertFalse(serializer.data['userHasWriteAccess'])
+        self.request.airavata_client.userHasAccess.assert_called_once_with(
+            "dummy", "p2", ResourcePermissionType.WRITE)
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'],
+                   GATEWAY_DATA_STORE_REMOTE_API="https://remote.example.com")
+class UserStorageFileSerializerTestCase(TestCase):
+
+    def setUp(self):
+        self.request = RequestFactory().get("/")
+        self.request.user = User(username="testuser")
+
+    def _file(self, **kwargs):
+        file = {
+            'name': 'foo.txt',
+            'path': 'tmp/foo.txt',
+            'data-product-uri': None,
+            'created_time': datetime(2023, 1, 1, tzinfo=timezone.utc),
+            'modified_time': datetime(2023, 1, 1, tzinfo=timezone.utc),
+            'mime_type': 'text/plain',
+            'size': 3,
+            'hidden': False,
+        }
+        file.update(kwargs)
+        return file
+
+    def test_download_url_of_unregistered_file(self):
+        file = self._file(**{'download-url': "https://remote.example.com/sdk/download/?path=tmp%2Ffoo.txt"})
+        data = serializers.UserStorageFileSerializer(
+            file, context={'request': self.request}).data
+
+        self.assertEqual("https://remote.example.com/sdk/download/?path=tmp%2Ffoo.txt",
+                         data['downloadURL'])
+
+    def test_download_url_of_unregistered_file_without_download_url(self):
+        data = serializers.UserStorageFileSerializer(
+            self._file(), context={'request': self.request}).data
+
+        self.assertEqual("http://testserver/sdk/download/?path=tmp%2Ffoo.txt",
+                         data['downloadURL'])
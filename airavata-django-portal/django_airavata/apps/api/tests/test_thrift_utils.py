@@ -0,0 +1,125 @@
+from unittest.mock import patch
+
+from airavata.model.appcatalog.groupresourceprofile.ttypes import (
+    BatchQueueResourcePolicy,
+    ComputeResourceReservation,
+    EnvironmentSpecificPreferences,
+    GroupComputeResourcePreference,
+    GroupResourceProfile,
+    ResourceType,
+    SlurmComputeResourcePreference
+)
+from airavata.model.application.io.ttypes import (
+    DataType,
+    InputDataObjectType,
+    OutputDataObjectType
+)
+from airavata.model.experiment.ttypes import (
+    ExperimentModel,
+    ExperimentType,
+    UserConfigurationDataModel
+)
+from airavata.model.scheduling.ttypes import (
+    ComputationalResourceSchedulingModel
+)
+from airavata.model.status.ttypes import ExperimentState, ExperimentStatus
+from django.test import TestCase
+
+from django_airavata.apps.api import thrift_utils
+
+
+def create_experiment():
+    return ExperimentModel(
+        experimentId="exp-1",
+        projectId="proj-1",
+        gatewayId="gateway",
+        experimentType=ExperimentType.SINGLE_APPLICATION,
+        userName="testuser",
+        experimentName="Test experiment",
+        creationTime=1600000000123,
+        emailAddresses=["a@example.com", "b@example.com"],
+        userConfigurationData=UserConfigurationDataModel(
+            airavataAutoSchedule=False,
+            overrideManualScheduledParams=False,
+            computationalResourceScheduling=(
+                ComputationalResourceSchedulingModel(
+                    resourceHostId="host", totalCPUCount=4, nodeCount=1,
+                    queueName="normal", wallTimeLimit=30))),
+        experimentInputs=[
+            InputDataObjectType(name="in1", value="1", type=DataType.INTEGER,
+                                isRequired=True, inputOrder=0),
+            InputDataObjectType(name="in2", value=None, type=DataType.URI),
+        ],
+        experimentOutputs=[
+            OutputDataObjectType(name="out1", type=DataType.STDOUT),
+        ],
+        experimentStatus=[
+            ExperimentStatus(state=ExperimentState.CREATED,
+                             timeOfStateChange=1600000000456,
+                             reason="created"),
+        ])
+
+
+def create_group_resource_profile():
+    return GroupResourceProfile(
+        gatewayId="gateway",
+        groupResourceProfileId="grp-1",
+        groupResourceProfileName="Default",
+        creationTime=1600000000123,
+        computePreferences=[
+            GroupComputeResourcePreference(
+                computeResourceId="host",
+                groupResourceProfileId="grp-1",
+                overridebyAiravata=True,
+                resourceType=ResourceType.SLURM,
+                specificPreferences=EnvironmentSpecificPreferences(
+                    slurm=SlurmComputeResourcePreference(
+                        allocationProjectNumber="alloc",
+                        reservations=[
+                            ComputeResourceReservation(
+                                reservationId="r1", reservationName="res",
+                                queueNames=["normal", "debug"],
+                                startTime=1600000000000,
+                                endTime=1600003600000)
+                        ]))),
+        ],
+        batchQueueResourcePolicies=[
+            BatchQueueResourcePolicy(
+                resourcePolicyId="p1", computeResourceId="host",
+                groupResourceProfileId="grp-1", queuename="normal",
+                maxAllowedNodes=2),
+        ])
+
+
+class CompiledRepresentationTestCase(TestCase):
+
+    def _assert_same_representation(
+            self, thrift_data_type, instance,
+            enable_date_time_conversion=False):
+        serializer_class = thrift_utils.create_serializer_class(
+            thrift_data_type, enable_date_time_conversion)
+        compiled = serializer_class(instance=instance).data
+        with patch.object(thrift_utils, 'COMPILED_REPRESENTATION_ENABLED',
+                          False):
+            expected = serializer_class(instance=instance).data
+        self.assertEqual(expected, compiled)
+
+    def test_experiment(self):
+        self._assert_same_representation(ExperimentModel, create_experiment())
+
+    def test_experiment_with_date_time_conversion(self):
+        self._assert_same_representation(
+            ExperimentModel, create_experiment(),
+            enable_date_time_conversion=True)
+
+    def test_group_resource_profile(self):
+        self._assert_same_representation(
+            GroupResourceProfile, create_group_resource_profile())
+
+    def test_serializer_class_is_cached(self):
+        self.assertIs(
+            thrift_utils.create_serializer_class(ExperimentModel),
+            thrift_utils.create_serializer_class(ExperimentModel))
+        self.assertIsNot(
+            thrift_utils.create_serializer_class(ExperimentModel),
+            thrift_utils.create_serializer_class(ExperimentModel, True))
@@ -1,6 +1,9 @@
-from unittest.mock import MagicMock, call, patch
+from datetime import datetime, timezone
+from unittest.mock import ANY, MagicMock, call, patch
 
+from airavata.api.error.ttypes import AiravataSystemException
 from airavata.model.appcatalog.gatewaygroups.ttypes import GatewayGroups
+from airavata.model.experiment.ttypes import ExperimentModel
 from airavata.model.group.ttypes import GroupModel
 from airavata.model.user.ttypes import UserProfile
 from django.contrib.auth.models import User
@@ -491,3 +494,107 @@ class ExceptionHandlingTest(TestCase):
         self.assertEquals(403, response.status_code)
         self.assertIn('is_authenticated', response.data)
         self.assertFalse(response.data['is_authenticated'])
+
+
+class ExperimentStoragePathViewTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('testuser')
+        self.factory = APIRequestFactory()
+
+    def _file(self, name):
+        return {
+            'name': name,
+            'path': name,
+            'data-product-uri': None,
+            'download-url': f"http://testserver/sdk/download/?path={name}",
+            'created_time': datetime(2023, 1, 1, tzinfo=timezone.utc),
+            'modified_time': datetime(2023, 1, 1, tzinfo=timezone.utc),
+            'mime_type': "text/plain",
+            'size': 1,
+            'hidden': False,
+        }
+
+    def _get(self, user_storage, query_params):
+        url = reverse('django_airavata_api:experiment-storage-items',
+                      kwargs={'experiment_id': "exp1", 'path': ""})
+        request = self.factory.get(url, query_params)
+        force_authenticate(request, self.user)
+        user_storage.experiment_dir_exists.return_value = True
+        view = views.ExperimentStoragePathView.as_view()
+        return view(request, experiment_id="exp1", path="")
+
+    @patch("django_airavata.apps.api.views.user_storage")
+    def test_paginated_listing(self, user_storage):
+        user_storage.list_experiment_dir.return_value = (
+            [], [self._file("a.txt"), self._file("b.txt"), self._file("c.txt")])
+
+        response = self._get(user_storage, {'limit': 2, 'offset': 2, 'ordering': "-size",
+                                            'name-prefix': "a"})
+
+        user_storage.list_experiment_dir.assert_called_once_with(
+            ANY, "exp1", "", name_prefix="a", ordering="-size", offset=2, limit=3)
+        self.assertEqual(["a.txt", "b.txt"], [f['name'] for f in response.data['files']])
+        self.assertEqual(2, response.data['limit'])
+        self.assertIn("offset=4", response.data['next'])
+        self.assertNotIn("offset", response.data['previous'])
+
+    @patch("django_airavata.apps.api.views.user_storage")
+    def test_unpaginated_listing(self, user_storage):
+        user_storage.list_experiment_dir.return_value = ([], [self._file("a.txt")])
+
+        response = self._get(user_storage, {})
+
+        user_storage.list_experiment_dir.assert_called_once_with(
+            ANY, "exp1", "", name_prefix=None, ordering=None)
+        self.assertEqual(["a.txt"], [f['name'] for f in response.data['files']])
+        self.assertNotIn('limit', response.data)
+
+    @patch("django_airavata.apps.api.views.user_storage")
+    def test_invalid_ordering(self, user_storage):
+        response = self._get(user_storage, {'ordering': "path"})
+        self.assertEqual(400, response.status_code)
+        user_storage.list_experiment_dir.assert_not_called()
+
+
+class FullExperimentViewSetTests(TestCase):
+
+    def setUp(self):
+        request = APIRequestFactory().get("/")
+        request.authz_token = "dummy"
+        request.airavata_client = MagicMock(name="airavata_client")
+        request.airavata_client.getExperiment.return_value = ExperimentModel(
+            experimentId="exp1", projectId="proj1", executionId="interface1",
+            experimentInputs=[], experimentOutputs=[])
+        self.airavata_client = request.airavata_client
+        self.view = views.FullExperimentViewSet(request=request)
+        patcher = patch.object(views.output_views, 'get_output_views')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_get_instance(self):
+        self.airavata_client.userHasAccess.return_value = True
+
+        full_experiment = self.view.get_instance("exp1")
+
+        self.airavata_client.getProject.assert_called_once_with("dummy", "proj1")
+        self.assertIs(self.airavata_client.getProject.return_value,
+                      full_experiment.project)
+        self.assertIs(self.airavata_client.getJobDetails.return_value,
+                      full_experiment.jobDetails)
+
+    def test_get_instance_without_project_access(self):
+        self.airavata_client.userHasAccess.return_value = False
+
+        full_experiment = self.view.get_instance("exp1")
+
+        # The project isn't loaded unless the user has access to it
+        self.airavata_client.getProject.assert_not_called()
+        self.assertIsNone(full_experiment.project)
+
+    def test_get_instance_project_fails_to_load(self):
+        self.airavata_client.userHasAccess.return_value = True
+        self.airavata_client.getProject.side_effect = AiravataSystemException()
+
+        with self.assertRaises(AiravataSystemException):
+            self.view.get_instance("exp1")
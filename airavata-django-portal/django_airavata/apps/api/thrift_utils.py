@@ -3,8 +3,9 @@ Used to create Django Rest Framework serializers for Apache Thrift Data Types
 """
 import copy
 import datetime
-import logging
 import enum
+import functools
+import logging
 
 from rest_framework.serializers import (
     BooleanField,
@@ -28,6 +29,10 @@ from airavata.model.appcatalog.parallelism.ttypes import ApplicationParallelismT
 
 logger = logging.getLogger(__name__)
 
+# Whether generated serializers use the representation compiled from the
+# thrift_spec (see get_representation_function) instead of the DRF fields
+COMPILED_REPRESENTATION_ENABLED = True
+
 # used to map apache thrift data types to django serializer fields
 mapping = {
     TType.STRING: CharField,
@@ -99,7 +104,14 @@ def create_serializer(thrift_data_type, enable_date_time_conversion=False, **kwa
     return create_serializer_class(thrift_data_type, enable_date_time_conversion)(**kwargs)
 
 
+@functools.lru_cache(maxsize=None)
 def create_serializer_class(thrift_data_type, enable_date_time_conversion=False):
+    """
+    Create (or return the cached) serializer class for the thrift data type.
+
+    Classes are cached per (thrift_data_type, enable_date_time_conversion);
+    subclass the returned class to customize it.
+    """
     class CustomSerializerMeta(SerializerMetaclass):
 
         def __new__(cls, name, bases, attrs):
@@ -126,6 +138,15 @@ def create_serializer_class(thrift_data_type, enable_date_time_conversion=False)
         Custom Serializer which handle the list fields which holds custom class objects
         """
 
+        def to_representation(self, instance):
+            # Subclasses may declare their own fields, so only the generated
+            # class can use the compiled representation
+            if (COMPILED_REPRESENTATION_ENABLED and
+                    type(self) is CustomSerializer):
+                return get_representation_function(
+                    thrift_data_type, enable_date_time_conversion)(instance)
+            return super().to_representation(instance)
+
         def process_nested_fields(self, validated_data):
             fields = self.fields
             params = copy.deepcopy(validated_data)
@@ -191,6 +212,99 @@ def create_serializer_class(thrift_data_type, enable_date_time_conversion=False)
     return CustomSerializer
 
 
+@functools.lru_cache(maxsize=None)
+def get_representation_function(thrift_data_type,
+                                enable_date_time_conversion=False):
+    """
+    Compile a function from the thrift_spec that converts an instance of the
+    thrift data type to the same primitive representation that the serializer
+    created by create_serializer_class returns, without going through the
+    Django Rest Framework field machinery.
+    """
+    converters = []
+    for field in thrift_data_type.thrift_spec:
+        if field:
+            converters.append(
+                (field[2], _compile_field(field, enable_date_time_conversion)))
+
+    def to_representation(instance):
+        result = {}
+        for name, convert in converters:
+            value = getattr(instance, name)
+            result[name] = convert(value) if value is not None else None
+        return result
+    return to_representation
+
+
+def _compile_field(field, enable_date_time_conversion):
+    ttype = field[1]
+    if ttype == TType.STRING:
+        return str
+    elif ttype in (TType.I08, TType.I16, TType.I32, TType.I64):
+        if (field[3] is not None and isinstance(field[3], type) and
+                issubclass(field[3], enum.IntEnum)):
+            return _enum_name
+        if enable_date_time_conversion and field[2].lower().endswith("time"):
+            return UTCPosixTimestampDateTimeField().to_representation
+        return int
+    elif ttype == TType.BOOL:
+        return BooleanField().to_representation
+    elif ttype == TType.MAP:
+        return _map_representation
+    elif ttype == TType.LIST:
+        return _compile_list_field(field)
+    elif ttype == TType.STRUCT:
+        return _lazy_struct_representation(field[3][0])
+    else:
+        return _identity
+
+
+def _compile_list_field(field):
+    item_ttype = field[3][0]
+    item_type_info = field[3][1]
+    if (item_ttype == TType.I32 and
+            item_type_info is not None and
+            isinstance(item_type_info, type) and
+            issubclass(item_type_info, enum.IntEnum)):
+        convert_item = _enum_name
+    elif item_ttype == TType.STRUCT:
+        convert_item = _lazy_struct_representation(item_type_info[0])
+    elif item_ttype == TType.STRING:
+        convert_item = str
+    elif item_ttype in (TType.I08, TType.I16, TType.I32, TType.I64):
+        convert_item = int
+    elif item_ttype == TType.BOOL:
+        convert_item = BooleanField().to_representation
+    elif item_ttype == TType.MAP:
+        convert_item = _map_representation
+    else:
+        convert_item = _identity
+
+    def list_representation(value):
+        return [convert_item(item) if item is not None else None
+                for item in value]
+    return list_representation
+
+
+def _lazy_struct_representation(thrift_data_type):
+    # Resolved on first use since thrift structs can be recursive
+    def struct_representation(value):
+        return get_representation_function(thrift_data_type)(value)
+    return struct_representation
+
+
+def _enum_name(value):
+    return value.name
+
+
+def _map_representation(value):
+    return {str(key): val for key, val in value.items()}
+
+
+def _identity(value):
+    return value
+
+
 def process_field(field, enable_date_time_conversion, required=False, read_only=False, allow_null=False):
     """
     Used to process a thrift data type field
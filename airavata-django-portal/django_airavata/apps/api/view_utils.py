@@ -10,6 +10,7 @@ from django.conf import settings
 from django.http import Http404
 from django.http.request import QueryDict
 from rest_framework import mixins, pagination, permissions
+from rest_framework.exceptions import ParseError
 from rest_framework.response import Response
 from rest_framework.reverse import reverse
 from rest_framework.utils.urls import remove_query_param, replace_query_param
@@ -203,6 +204,62 @@ class APIResultPagination(pagination.LimitOffsetPagination):
             return self.request.build_absolute_uri()
 
 
+class UserStorageListingPagination(pagination.LimitOffsetPagination):
+    """
+    Limit/offset pagination, sorting and name prefix filtering of user storage
+    directory listings. The directories followed by the files are paginated,
+    and only if the limit query parameter is given.
+    """
+    default_limit = None
+    max_limit = 1000
+    ordering_query_param = 'ordering'
+    name_prefix_query_param = 'name-prefix'
+
+    def get_listdir_kwargs(self, request):
+        """Return keyword arguments for user_storage.listdir."""
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.offset = self.get_offset(request)
+        ordering = request.query_params.get(self.ordering_query_param)
+        if ordering and ordering.lstrip('-') not in user_storage.LISTING_ORDERING_KEYS:
+            raise ParseError(f"Invalid ordering '{ordering}', must be one of "
+                             f"{', '.join(user_storage.LISTING_ORDERING_KEYS)}")
+        kwargs = {
+            'name_prefix': request.query_params.get(self.name_prefix_query_param),
+            'ordering': ordering,
+        }
+        if self.limit is not None:
+            # Get one extra entry to know whether there is a next page
+            kwargs['offset'] = self.offset
+            kwargs['limit'] = self.limit + 1
+        return kwargs
+
+    def paginate_listing(self, directories, files):
+        """
+        Return tuple of the directories and files in the page and the
+        pagination fields for the response.
+        """
+        if self.limit is None:
+            return directories, files, {}
+        has_next_link = len(directories) + len(files) > self.limit
+        if has_next_link:
+            if len(files) > 0:
+                files = files[:-1]
+            else:
+                directories = directories[:-1]
+        return directories, files, OrderedDict([
+            ('next', self.get_next_link() if has_next_link else None),
+            ('previous', self.get_previous_link()),
+            ('limit', self.limit),
+            ('offset', self.offset)
+        ])
+
+    def get_next_link(self):
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(url, self.offset_query_param, self.offset + self.limit)
+
+
 def convert_utc_iso8601_to_date(iso8601_utc_string):
     # This is meant to convert a JavaScript `new Date().toJSON()` into a
     # datetime instance
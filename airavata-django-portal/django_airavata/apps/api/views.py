@@ -42,11 +42,11 @@ from rest_framework import mixins, pagination, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.exceptions import ParseError
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from django_airavata.apps.admin.models import UserDataArchiveEntry
+from django_airavata.apps.api.renderers import FastJSONRenderer
 from django_airavata.apps.api.view_utils import (
     APIBackedViewSet,
     APIResultIterator,
@@ -54,12 +54,15 @@ from django_airavata.apps.api.view_utils import (
     DataProductSharedDirPermission,
     GenericAPIBackedViewSet,
     IsInAdminsGroupPermission,
+    UserStorageListingPagination,
     UserStorageSharedDirPermission
 )
 from django_airavata.apps.auth import iam_admin_client
+from django_airavata.apps.auth import utils as auth_utils
 from django_airavata.apps.auth.models import EmailVerification
 
 from . import (
+    catalog_cache,
     exceptions,
     helpers,
     models,
@@ -116,6 +119,11 @@ class GroupViewSet(APIBackedViewSet):
         if len(group._removed_members) > 0:
             group_manager_client.removeUsersFromGroup(
                 self.authz_token, group._removed_members, group.id)
+        # Membership in the Admins groups determines is_gateway_admin, which
+        # is cached in the members' sessions
+        changed_members = set(group._added_members) | set(group._removed_members)
+        if len(changed_members) > 0:
+            auth_utils.invalidate_admin_group_attributes(*changed_members)
         if len(group._added_admins) > 0:
             group_manager_client.addGroupAdmins(
                 self.authz_token, group.id, group._added_admins)
@@ -334,47 +342,77 @@ class FullExperimentViewSet(mixins.RetrieveModelMixin,
         # TODO: move loading experiment and references to airavata_sdk?
         experimentModel = self.request.airavata_client.getExperiment(
             self.authz_token, lookup_value)
-        outputDataProducts = [
-            self.request.airavata_client.getDataProduct(self.authz_token,
-                                                        output.value)
+        output_dp_uris = [
+            output.value
             for output in experimentModel.experimentOutputs
             if (output.value and
                 output.value.startswith('airavata-dp') and
                 output.type in (DataType.URI,
                                 DataType.STDOUT,
                                 DataType.STDERR))]
-        outputDataProducts += [
-            self.request.airavata_client.getDataProduct(self.authz_token, dp)
+        output_dp_uris += [
+            dp
             for output in experimentModel.experimentOutputs
             if (output.value and
                 output.type == DataType.URI_COLLECTION)
             for dp in output.value.split(',')
             if output.value.startswith('airavata-dp')]
-        appInterfaceId = experimentModel.executionId
-        try:
-            applicationInterface = self.request.airavata_client \
-                .getApplicationInterface(self.authz_token, appInterfaceId)
-        except Exception as e:
-            log.warning(f"Failed to load app interface: {e}")
-            applicationInterface = None
-        exp_output_views = output_views.get_output_views(
-            self.request, experimentModel, applicationInterface)
-        inputDataProducts = [
-            self.request.airavata_client.getDataProduct(self.authz_token,
-                                                        inp.value)
+        input_dp_uris = [
+            inp.value
             for inp in experimentModel.experimentInputs
             if (inp.value and
                 inp.value.startswith('airavata-dp') and
                 inp.type in (DataType.URI,
                              DataType.STDOUT,
                              DataType.STDERR))]
-        inputDataProducts += [
-            self.request.airavata_client.getDataProduct(self.authz_token, dp)
+        input_dp_uris += [
+            dp
             for inp in experimentModel.experimentInputs
             if (inp.value and
                 inp.type == DataType.URI_COLLECTION)
             for dp in inp.value.split(',')
             if inp.value.startswith('airavata-dp')]
+        appInterfaceId = experimentModel.executionId
+        compute_resource_id = None
+        user_conf = experimentModel.userConfigurationData
+        if user_conf and user_conf.computationalResourceScheduling:
+            comp_res_sched = user_conf.computationalResourceScheduling
+            compute_resource_id = comp_res_sched.resourceHostId
+
+        # The remaining calls only depend on the experiment, so make them
+        # concurrently. The project is loaded after the access check below.
+        calls = {
+            'outputDataProducts': [('getDataProduct', (self.authz_token, uri))
+                                   for uri in output_dp_uris],
+            'inputDataProducts': [('getDataProduct', (self.authz_token, uri))
+                                  for uri in input_dp_uris],
+            'applicationInterface': [('getApplicationInterface',
+                                      (self.authz_token, appInterfaceId))],
+            'computeResource': [('getComputeResource',
+                                 (self.authz_token, compute_resource_id))]
+            if compute_resource_id else [],
+            'projectAccess': [('userHasAccess',
+                               (self.authz_token,
+                                experimentModel.projectId,
+                                ResourcePermissionType.READ))],
+            'jobDetails': [('getJobDetails', (self.authz_token, lookup_value))],
+        }
+        all_futures = iter(helpers.call_concurrently(
+            self.request, [c for name_calls in calls.values()
+                           for c in name_calls]))
+        futures = {name: [next(all_futures) for _ in name_calls]
+                   for name, name_calls in calls.items()}
+
+        outputDataProducts = [f.result()
+                              for f in futures['outputDataProducts']]
+        inputDataProducts = [f.result() for f in futures['inputDataProducts']]
+        try:
+            applicationInterface = futures['applicationInterface'][0].result()
+        except Exception as e:
+            log.warning(f"Failed to load app interface: {e}")
+            applicationInterface = None
+        exp_output_views = output_views.get_output_views(
+            self.request, experimentModel, applicationInterface)
         applicationModule = None
         try:
             if applicationInterface is not None:
@@ -387,30 +425,20 @@ class FullExperimentViewSet(mixins.RetrieveModelMixin,
         except Exception:
             log.exception("Failed to load app interface/module", extra={'request': self.request})
 
-        compute_resource_id = None
-        user_conf = experimentModel.userConfigurationData
-        if user_conf and user_conf.computationalResourceScheduling:
-            comp_res_sched = user_conf.computationalResourceScheduling
-            compute_resource_id = comp_res_sched.resourceHostId
         try:
-            compute_resource = self.request.airavata_client.getComputeResource(
-                self.authz_token, compute_resource_id) \
+            compute_resource = futures['computeResource'][0].result() \
                 if compute_resource_id else None
         except Exception:
             log.exception("Failed to load compute resource for {}".format(
                 compute_resource_id), extra={'request': self.request})
             compute_resource = None
-        if self.request.airavata_client.userHasAccess(
-                self.authz_token,
-                experimentModel.projectId,
-                ResourcePermissionType.READ):
+        if futures['projectAccess'][0].result():
             project = self.request.airavata_client.getProject(
                 self.authz_token, experimentModel.projectId)
         else:
             # User may not have access to project, only experiment
             project = None
-        job_details = self.request.airavata_client.getJobDetails(
-            self.authz_token, lookup_value)
+        job_details = futures['jobDetails'][0].result()
         full_experiment = serializers.FullExperiment(
             experimentModel,
             project=project,
@@ -440,26 +468,23 @@ class ApplicationModuleViewSet(APIBackedViewSet):
         app_module_id = self.request.airavata_client.registerApplicationModule(
             self.authz_token, self.gateway_id, app_module)
         app_module.appModuleId = app_module_id
+        catalog_cache.invalidate_app_modules()
 
     def perform_update(self, serializer):
         app_module = serializer.save()
         self.request.airavata_client.updateApplicationModule(
             self.authz_token, app_module.appModuleId, app_module)
+        catalog_cache.invalidate_app_modules()
 
     def perform_destroy(self, instance):
         self.request.airavata_client.deleteApplicationModule(
             self.authz_token, instance.appModuleId)
+        catalog_cache.invalidate_app_modules()
 
     @action(detail=True)
     def application_interface(self, request, app_module_id):
-        all_app_interfaces = request.airavata_client.getAllApplicationInterfaces(
-            self.authz_token, self.gateway_id)
-        app_interfaces = []
-        for app_interface in all_app_interfaces:
-            if not app_interface.applicationModules:
-                continue
-            if app_module_id in app_interface.applicationModules:
-                app_interfaces.append(app_interface)
+        app_interfaces = catalog_cache.get_application_interfaces_for_module(
+            request, app_module_id)
         if len(app_interfaces) == 1:
             serializer = serializers.ApplicationInterfaceDescriptionSerializer(
                 app_interfaces[0], context={'request': request})
@@ -478,10 +503,8 @@ class ApplicationModuleViewSet(APIBackedViewSet):
 
     @action(detail=True)
     def application_deployments(self, request, app_module_id):
-        all_deployments = self.request.airavata_client.getAllApplicationDeployments(
-            self.authz_token, self.gateway_id)
-        app_deployments = [
-            dep for dep in all_deployments if dep.appModuleId == app_module_id]
+        app_deployments = catalog_cache.get_application_deployments_for_module(
+            request, app_module_id)
         serializer = serializers.ApplicationDeploymentDescriptionSerializer(
             app_deployments, many=True, context={'request': request})
         return Response(serializer.data)
@@ -524,8 +547,7 @@ class ApplicationModuleViewSet(APIBackedViewSet):
 
     @action(detail=False)
     def list_all(self, request, format=None):
-        all_modules = self.request.airavata_client.getAllAppModules(
-            self.authz_token, self.gateway_id)
+        all_modules = catalog_cache.get_all_app_modules(request)
         serializer = self.serializer_class(
             all_modules, many=True, context={'request': request})
         return Response(serializer.data)
@@ -536,8 +558,7 @@ class ApplicationInterfaceViewSet(APIBackedViewSet):
     lookup_field = 'app_interface_id'
 
     def get_list(self):
-        return self.request.airavata_client.getAllApplicationInterfaces(
-            self.authz_token, self.gateway_id)
+        return catalog_cache.get_all_application_interfaces(self.request)
 
     def get_instance(self, lookup_value):
         try:
@@ -545,8 +566,8 @@ class ApplicationInterfaceViewSet(APIBackedViewSet):
                 self.authz_token, lookup_value)
         except Exception:
             # If it failed to load, check to see if it exists at all
-            all_interfaces = self.request.airavata_client.getAllApplicationInterfaces(
-                self.authz_token, self.gateway_id)
+            all_interfaces = catalog_cache.get_all_application_interfaces(
+                self.request)
             interface_ids = map(lambda i: i.applicationInterfaceId, all_interfaces)
             if lookup_value not in interface_ids:
                 raise Http404("Application interface does not exist")
@@ -560,6 +581,7 @@ class ApplicationInterfaceViewSet(APIBackedViewSet):
         app_interface_id = self.request.airavata_client.registerApplicationInterface(
             self.authz_token, self.gateway_id, application_interface)
         application_interface.applicationInterfaceId = app_interface_id
+        catalog_cache.invalidate_app_interfaces()
 
     def perform_update(self, serializer):
         application_interface = serializer.save()
@@ -568,10 +590,12 @@ class ApplicationInterfaceViewSet(APIBackedViewSet):
             self.authz_token,
             application_interface.applicationInterfaceId,
             application_interface)
+        catalog_cache.invalidate_app_interfaces()
 
     def perform_destroy(self, instance):
         self.request.airavata_client.deleteApplicationInterface(
             self.authz_token, instance.applicationInterfaceId)
+        catalog_cache.invalidate_app_interfaces()
 
     def _update_input_metadata(self, app_interface):
         for app_input in app_interface.applicationInputs:
@@ -623,15 +647,18 @@ class ApplicationDeploymentViewSet(APIBackedViewSet):
         app_deployment_id = self.request.airavata_client.registerApplicationDeployment(
             self.authz_token, self.gateway_id, application_deployment)
         application_deployment.appDeploymentId = app_deployment_id
+        catalog_cache.invalidate_app_deployments()
 
     def perform_update(self, serializer):
         application_deployment = serializer.save()
         self.request.airavata_client.updateApplicationDeployment(
             self.authz_token, application_deployment.appDeploymentId, application_deployment)
+        catalog_cache.invalidate_app_deployments()
 
     def perform_destroy(self, instance):
         self.request.airavata_client.deleteApplicationDeployment(
             self.authz_token, instance.appDeploymentId)
+        catalog_cache.invalidate_app_deployments()
 
     @action(detail=True)
     def queues(self, request, app_deployment_id):
@@ -669,15 +696,12 @@ class ComputeResourceViewSet(mixins.RetrieveModelMixin,
     @action(detail=False)
     def all_names(self, request, format=None):
         """Return a map of compute resource names keyed by resource id."""
-        return Response(
-            request.airavata_client.getAllComputeResourceNames(
-                request.authz_token))
+        return Response(catalog_cache.get_all_compute_resource_names(request))
 
     @action(detail=False)
     def all_names_list(self, request, format=None):
         """Return a list of compute resource names keyed by resource id."""
-        all_names = request.airavata_client.getAllComputeResourceNames(
-            request.authz_token)
+        all_names = catalog_cache.get_all_compute_resource_names(request)
         return Response([
             {
                 'host_id': host_id,
@@ -699,7 +723,7 @@ class ComputeResourceViewSet(mixins.RetrieveModelMixin,
 
 
 class LocalJobSubmissionView(APIView):
-    renderer_classes = (JSONRenderer,)
+    renderer_classes = (FastJSONRenderer,)
 
     def get(self, request, format=None):
         job_submission_id = request.query_params["id"]
@@ -712,7 +736,7 @@ class LocalJobSubmissionView(APIView):
 
 
 class CloudJobSubmissionView(APIView):
-    renderer_classes = (JSONRenderer,)
+    renderer_classes = (FastJSONRenderer,)
 
     def get(self, request, format=None):
         job_submission_id = request.query_params["id"]
@@ -725,7 +749,7 @@ class CloudJobSubmissionView(APIView):
 
 
 class GlobusJobSubmissionView(APIView):
-    renderer_classes = (JSONRenderer,)
+    renderer_classes = (FastJSONRenderer,)
 
     def get(self, request, format=None):
         job_submission_id = request.query_params["id"]
@@ -738,7 +762,7 @@ class GlobusJobSubmissionView(APIView):
 
 
 class SshJobSubmissionView(APIView):
-    renderer_classes = (JSONRenderer,)
+    renderer_classes = (FastJSONRenderer,)
 
     def get(self, request, format=None):
         job_submission_id = request.query_params["id"]
@@ -751,7 +775,7 @@ class SshJobSubmissionView(APIView):
 
 
 class UnicoreJobSubmissionView(APIView):
-    renderer_classes = (JSONRenderer,)
+    renderer_classes = (FastJSONRenderer,)
 
     def get(self, request, format=None):
         job_submission_id = request.query_params["id"]
@@ -764,7 +788,7 @@ class UnicoreJobSubmissionView(APIView):
 
 
 class GridFtpDataMovementView(APIView):
-    renderer_classes = (JSONRenderer,)
+    renderer_classes = (FastJSONRenderer,)
 
     def get(self, request, format=None):
         data_movement_id = request.query_params["id"]
@@ -777,7 +801,7 @@ class GridFtpDataMovementView(APIView):
 
 
 class ScpDataMovementView(APIView):
-    renderer_classes = (JSONRenderer,)
+    renderer_classes = (FastJSONRenderer,)
 
     def get(self, request, format=None):
         data_movement_id = request.query_params["id"]
@@ -790,7 +814,7 @@ class ScpDataMovementView(APIView):
 
 
 class UnicoreDataMovementView(APIView):
-    renderer_classes = (JSONRenderer,)
+    renderer_classes = (FastJSONRenderer,)
 
     def get(self, request, format=None):
         data_movement_id = request.query_params["id"]
@@ -803,7 +827,7 @@ class UnicoreDataMovementView(APIView):
 
 
 class LocalDataMovementView(APIView):
-    renderer_classes = (JSONRenderer,)
+    renderer_classes = (FastJSONRenderer,)
 
     def get(self, request, format=None):
         data_movement_id = request.query_params["id"]
@@ -1104,6 +1128,8 @@ class SharedEntityViewSet(mixins.RetrieveModelMixin,
             self._revoke_from_groups(
                 entity_id, ResourcePermissionType.MANAGE_SHARING,
                 shared_entity['_group_revoke_manage_sharing_permission'])
+        # Deployments are cached per user, filtered by sharing permissions
+        catalog_cache.invalidate_app_deployments()
 
     def _share_with_users(self, entity_id, permission_type, user_ids):
         self.request.airavata_client.shareResourceWithUsers(
@@ -1316,9 +1342,7 @@ class StorageResourceViewSet(mixins.RetrieveModelMixin,
     @action(detail=False)
     def all_names(self, request, format=None):
         """Return a map of compute resource names keyed by resource id."""
-        return Response(
-            request.airavata_client.getAllStorageResourceNames(
-                request.authz_token))
+        return Response(catalog_cache.get_all_storage_resource_names(request))
 
 
 class StoragePreferenceViewSet(APIBackedViewSet):
@@ -1449,11 +1473,15 @@ class UserStoragePathView(APIView):
 
     def _create_response(self, request, path, uploaded=None, experiment_id=None):
         if user_storage.dir_exists(request, path, experiment_id=experiment_id):
-            directories, files = user_storage.listdir(request, path, experiment_id=experiment_id)
+            paginator = UserStorageListingPagination()
+            directories, files = user_storage.listdir(request, path, experiment_id=experiment_id,
+                                                      **paginator.get_listdir_kwargs(request))
+            directories, files, pagination_data = paginator.paginate_listing(directories, files)
             data = {
                 'isDir': True,
                 'directories': directories,
-                'files': files
+                'files': files,
+                **pagination_data
             }
             if uploaded is not None:
                 data['uploaded'] = uploaded
@@ -1495,7 +1523,10 @@ class ExperimentStoragePathView(APIView):
 
     def _create_response(self, request, experiment_id, path):
         if user_storage.experiment_dir_exists(request, experiment_id, path):
-            directories, files = user_storage.list_experiment_dir(request, experiment_id, path)
+            paginator = UserStorageListingPagination()
+            directories, files = user_storage.list_experiment_dir(request, experiment_id, path,
+                                                                  **paginator.get_listdir_kwargs(request))
+            directories, files, pagination_data = paginator.paginate_listing(directories, files)
 
             def add_expid(d):
                 d['experiment_id'] = experiment_id
@@ -1503,7 +1534,8 @@ class ExperimentStoragePathView(APIView):
             data = {
                 'isDir': True,
                 'directories': map(add_expid, directories),
-                'files': map(add_expid, files)
+                'files': map(add_expid, files),
+                **pagination_data
             }
             data['parts'] = self._split_path(path)
             serializer = self.serializer_class(
@@ -1548,12 +1580,14 @@ class ManageNotificationViewSet(APIBackedViewSet):
     def perform_destroy(self, instance):
         self.request.airavata_client.deleteNotification(
             self.authz_token, settings.GATEWAY_ID, instance.notificationId)
+        catalog_cache.invalidate_notifications()
 
     def perform_create(self, serializer):
         notification = serializer.save(gatewayId=self.gateway_id)
         notificationId = self.request.airavata_client.createNotification(
             self.authz_token, notification)
         notification.notificationId = notificationId
+        catalog_cache.invalidate_notifications()
 
         serializer.update_notification_extension(self.request, notification)
 
@@ -1561,6 +1595,7 @@ class ManageNotificationViewSet(APIBackedViewSet):
         notification = serializer.save()
         self.request.airavata_client.updateNotification(
             self.authz_token, notification)
+        catalog_cache.invalidate_notifications()
 
         serializer.update_notification_extension(self.request, notification)
 
@@ -1632,6 +1667,9 @@ class IAMUserViewSet(mixins.RetrieveModelMixin,
         for group_id in managed_user_profile['_removed_group_ids']:
             group_manager_client.removeUsersFromGroup(
                 self.authz_token, [user_id], group_id)
+        if (len(managed_user_profile['_added_group_ids']) > 0 or
+                len(managed_user_profile['_removed_group_ids']) > 0):
+            auth_utils.invalidate_admin_group_attributes(user_id)
 
     def perform_destroy(self, instance):
         iam_admin_client.delete_user(instance['userId'])
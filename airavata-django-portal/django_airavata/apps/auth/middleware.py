@@ -1,6 +1,8 @@
 """Django Airavata Auth Middleware."""
 import copy
 import logging
+import threading
+import time
 
 from django.conf import settings
 from django.contrib.auth import logout
@@ -11,6 +13,10 @@ from . import utils
 
 log = logging.getLogger(__name__)
 
+ADMIN_GROUP_ATTRIBUTES_SESSION_KEY = 'ADMIN_GROUP_ATTRIBUTES'
+_admin_group_attributes_cache_stats = {'hits': 0, 'misses': 0}
+_admin_group_attributes_cache_stats_lock = threading.Lock()
+
 
 def authz_token_middleware(get_response):
     """Automatically add the 'authz_token' to the request."""
@@ -31,8 +37,26 @@ def authz_token_middleware(get_response):
     return middleware
 
 
-def set_admin_group_attributes(request, gateway_groups=None):
-    """Set is_gateway_admin and is_read_only_gateway_admin request attrs."""
+def set_admin_group_attributes(request, gateway_groups=None, use_session_cache=False):
+    """Set is_gateway_admin and is_read_only_gateway_admin request attrs.
+
+    If use_session_cache is True, the attributes are cached in the session for
+    ADMIN_GROUP_ATTRIBUTES_CACHE_TTL seconds, or until
+    utils.invalidate_admin_group_attributes is called for the user.
+    """
+    airavata_internal_user_id = request.user.username + "@" + settings.GATEWAY_ID
+    if use_session_cache:
+        cached = request.session.get(ADMIN_GROUP_ATTRIBUTES_SESSION_KEY)
+        version = utils.get_admin_group_attributes_version(airavata_internal_user_id)
+        if (cached is not None and
+                cached['user_id'] == airavata_internal_user_id and
+                cached['version'] == version and
+                cached['expires_at'] > time.time()):
+            _count_admin_group_attributes_cache('hits')
+            request.is_gateway_admin = cached['is_gateway_admin']
+            request.is_read_only_gateway_admin = cached['is_read_only_gateway_admin']
+            return
+        _count_admin_group_attributes_cache('misses')
     if gateway_groups is None:
         gateway_groups = request.airavata_client.getGatewayGroups(request.authz_token)
         gateway_groups = copy.deepcopy(gateway_groups.__dict__)
@@ -40,10 +64,32 @@ def set_admin_group_attributes(request, gateway_groups=None):
     read_only_admins_group_id = gateway_groups['readOnlyAdminsGroupId']
     group_manager_client = request.profile_service['group_manager']
     group_memberships = group_manager_client.getAllGroupsUserBelongs(
-        request.authz_token, request.user.username + "@" + settings.GATEWAY_ID)
+        request.authz_token, airavata_internal_user_id)
     group_ids = [group.id for group in group_memberships]
     request.is_gateway_admin = admins_group_id in group_ids
     request.is_read_only_gateway_admin = read_only_admins_group_id in group_ids
+    if use_session_cache:
+        ttl = getattr(settings, 'ADMIN_GROUP_ATTRIBUTES_CACHE_TTL', 60)
+        request.session[ADMIN_GROUP_ATTRIBUTES_SESSION_KEY] = {
+            'user_id': airavata_internal_user_id,
+            'version': version,
+            'expires_at': time.time() + ttl,
+            'is_gateway_admin': request.is_gateway_admin,
+            'is_read_only_gateway_admin': request.is_read_only_gateway_admin,
+        }
+
+
+def _count_admin_group_attributes_cache(name):
+    with _admin_group_attributes_cache_stats_lock:
+        _admin_group_attributes_cache_stats[name] += 1
+        stats = dict(_admin_group_attributes_cache_stats)
+    log.debug(f"Admin group attributes cache {name}: {stats}")
+
+
+def get_admin_group_attributes_cache_stats():
+    """Return counts of session cache hits and misses in this process."""
+    with _admin_group_attributes_cache_stats_lock:
+        return dict(_admin_group_attributes_cache_stats)
 
 
 def gateway_groups_middleware(get_response):
@@ -67,7 +113,9 @@ def gateway_groups_middleware(get_response):
                     request.authz_token)
                 gateway_groups_dict = copy.deepcopy(gateway_groups.__dict__)
                 request.session['GATEWAY_GROUPS'] = gateway_groups_dict
-            set_admin_group_attributes(request, gateway_groups=request.session.get("GATEWAY_GROUPS"))
+            set_admin_group_attributes(request,
+                                       gateway_groups=request.session.get("GATEWAY_GROUPS"),
+                                       use_session_cache=True)
             # Gateway Admins are made 'superuser' in Django so they can edit
             # pages in the CMS
             if request.is_gateway_admin and (
@@ -113,15 +113,27 @@ class UserProfile(models.Model):
 
     @property
     def is_ext_user_profile_valid(self):
-        fields = ExtendedUserProfileField.objects.filter(deleted=False)
-        for field in fields:
-            try:
-                value = self.extended_profile_values.filter(ext_user_profile_field=field).get()
-                if not value.valid:
-                    return False
-            except ExtendedUserProfileValue.DoesNotExist:
-                if field.required:
+        # Load all fields and values, with everything needed to validate them,
+        # up front so that the number of queries doesn't grow with the number
+        # of fields
+        fields = ExtendedUserProfileField.objects.filter(deleted=False).values_list('id', 'required')
+        values = (self.extended_profile_values
+                  .filter(ext_user_profile_field__deleted=False)
+                  .select_related('ext_user_profile_field__single_choice',
+                                  'ext_user_profile_field__multi_choice',
+                                  'text', 'single_choice', 'multi_choice',
+                                  'user_agreement')
+                  .prefetch_related('ext_user_profile_field__single_choice__choices',
+                                    'ext_user_profile_field__multi_choice__choices',
+                                    'multi_choice__choices'))
+        values_by_field_id = {value.ext_user_profile_field_id: value for value in values}
+        for field_id, required in fields:
+            value = values_by_field_id.get(field_id)
+            if value is None:
+                if required:
                     return False
+            elif not value.valid:
+                return False
         return True
 
     def is_non_empty(self, value: str):
@@ -331,16 +343,18 @@ class ExtendedUserProfileValue(models.Model):
             if self.value_type == 'text':
                 return self.text.text_value and len(self.text.text_value.strip()) > 0
             if self.value_type == 'single_choice':
+                # Iterate over choices with .all() so prefetched choices are used
                 choice_exists = (self.single_choice.choice and
-                                 self.ext_user_profile_field.single_choice.choices
-                                 .filter(id=self.single_choice.choice).exists())
+                                 any(choice.id == self.single_choice.choice
+                                     for choice in self.ext_user_profile_field.single_choice.choices.all()))
                 has_other = (self.ext_user_profile_field.single_choice.other and
                              self.single_choice.other_value and
                              len(self.single_choice.other_value.strip()) > 0)
                 return choice_exists or has_other
             if self.value_type == 'multi_choice':
-                choice_ids = list(map(lambda c: c.value, self.multi_choice.choices.all()))
-                choice_exists = self.ext_user_profile_field.multi_choice.choices.filter(id__in=choice_ids).exists()
+                choice_ids = set(map(lambda c: c.value, self.multi_choice.choices.all()))
+                choice_exists = any(choice.id in choice_ids
+                                    for choice in self.ext_user_profile_field.multi_choice.choices.all())
                 has_other = (self.ext_user_profile_field.multi_choice.other and
                              self.multi_choice.other_value and
                              len(self.multi_choice.other_value.strip()) > 0)
@@ -1,14 +1,18 @@
 
 from unittest.mock import MagicMock, sentinel
 
+from airavata.model.group.ttypes import GroupModel
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
 from django.http import HttpResponseRedirect
-from django.test import RequestFactory, TestCase
+from django.test import RequestFactory, TestCase, override_settings
 from django.urls import reverse
 
-from django_airavata.apps.auth import models
+from django_airavata.apps.auth import models, utils
 from django_airavata.apps.auth.middleware import (
+    gateway_groups_middleware,
+    get_admin_group_attributes_cache_stats,
     user_profile_completeness_check
 )
 
@@ -121,3 +125,70 @@ class UserProfileCompletenessCheckTestCase(TestCase):
         self.assertTrue(request.user.is_authenticated)
         self.assertFalse(self.user_profile.is_complete)
         self._middleware_passes_through(request)
+
+
+@override_settings(GATEWAY_ID="test-gateway")
+class GatewayGroupsMiddlewareTestCase(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(
+            "testuser", email="testuser@example.com",
+            first_name="Test", last_name="User")
+        models.UserProfile.objects.create(user=self.user)
+        self.factory = RequestFactory()
+        self.session = {
+            'GATEWAY_GROUPS': {
+                'adminsGroupId': "admins",
+                'readOnlyAdminsGroupId': "read-only-admins",
+                'defaultGatewayUsersGroupId': "gateway-users",
+            }
+        }
+        self.group_manager = MagicMock(name="group_manager")
+        self.group_manager.getAllGroupsUserBelongs.return_value = [
+            GroupModel(id="read-only-admins"), GroupModel(id="gateway-users")]
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def _call_middleware(self):
+        request = self.factory.get(reverse('django_airavata_workspace:dashboard'))
+        request.user = self.user
+        request.authz_token = sentinel.authz_token
+        request.session = self.session
+        request.profile_service = {'group_manager': self.group_manager}
+        get_response = MagicMock(return_value=sentinel.response)
+        response = gateway_groups_middleware(get_response)(request)
+        self.assertIs(response, sentinel.response)
+        return request
+
+    def test_admin_group_attributes_are_cached_in_session(self):
+        stats = get_admin_group_attributes_cache_stats()
+        request = self._call_middleware()
+        self.assertFalse(request.is_gateway_admin)
+        self.assertTrue(request.is_read_only_gateway_admin)
+        request = self._call_middleware()
+        self.assertFalse(request.is_gateway_admin)
+        self.assertTrue(request.is_read_only_gateway_admin)
+        self.group_manager.getAllGroupsUserBelongs.assert_called_once_with(
+            sentinel.authz_token, "testuser@test-gateway")
+        new_stats = get_admin_group_attributes_cache_stats()
+        self.assertEqual(stats['hits'] + 1, new_stats['hits'])
+        self.assertEqual(stats['misses'] + 1, new_stats['misses'])
+
+    def test_admin_group_attributes_cache_invalidated(self):
+        self._call_middleware()
+        self.group_manager.getAllGroupsUserBelongs.return_value = [
+            GroupModel(id="admins"), GroupModel(id="gateway-users")]
+        utils.invalidate_admin_group_attributes("testuser@test-gateway")
+        request = self._call_middleware()
+        self.assertTrue(request.is_gateway_admin)
+        self.assertFalse(request.is_read_only_gateway_admin)
+        self.assertEqual(
+            2, self.group_manager.getAllGroupsUserBelongs.call_count)
+
+    @override_settings(ADMIN_GROUP_ATTRIBUTES_CACHE_TTL=-1)
+    def test_admin_group_attributes_cache_expired(self):
+        self._call_middleware()
+        self._call_middleware()
+        self.assertEqual(
+            2, self.group_manager.getAllGroupsUserBelongs.call_count)
@@ -1,5 +1,7 @@
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from django_airavata.apps.auth import models
 
@@ -381,3 +383,41 @@ class UserProfileTestCase(TestCase):
         field3.save()
         self.assertTrue(value3.valid)
         self.assertTrue(self.user_profile.is_ext_user_profile_valid)
+
+    def _create_valid_fields_and_values(self, count):
+        for i in range(count):
+            text_field = models.ExtendedUserProfileTextField.objects.create(
+                name=f"text{i}", order=i, required=True)
+            models.ExtendedUserProfileTextValue.objects.create(
+                ext_user_profile_field=text_field,
+                user_profile=self.user_profile, text_value="Answer")
+            single_choice_field = models.ExtendedUserProfileSingleChoiceField.objects.create(
+                name=f"single{i}", order=i, required=True)
+            choice = single_choice_field.choices.create(
+                display_text="Choice", order=1)
+            models.ExtendedUserProfileSingleChoiceValue.objects.create(
+                ext_user_profile_field=single_choice_field,
+                user_profile=self.user_profile, choice=choice.id)
+            multi_choice_field = models.ExtendedUserProfileMultiChoiceField.objects.create(
+                name=f"multi{i}", order=i, required=True)
+            choice = multi_choice_field.choices.create(
+                display_text="Choice", order=1)
+            multi_choice_value = models.ExtendedUserProfileMultiChoiceValue.objects.create(
+                ext_user_profile_field=multi_choice_field,
+                user_profile=self.user_profile)
+            multi_choice_value.choices.create(value=choice.id)
+            agreement_field = models.ExtendedUserProfileAgreementField.objects.create(
+                name=f"agreement{i}", order=i, required=True)
+            models.ExtendedUserProfileAgreementValue.objects.create(
+                ext_user_profile_field=agreement_field,
+                user_profile=self.user_profile, agreement_value=True)
+
+    def test_is_ext_user_profile_valid_number_of_queries_is_constant(self):
+        self._create_valid_fields_and_values(1)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(self.user_profile.is_ext_user_profile_valid)
+        query_count = len(queries)
+
+        self._create_valid_fields_and_values(10)
+        with self.assertNumQueries(query_count):
+            self.assertTrue(self.user_profile.is_ext_user_profile_valid)
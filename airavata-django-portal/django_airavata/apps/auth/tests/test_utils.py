@@ -0,0 +1,92 @@
+import threading
+import time
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from django_airavata.apps.auth import utils
+
+
+@override_settings(
+    GATEWAY_ID="test-gateway",
+    KEYCLOAK_CLIENT_ID="client-id",
+    KEYCLOAK_CLIENT_SECRET="client-secret",
+    KEYCLOAK_TOKEN_URL="https://keycloak.example.org/token",
+    KEYCLOAK_VERIFY_SSL=True,
+    SERVICE_ACCOUNT_TOKEN_REFRESH_MARGIN=30)
+class ServiceAccountAuthzTokenTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        utils._service_account_token = None
+        self.addCleanup(setattr, utils, '_service_account_token', None)
+        self.addCleanup(cache.clear)
+        patcher = patch('django_airavata.apps.auth.utils.OAuth2Session')
+        self.oauth_session = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.fetch_token = self.oauth_session.return_value.fetch_token
+        self.fetch_token.side_effect = self._fetch_token
+        self.fetch_count = 0
+        self.expires_in = 300
+
+    def _fetch_token(self, **kwargs):
+        self.fetch_count += 1
+        return {'access_token': f"access-token-{self.fetch_count}",
+                'expires_in': self.expires_in}
+
+    def test_token_is_cached(self):
+        authz_token = utils.get_service_account_authz_token()
+        self.assertEqual("access-token-1", authz_token.accessToken)
+        self.assertEqual({'gatewayID': "test-gateway"}, authz_token.claimsMap)
+        authz_token = utils.get_service_account_authz_token()
+        self.assertEqual("access-token-1", authz_token.accessToken)
+        self.fetch_token.assert_called_once()
+
+    def test_token_is_shared_through_django_cache(self):
+        utils.get_service_account_authz_token()
+        # Simulate another worker process with an empty in process cache
+        utils._service_account_token = None
+        authz_token = utils.get_service_account_authz_token()
+        self.assertEqual("access-token-1", authz_token.accessToken)
+        self.fetch_token.assert_called_once()
+
+    def test_token_is_refreshed_before_expiration(self):
+        utils.get_service_account_authz_token()
+        now = time.time()
+        with patch('django_airavata.apps.auth.utils.time.time',
+                   return_value=now + 300 - 29):
+            authz_token = utils.get_service_account_authz_token()
+        self.assertEqual("access-token-2", authz_token.accessToken)
+        self.assertEqual(2, self.fetch_token.call_count)
+
+    def test_token_without_expires_in_is_not_cached(self):
+        self.expires_in = None
+        utils.get_service_account_authz_token()
+        authz_token = utils.get_service_account_authz_token()
+        self.assertEqual("access-token-2", authz_token.accessToken)
+
+    def test_concurrent_refresh_fetches_once(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_fetch_token(**kwargs):
+            started.set()
+            release.wait(5)
+            return self._fetch_token(**kwargs)
+        self.fetch_token.side_effect = slow_fetch_token
+
+        access_tokens = []
+
+        def get_token():
+            access_tokens.append(
+                utils.get_service_account_authz_token().accessToken)
+        threads = [threading.Thread(target=get_token) for _ in range(5)]
+        for t in threads:
+            t.start()
+        started.wait(5)
+        release.set()
+        for t in threads:
+            t.join(5)
+        self.assertEqual(["access-token-1"] * 5, access_tokens)
+        self.fetch_token.assert_called_once()
@@ -1,10 +1,14 @@
 """Auth utilities."""
 
+import logging
+import threading
 import time
+import uuid
 
 from airavata.model.security.ttypes import AuthzToken
 from django.conf import settings
 from django.contrib.auth import authenticate
+from django.core.cache import cache
 from django.core.mail import EmailMessage
 from django.http.request import split_domain_port
 from django.template import Context, Template
@@ -13,6 +17,14 @@ from requests_oauthlib import OAuth2Session
 
 from . import models
 
+logger = logging.getLogger(__name__)
+
+# In process copy of the service account token, a dict with 'access_token'
+# and 'expires_at' keys. Also stored in the Django cache so that worker
+# processes can share it.
+_service_account_token = None
+_service_account_token_lock = threading.Lock()
+
 
 def get_authz_token(request, user=None, access_token=None):
     """Construct AuthzToken instance from session; refresh token if needed."""
@@ -31,6 +43,53 @@ def get_authz_token(request, user=None, access_token=None):
 
 
 def get_service_account_authz_token():
+    """Return AuthzToken for the portal's service account.
+
+    The access token is cached in process and in the Django cache and is
+    refreshed SERVICE_ACCOUNT_TOKEN_REFRESH_MARGIN seconds before it expires.
+    Only one thread per process fetches a new token at a time.
+    """
+    access_token = _get_service_account_access_token()
+    return AuthzToken(
+        accessToken=access_token,
+        # This is a service account, so leaving out userName for now
+        claimsMap={'gatewayID': settings.GATEWAY_ID})
+
+
+def _get_service_account_access_token():
+    global _service_account_token
+    token = _service_account_token
+    if _is_service_account_token_fresh(token):
+        return token['access_token']
+    with _service_account_token_lock:
+        # Another thread may have refreshed the token while this one waited
+        token = _service_account_token
+        if _is_service_account_token_fresh(token):
+            return token['access_token']
+        cache_key = _get_service_account_token_cache_key()
+        token = cache.get(cache_key)
+        if not _is_service_account_token_fresh(token):
+            token = _fetch_service_account_token()
+            timeout = int(token['expires_at'] - time.time())
+            if timeout > 0:
+                cache.set(cache_key, token, timeout)
+        _service_account_token = token
+        return token['access_token']
+
+
+def _is_service_account_token_fresh(token):
+    if token is None:
+        return False
+    margin = getattr(settings, 'SERVICE_ACCOUNT_TOKEN_REFRESH_MARGIN', 30)
+    return token['expires_at'] - margin > time.time()
+
+
+def _get_service_account_token_cache_key():
+    return (f"django_airavata_auth:service_account_token:"
+            f"{settings.KEYCLOAK_TOKEN_URL}:{settings.KEYCLOAK_CLIENT_ID}")
+
+
+def _fetch_service_account_token():
     client_id = settings.KEYCLOAK_CLIENT_ID
     client_secret = settings.KEYCLOAK_CLIENT_SECRET
     token_url = settings.KEYCLOAK_TOKEN_URL
@@ -46,12 +105,40 @@ def get_service_account_authz_token():
         client_id=client_id,
         client_secret=client_secret,
         verify=verify)
+    logger.debug("Fetched new service account token")
 
-    access_token = token.get('access_token')
-    return AuthzToken(
-        accessToken=access_token,
-        # This is a service account, so leaving out userName for now
-        claimsMap={'gatewayID': settings.GATEWAY_ID})
+    # Without an expires_in the token is used once and not cached
+    expires_in = token.get('expires_in')
+    expires_at = time.time() + float(expires_in) if expires_in else 0
+    return {
+        'access_token': token.get('access_token'),
+        'expires_at': expires_at,
+    }
+
+
+def _get_admin_group_attributes_version_cache_key(airavata_internal_user_id):
+    return (f"django_airavata_auth:admin_group_attributes_version:"
+            f"{airavata_internal_user_id}")
+
+
+def get_admin_group_attributes_version(airavata_internal_user_id):
+    """Return version of user's cached is_gateway_admin attributes, if any."""
+    return cache.get(_get_admin_group_attributes_version_cache_key(
+        airavata_internal_user_id))
+
+
+def invalidate_admin_group_attributes(*airavata_internal_user_ids):
+    """Invalidate users' session cached is_gateway_admin attributes.
+
+    Call when a user's membership in the Admins or Read Only Admins groups
+    may have changed.
+    """
+    timeout = getattr(settings, 'ADMIN_GROUP_ATTRIBUTES_CACHE_TTL', 60)
+    version = uuid.uuid4().hex
+    cache.set_many({
+        _get_admin_group_attributes_version_cache_key(user_id): version
+        for user_id in airavata_internal_user_ids
+    }, timeout)
 
 
 def _create_authz_token(request, user=None, access_token=None):
@@ -8,9 +8,9 @@ from airavata_django_portal_sdk import user_storage as user_storage_sdk
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
 from django.utils.module_loading import import_string
-from rest_framework.renderers import JSONRenderer
 
 from django_airavata.apps.api import models
+from django_airavata.apps.api.renderers import FastJSONRenderer
 from django_airavata.apps.api.views import (
     ApplicationModuleViewSet,
     ExperimentSearchViewSet,
@@ -29,7 +29,7 @@ def experiments_list(request):
     if response.status_code != 200:
         raise Exception("Failed to load experiments list: {}".format(
             response.data['detail']))
-    experiments_json = JSONRenderer().render(response.data).decode('utf-8')
+    experiments_json = FastJSONRenderer().render(response.data).decode('utf-8')
     return render(request, 'django_airavata_workspace/experiments_list.html', {
         'bundle_name': 'experiment-list',
         'experiments_data': experiments_json
@@ -53,7 +53,7 @@ def projects_list(request):
     if response.status_code != 200:
         raise Exception("Failed to load projects list: {}".format(
             response.data['detail']))
-    projects_json = JSONRenderer().render(response.data).decode('utf-8')
+    projects_json = FastJSONRenderer().render(response.data).decode('utf-8')
 
     return render(request, 'django_airavata_workspace/projects_list.html', {
         'bundle_name': 'project-list',
@@ -172,7 +172,7 @@ def view_experiment(request, experiment_id):
     if response.status_code != 200:
         raise Exception("Failed to load experiment data: {}".format(
             response.data['detail']))
-    full_experiment_json = JSONRenderer().render(response.data).decode('utf-8')
+    full_experiment_json = FastJSONRenderer().render(response.data).decode('utf-8')
 
     return render(request, 'django_airavata_workspace/view_experiment.html', {
         'bundle_name': 'view-experiment',
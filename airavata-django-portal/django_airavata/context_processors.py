@@ -6,10 +6,10 @@ import re
 
 from django.apps import apps
 from django.conf import settings
-from django.core.exceptions import ObjectDoesNotExist
 from django.urls import reverse
 
 from django_airavata.app_config import AiravataAppConfig
+from django_airavata.apps.api import catalog_cache
 from django_airavata.apps.api.models import User_Notifications
 
 logger = logging.getLogger(__name__)
@@ -19,41 +19,56 @@ def get_notifications(request):
     if request.user.is_authenticated and hasattr(request, 'airavata_client'):
         unread_notifications = 0
         try:
-            notifications = request.airavata_client.getAllNotifications(
-                request.authz_token, settings.GATEWAY_ID)
+            notifications = catalog_cache.get_all_notifications(request)
         except Exception:
             logger.warning("Failed to load notifications")
             notifications = []
         current_time = datetime.datetime.utcnow()
         valid_notifications = []
         for notification in notifications:
-
-            notification_data = notification.__dict__
             expirationTime = datetime.datetime.fromtimestamp(
                 notification.expirationTime / 1000)
             publishedTime = datetime.datetime.fromtimestamp(
                 notification.publishedTime / 1000)
-
-            if(expirationTime > current_time and publishedTime < current_time):
-                notification_data['url'] = request.build_absolute_uri(
-                    reverse('django_airavata_api:ack-notifications'))\
-                    + "?id=" + str(notification.notificationId)
-
-                try:
-                    notification_status = User_Notifications.objects.get(
-                        notification_id=notification.notificationId,
-                        username=request.user.username)
-                except ObjectDoesNotExist:
-                    notification_status = User_Notifications.objects.create(
-                        username=request.user.username,
-                        notification_id=notification.notificationId)
-                notification_data['is_read'] = notification_status.is_read
-                if not notification_status.is_read:
-                    unread_notifications += 1
-                valid_notifications.append(notification_data)
+            if expirationTime > current_time and publishedTime < current_time:
+                valid_notifications.append(notification)
+
+        # Load the user's read state of all valid notifications at once
+        notification_ids = [n.notificationId for n in valid_notifications]
+        notification_statuses = {}
+        if len(notification_ids) > 0:
+            notification_statuses = {
+                status.notification_id: status
+                for status in User_Notifications.objects.filter(
+                    username=request.user.username,
+                    notification_id__in=notification_ids)
+            }
+        missing_statuses = [
+            User_Notifications(username=request.user.username,
+                               notification_id=notification_id)
+            for notification_id in notification_ids
+            if notification_id not in notification_statuses
+        ]
+        if len(missing_statuses) > 0:
+            User_Notifications.objects.bulk_create(missing_statuses,
+                                                   ignore_conflicts=True)
+            for notification_status in missing_statuses:
+                notification_statuses[notification_status.notification_id] = notification_status
+
+        ack_url = request.build_absolute_uri(
+            reverse('django_airavata_api:ack-notifications'))
+        notifications_data = []
+        for notification in valid_notifications:
+            notification_data = dict(notification.__dict__)
+            notification_data['url'] = ack_url + "?id=" + str(notification.notificationId)
+            notification_status = notification_statuses[notification.notificationId]
+            notification_data['is_read'] = notification_status.is_read
+            if not notification_status.is_read:
+                unread_notifications += 1
+            notifications_data.append(notification_data)
 
         return {
-            "notifications": json.dumps(valid_notifications),
+            "notifications": json.dumps(notifications_data),
             "unread_notifications": unread_notifications
         }
     else:
@@ -14,9 +14,23 @@ class AiravataClientMiddleware:
         self.get_response = get_response
 
     def __call__(self, request):
-        with utils.airavata_api_client_pool.connection() as airavata_client:
-            request.airavata_client = airavata_client
+        # A connection is only borrowed from the pool if the request actually
+        # makes an Airavata API call. Idempotent getters are memoized for the
+        # duration of the request.
+        airavata_client = utils.airavata_api_client_pool.lazy_client(
+            cached_methods=utils.AIRAVATA_API_CACHED_METHODS)
+        request.airavata_client = airavata_client
+        try:
             response = self.get_response(request)
+        finally:
+            airavata_client.release()
+            if airavata_client.borrow_count > 0:
+                logger.debug(
+                    "Airavata API connection pool wait: {:.3f}s, "
+                    "cache hits: {}, pool stats: {}".format(
+                        airavata_client.wait_time,
+                        airavata_client.cache_hits,
+                        utils.airavata_api_client_pool.stats()))
 
         return response
 
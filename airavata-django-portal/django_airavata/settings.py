@@ -227,6 +227,11 @@ REST_FRAMEWORK = {
     ),
     'EXCEPTION_HANDLER':
         'django_airavata.apps.api.exceptions.custom_exception_handler',
+    # Renders JSON with orjson when it is installed (pip install orjson)
+    'DEFAULT_RENDERER_CLASSES': (
+        'django_airavata.apps.api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'TEST_REQUEST_DEFAULT_FORMAT': 'json',
     # Force inclusion of fractional seconds (default formatting with
     # datetime.isoformat only includes fractional seconds if non-zero)
@@ -281,6 +286,63 @@ ACCESS_TOKEN_REDIRECT_ALLOWED_URIS = []
 # has lived longer than this period, it will be closed.
 # (https://github.com/Thriftpy/thrift_connector)
 THRIFT_CLIENT_POOL_KEEPALIVE = 5
+# Airavata API connection pool (SimpleThriftPool) settings, all in seconds.
+# Connections older than MAX_LIFETIME or idle for longer than IDLE_TIMEOUT are
+# replaced when borrowed. Connections idle for longer than VALIDATE_INTERVAL
+# are pinged before they are reused. Set to None to disable a check.
+THRIFT_CLIENT_POOL_MAX_LIFETIME = 300
+THRIFT_CLIENT_POOL_IDLE_TIMEOUT = 60
+THRIFT_CLIENT_POOL_VALIDATE_INTERVAL = 10
+# Seconds to wait to open an Airavata API connection or for the validation
+# ping, and for the response to any other API call (None waits forever)
+THRIFT_CLIENT_POOL_CONNECT_TIMEOUT = 5
+THRIFT_CLIENT_POOL_READ_TIMEOUT = 300
+# Max number of threads (per process) used to make independent Airavata API
+# calls concurrently, for example permission checks for a page of results
+THRIFT_CLIENT_CONCURRENT_CALLS_MAX_WORKERS = 8
+# Seconds to wait for a batch of concurrent Airavata API calls to complete
+THRIFT_CLIENT_CONCURRENT_CALLS_TIMEOUT = 60
+
+# Seconds to cache the application catalog (application modules, interfaces
+# and deployments, compute and storage resource names). To share the cache
+# across worker processes, configure a shared CACHES backend (for example
+# memcached or redis) in settings_local.py.
+APPLICATION_CATALOG_CACHE_TTL = 300
+# Seconds to cache the gateway's notifications, which are loaded on every page
+NOTIFICATIONS_CACHE_TTL = 60
+# Max seconds a worker process reuses the Wagtail site chrome (snippets and
+# menu pages). Saving snippets and publishing pages invalidates it sooner when
+# a shared CACHES backend is configured.
+SITE_CHROME_CACHE_TTL = 300
+# Seconds to cache Wagtail pages rendered for anonymous users, 0 to disable.
+# Publishing pages and saving snippets purges the cache.
+WAGTAIL_PAGE_CACHE_TTL = 600
+
+# Seconds before the service account access token expires at which it is
+# refreshed. The token is cached in process and in the Django cache.
+SERVICE_ACCOUNT_TOKEN_REFRESH_MARGIN = 30
+
+# Seconds to cache, in the user's session, whether the user is a member of the
+# gateway's Admins and Read Only Admins groups
+ADMIN_GROUP_ATTRIBUTES_CACHE_TTL = 60
+
+# Set to True to not register data products for files when they are listed in
+# user storage, but instead when they are first downloaded. Listing large
+# directories of new files is faster, but the listed files have a
+# dataProductURI of None in the user storage API. The workspace UI uses the
+# dataProductURI to select a user storage file as an experiment input file and
+# to identify files in the storage browser (for example, when deleting them), so
+# those features don't work for not yet registered files when this is enabled.
+USER_STORAGE_LAZY_DATA_PRODUCT_REGISTRATION = False
+# Max number of threads (per process) used to read newly listed files of
+# unknown type to check whether they are text files
+USER_STORAGE_CONTENT_TYPE_MAX_WORKERS = 8
+
+# Maximum age in seconds of the indexed size of a user storage directory.
+# Indexed sizes are kept up to date when files are changed through the portal
+# and when a directory's own entries change, but not when files are changed by
+# something else further down in its tree. Set to 0 to disable the index.
+USER_STORAGE_DIRECTORY_SIZE_INDEX_TTL = 600
 
 # Webpack loader
 WEBPACK_LOADER = {
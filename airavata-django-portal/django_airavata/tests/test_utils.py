@@ -0,0 +1,373 @@
+import threading
+from unittest.mock import patch
+
+from airavata.model.security.ttypes import AuthzToken
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+from thrift.transport.TTransport import TTransportException
+
+from django_airavata import utils
+from django_airavata.middleware import AiravataClientMiddleware
+
+
+class FakeSocket:
+    """Stands in for TSocket, records timeouts instead of connecting."""
+    fail_open = False
+
+    def __init__(self, host=None, port=None):
+        self.opened = False
+        self.timeouts = []
+
+    def setTimeout(self, ms):
+        self.timeouts.append(ms)
+
+    def open(self):
+        if self.fail_open:
+            raise TTransportException(TTransportException.NOT_OPEN, "refused")
+        self.opened = True
+
+    def isOpen(self):
+        return self.opened
+
+    def close(self):
+        self.opened = False
+
+
+class FakeService:
+    class Client:
+        ping_error = None
+        # Map of method name to exception to raise
+        errors = {}
+
+        def __init__(self, protocol):
+            self.calls = []
+
+        def _call(self, name, *args):
+            self.calls.append(name)
+            if name in self.errors:
+                raise self.errors[name]
+            return {'method': name, 'args': list(args),
+                    'thread': threading.current_thread().name}
+
+        def getAPIVersion(self):
+            self.calls.append('getAPIVersion')
+            if self.ping_error is not None:
+                raise self.ping_error
+            return "0.18.0"
+
+        def getExperiment(self, authzToken, experimentId):
+            return self._call('getExperiment', authzToken, experimentId)
+
+        def getProject(self, authzToken, projectId):
+            return self._call('getProject', authzToken, projectId)
+
+        def updateExperiment(self, authzToken, airavataExperimentId,
+                             experiment):
+            return self._call('updateExperiment', authzToken,
+                              airavataExperimentId, experiment)
+
+        def updateGatewayGroups(self, authzToken, gatewayGroups):
+            return self._call('updateGatewayGroups', authzToken,
+                              gatewayGroups)
+
+
+class SimpleThriftPoolTestCase(SimpleTestCase):
+
+    def setUp(self):
+        patcher = patch.object(utils.TSocket, 'TSocket', FakeSocket)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = utils.SimpleThriftPool(
+            FakeService, "localhost", 8930, size=2, max_lifetime=300,
+            idle_timeout=60, validate_interval=10, connect_timeout=5,
+            read_timeout=30)
+
+    def _borrow_and_return(self):
+        conn = self.pool.get_connection()
+        self.pool.return_connection(conn)
+        return conn
+
+    def test_connection_reused(self):
+        conn = self._borrow_and_return()
+        self.assertIs(conn, self._borrow_and_return())
+        self.assertEqual(1, self.pool.stats()['connections_created'])
+        self.assertEqual(2, self.pool.stats()['borrows'])
+        self.assertEqual([], conn['client'].calls)
+
+    def test_timeouts(self):
+        conn = self._borrow_and_return()
+        # Connect timeout while opening, then the read timeout
+        self.assertEqual([5000, 30000], conn['socket'].timeouts)
+
+    def test_replaced_after_max_lifetime(self):
+        conn = self._borrow_and_return()
+        conn['created'] -= 301
+        new_conn = self._borrow_and_return()
+        self.assertIsNot(conn, new_conn)
+        self.assertFalse(conn['socket'].isOpen())
+        self.assertEqual(1, self.pool.stats()['connections_discarded'])
+
+    def test_replaced_after_idle_timeout(self):
+        conn = self._borrow_and_return()
+        conn['last_used'] -= 61
+        self.assertIsNot(conn, self._borrow_and_return())
+        self.assertFalse(conn['socket'].isOpen())
+        self.assertEqual([], conn['client'].calls)
+
+    def test_validated_after_validate_interval(self):
+        conn = self._borrow_and_return()
+        conn['last_used'] -= 11
+        self.assertIs(conn, self._borrow_and_return())
+        self.assertEqual(['getAPIVersion'], conn['client'].calls)
+        # The ping uses the connect timeout
+        self.assertEqual([5000, 30000, 5000, 30000], conn['socket'].timeouts)
+
+    def test_replaced_when_validation_fails(self):
+        conn = self._borrow_and_return()
+        conn['last_used'] -= 11
+        conn['client'].ping_error = TTransportException(
+            TTransportException.TIMED_OUT, "timed out")
+        new_conn = self._borrow_and_return()
+        self.assertIsNot(conn, new_conn)
+        self.assertFalse(conn['socket'].isOpen())
+
+    def test_broken_connection_replaced(self):
+        with self.assertRaises(TTransportException):
+            with self.pool.connection():
+                raise TTransportException(TTransportException.END_OF_FILE)
+        conn = self._borrow_and_return()
+        self.assertEqual(2, self.pool.stats()['connections_created'])
+        self.assertEqual(1, self.pool.stats()['connections_discarded'])
+        self.assertTrue(conn['socket'].isOpen())
+
+    def test_closed_connection_replaced(self):
+        conn = self._borrow_and_return()
+        conn['socket'].close()
+        self.assertIsNot(conn, self._borrow_and_return())
+
+    def test_failed_connect_returns_slot(self):
+        with patch.object(FakeSocket, 'fail_open', True):
+            with self.assertRaises(TTransportException):
+                self.pool.get_connection()
+        self.assertEqual(2, self.pool.stats()['idle'])
+        self._borrow_and_return()
+
+
+class LazyThriftClientTestCase(SimpleTestCase):
+
+    def setUp(self):
+        patcher = patch.object(utils.TSocket, 'TSocket', FakeSocket)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(FakeService.Client, 'errors', {})
+        self.errors = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = utils.SimpleThriftPool(FakeService, "localhost", 8930, size=2)
+        self.client = self.pool.lazy_client()
+
+    def test_borrowed_on_first_call(self):
+        self.assertEqual(0, self.pool.stats()['borrows'])
+        self.client.getExperiment("token", "exp1")
+        self.client.getProject("token", "proj1")
+        self.assertEqual(1, self.client.borrow_count)
+        self.assertEqual(1, self.pool.stats()['idle'])
+        self.client.release()
+        self.assertEqual(2, self.pool.stats()['idle'])
+        self.assertEqual(1, self.pool.stats()['connections_created'])
+
+    def test_not_borrowed_without_calls(self):
+        self.client.release()
+        self.assertEqual(0, self.pool.stats()['borrows'])
+
+    def test_connection_kept_after_application_error(self):
+        self.errors['getExperiment'] = ValueError("not found")
+        with self.assertRaises(ValueError):
+            self.client.getExperiment("token", "exp1")
+        conn = self.client._conn
+        self.client.release()
+        self.assertIs(conn, self.pool.get_connection())
+        self.assertEqual(0, self.pool.stats()['connections_discarded'])
+
+    def test_connection_discarded_after_transport_error(self):
+        self.errors['getExperiment'] = TTransportException(
+            TTransportException.END_OF_FILE)
+        with self.assertRaises(TTransportException):
+            self.client.getExperiment("token", "exp1")
+        conn = self.client._conn
+        self.client.release()
+        self.assertFalse(conn['socket'].isOpen())
+        self.assertEqual(1, self.pool.stats()['connections_discarded'])
+        self.assertIsNot(conn, self.pool.get_connection())
+
+    def test_calls_after_release_borrow_per_call(self):
+        self.client.release()
+        self.client.getExperiment("token", "exp1")
+        self.assertEqual(2, self.pool.stats()['idle'])
+        self.assertEqual(1, self.pool.stats()['borrows'])
+
+    def test_call_concurrently_uses_spare_connections(self):
+        self.client.getExperiment("token", "exp1")
+        futures = self.client.call_concurrently(
+            [('getProject', ("token", "proj1")),
+             ('getProject', ("token", "proj2"))])
+        results = [f.result(timeout=5) for f in futures]
+        self.assertEqual(["proj1", "proj2"], [r['args'][1] for r in results])
+        for result in results:
+            self.assertTrue(result['thread'].startswith("thrift-client"))
+        self.client.release()
+        # No connections were lost and at most the pool size was opened
+        self.assertEqual(2, self.pool.stats()['idle'])
+        self.assertLessEqual(self.pool.stats()['connections_created'], 2)
+
+    def test_call_concurrently_falls_back_to_own_connection(self):
+        pool = utils.SimpleThriftPool(FakeService, "localhost", 8930, size=1)
+        client = pool.lazy_client()
+        client.getExperiment("token", "exp1")
+        futures = client.call_concurrently(
+            [('getProject', ("token", "proj{}".format(i))) for i in range(4)])
+        # The pool has no spare connection, the calls take turns on the
+        # client's connection instead of waiting on the pool
+        results = [f.result(timeout=5) for f in futures]
+        self.assertEqual(4, len(results))
+        self.assertEqual(1, client.borrow_count)
+        client.release()
+        self.assertEqual(1, pool.stats()['idle'])
+
+    def test_call_concurrently_borrows_own_connection_first(self):
+        pool = utils.SimpleThriftPool(FakeService, "localhost", 8930, size=1)
+        client = pool.lazy_client()
+        futures = client.call_concurrently(
+            [('getProject', ("token", "proj{}".format(i))) for i in range(4)])
+        # Borrowed on the calling thread, so calls without a spare
+        # connection never wait on the pool
+        self.assertIsNotNone(client._conn)
+        results = [f.result(timeout=5) for f in futures]
+        self.assertEqual(4, len(results))
+        self.assertEqual(1, client.borrow_count)
+        client.release()
+        self.assertEqual(1, pool.stats()['idle'])
+
+    def test_call_concurrently_after_release(self):
+        self.client.release()
+        futures = self.client.call_concurrently(
+            [('getProject', ("token", "proj1")),
+             ('getProject', ("token", "proj2"))])
+        for future in futures:
+            self.assertTrue(future.done())
+            self.assertEqual(threading.current_thread().name,
+                             future.result()['thread'])
+        self.assertEqual(2, self.pool.stats()['idle'])
+
+    def test_call_concurrently_failure(self):
+        self.errors['getProject'] = TTransportException(
+            TTransportException.END_OF_FILE)
+        future, = self.client.call_concurrently([('getProject', ("token", "proj1"))])
+        with self.assertRaises(TTransportException):
+            future.result(timeout=5)
+        self.client.release()
+        self.assertEqual(2, self.pool.stats()['idle'])
+        self.assertEqual(1, self.pool.stats()['connections_discarded'])
+
+
+class LazyThriftClientCacheTestCase(SimpleTestCase):
+
+    def setUp(self):
+        patcher = patch.object(utils.TSocket, 'TSocket', FakeSocket)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = utils.SimpleThriftPool(FakeService, "localhost", 8930, size=1)
+        self.client = self.pool.lazy_client(
+            cached_methods=utils.AIRAVATA_API_CACHED_METHODS)
+        self.addCleanup(self.client.release)
+        # Thrift structs have a stable repr, but aren't hashable
+        self.authz_token = AuthzToken(accessToken="token")
+
+    def _calls(self):
+        return self.client._conn['client'].calls
+
+    def test_repeated_reads_cached(self):
+        self.client.getExperiment(self.authz_token, "exp1")
+        self.client.getExperiment(self.authz_token, "exp1")
+        self.client.getExperiment(self.authz_token, "exp2")
+        self.assertEqual(['getExperiment', 'getExperiment'], self._calls())
+        self.assertEqual(1, self.client.cache_hits)
+
+    def test_uncached_methods_not_memoized(self):
+        client = self.pool.lazy_client(cached_methods=['getProject'])
+        self.addCleanup(client.release)
+        client.getExperiment(self.authz_token, "exp1")
+        client.getExperiment(self.authz_token, "exp1")
+        self.assertEqual(0, client.cache_hits)
+
+    def test_cached_result_is_a_copy(self):
+        experiment = self.client.getExperiment(self.authz_token, "exp1")
+        experiment['args'].append("changed by caller")
+        self.assertEqual(
+            [self.authz_token, "exp1"],
+            self.client.getExperiment(self.authz_token, "exp1")['args'])
+        self.assertEqual(
+            [self.authz_token, "exp1"],
+            self.client.getExperiment(self.authz_token, "exp1")['args'])
+
+    def test_write_invalidates_reads_with_same_id(self):
+        self.client.getExperiment(self.authz_token, "exp1")
+        self.client.getProject(self.authz_token, "proj1")
+        self.client.updateExperiment(self.authz_token, "exp1", {})
+        self.client.getExperiment(self.authz_token, "exp1")
+        self.client.getProject(self.authz_token, "proj1")
+        self.assertEqual(
+            ['getExperiment', 'getProject', 'updateExperiment',
+             'getExperiment'],
+            self._calls())
+
+    def test_write_without_ids_invalidates_all(self):
+        self.client.getExperiment(self.authz_token, "exp1")
+        self.client.getProject(self.authz_token, "proj1")
+        self.client.updateGatewayGroups(self.authz_token, object())
+        self.client.getExperiment(self.authz_token, "exp1")
+        self.client.getProject(self.authz_token, "proj1")
+        self.assertEqual(
+            ['getExperiment', 'getProject', 'updateGatewayGroups',
+             'getExperiment', 'getProject'],
+            self._calls())
+
+
+class AiravataClientMiddlewareTestCase(SimpleTestCase):
+
+    def setUp(self):
+        patcher = patch.object(utils.TSocket, 'TSocket', FakeSocket)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(FakeService.Client, 'errors', {})
+        self.errors = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = utils.SimpleThriftPool(FakeService, "localhost", 8930, size=2)
+        patcher = patch.object(utils, 'airavata_api_client_pool', self.pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _view(self, request):
+        request.airavata_client.getExperiment("token", "exp1")
+        return HttpResponse()
+
+    def test_connection_returned(self):
+        AiravataClientMiddleware(self._view)(RequestFactory().get("/"))
+        self.assertEqual(2, self.pool.stats()['idle'])
+        self.assertEqual(0, self.pool.stats()['connections_discarded'])
+
+    def test_connection_returned_when_view_raises(self):
+        def view(request):
+            self._view(request)
+            raise ValueError()
+        with self.assertRaises(ValueError):
+            AiravataClientMiddleware(view)(RequestFactory().get("/"))
+        self.assertEqual(2, self.pool.stats()['idle'])
+        self.assertEqual(0, self.pool.stats()['connections_discarded'])
+
+    def test_connection_discarded_after_transport_error(self):
+        self.errors['getExperiment'] = TTransportException(
+            TTransportException.END_OF_FILE)
+        with self.assertRaises(TTransportException):
+            AiravataClientMiddleware(self._view)(RequestFactory().get("/"))
+        self.assertEqual(2, self.pool.stats()['idle'])
+        self.assertEqual(1, self.pool.stats()['connections_discarded'])
@@ -1,7 +1,10 @@
+import copy
 import logging
-import ssl
 import queue
-from django.conf import settings
+import ssl
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import contextmanager
 
 import thrift_connector.connection_pool as connection_pool
@@ -22,6 +25,7 @@ from airavata.service.profile.user.cpi import UserProfileService
 from airavata.service.profile.user.cpi.constants import USER_PROFILE_CPI_NAME
 from django.conf import settings
 from thrift.protocol import TBinaryProtocol
+from thrift.protocol.TProtocol import TProtocolException
 from thrift.protocol.TMultiplexedProtocol import TMultiplexedProtocol
 from thrift.transport import TSocket, TSSLSocket, TTransport
 
@@ -177,9 +181,20 @@ def get_thrift_client(host, port, is_secure, client_generator):
 @contextmanager
 def simple_thrift_connection(pool):
     """Context manager for borrowing a connection from the pool."""
-    conn = pool.get_connection()
+    with simple_thrift_connection_from(pool, pool.get_connection()) as client:
+        yield client
+
+
+@contextmanager
+def simple_thrift_connection_from(pool, conn):
+    """Context manager that returns an already borrowed connection."""
     try:
         yield conn['client']
+    except (TTransport.TTransportException, TProtocolException, OSError):
+        # The transport may be left in an inconsistent state (half read
+        # response, reset socket), so don't hand it out again
+        conn['broken'] = True
+        raise
     finally:
         pool.return_connection(conn)
 
@@ -187,42 +202,345 @@ def simple_thrift_connection(pool):
 class SimpleThriftPool:
     """
     A thread-safe Thrift connection pool that uses raw Thrift and the TBufferedTransport.
+
+    Connections are opened lazily and reused across borrows. A connection is
+    validated when it is borrowed: it is replaced if its transport is closed,
+    if it is older than ``max_lifetime`` seconds or if it has been idle for
+    longer than ``idle_timeout`` seconds. Connections that have been idle for
+    more than ``validate_interval`` seconds are additionally pinged (with
+    ``getAPIVersion``) before being handed out.
+
+    Opening a connection and the validation ping time out after
+    ``connect_timeout`` seconds, and other calls after ``read_timeout``
+    seconds (None waits forever).
     """
 
-    def __init__(self, service, host, port, size=5):
+    def __init__(self, service, host, port, size=5, max_lifetime=300,
+                 idle_timeout=60, validate_interval=10, connect_timeout=5,
+                 read_timeout=None):
         self._service = service
         self._host = host
         self._port = port
         self._size = size
-        self._pool = queue.Queue(maxsize=size)
+        self._max_lifetime = max_lifetime
+        self._idle_timeout = idle_timeout
+        self._validate_interval = validate_interval
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+        self._lock = threading.Lock()
+        self._stats = {
+            'borrows': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+            'connections_created': 0,
+            'connections_discarded': 0,
+        }
+        # LIFO so that recently used (warm) connections are reused first and
+        # the rest age out. Empty slots are represented by None.
+        self._pool = queue.LifoQueue(maxsize=size)
         self._initialize_pool()
 
     def _initialize_pool(self):
         for _ in range(self._size):
-            self._pool.put(self._create_connection())
+            self._pool.put(None)
 
     def _create_connection(self):
-        transport = TSocket.TSocket(host=self._host, port=self._port)
-        transport = TTransport.TBufferedTransport(transport)
+        socket = TSocket.TSocket(host=self._host, port=self._port)
+        socket.setTimeout(_to_millis(self._connect_timeout))
+        transport = TTransport.TBufferedTransport(socket)
         protocol = TBinaryProtocol.TBinaryProtocol(transport)
         client = self._service.Client(protocol)
         transport.open()
-        return {'client': client, 'transport': transport}
-
-    def get_connection(self):
-        return self._pool.get()
-
-    def return_connection(self, conn):
+        socket.setTimeout(_to_millis(self._read_timeout))
+        log.debug("Thrift connection opened to {}:{}".format(
+            self._host, self._port))
+        with self._lock:
+            self._stats['connections_created'] += 1
+        now = time.monotonic()
+        return {'client': client, 'transport': transport, 'socket': socket,
+                'created': now, 'last_used': now, 'broken': False}
+
+    def _close_connection(self, conn):
+        with self._lock:
+            self._stats['connections_discarded'] += 1
         try:
             if conn['transport'].isOpen():
                 conn['transport'].close()
+                log.debug("Thrift connection closed to {}:{}".format(
+                    self._host, self._port))
         except Exception:
             pass
-        self._pool.put(self._create_connection())
+
+    def _is_valid(self, conn):
+        now = time.monotonic()
+        if conn['broken'] or not conn['transport'].isOpen():
+            return False
+        if (self._max_lifetime is not None and
+                now - conn['created'] > self._max_lifetime):
+            return False
+        idle = now - conn['last_used']
+        if self._idle_timeout is not None and idle > self._idle_timeout:
+            return False
+        if (self._validate_interval is not None and
+                idle > self._validate_interval and
+                hasattr(conn['client'], 'getAPIVersion')):
+            # Don't let a half-open connection block the request for the
+            # whole read timeout
+            conn['socket'].setTimeout(_to_millis(self._connect_timeout))
+            try:
+                conn['client'].getAPIVersion()
+            except Exception as e:
+                log.debug("Thrift connection to {}:{} failed ping: {}".format(
+                    self._host, self._port, e))
+                return False
+            conn['socket'].setTimeout(_to_millis(self._read_timeout))
+        return True
+
+    def get_connection(self, block=True):
+        """Borrow a connection.
+
+        If ``block`` is False and no connection is available, raises
+        queue.Empty.
+        """
+        start = time.monotonic()
+        conn = self._pool.get(block=block)
+        wait_time = time.monotonic() - start
+        with self._lock:
+            self._stats['borrows'] += 1
+            self._stats['wait_time_total'] += wait_time
+            self._stats['wait_time_max'] = max(
+                self._stats['wait_time_max'], wait_time)
+        try:
+            if conn is not None and not self._is_valid(conn):
+                self._close_connection(conn)
+                conn = None
+            if conn is None:
+                conn = self._create_connection()
+        except Exception:
+            # Give the slot back so the pool doesn't shrink
+            self._pool.put(None)
+            raise
+        conn['wait_time'] = wait_time
+        return conn
+
+    def return_connection(self, conn):
+        if conn['broken']:
+            self._close_connection(conn)
+            self._pool.put(None)
+        else:
+            conn['last_used'] = time.monotonic()
+            self._pool.put(conn)
+
+    @property
+    def service(self):
+        return self._service
 
     def connection(self):
         return simple_thrift_connection(self)
 
+    def lazy_client(self, cached_methods=()):
+        return LazyThriftClient(self, cached_methods=cached_methods)
+
+    def stats(self):
+        """Borrow counts and wait times since the pool was created.
+
+        Useful for sizing the pool: a growing ``wait_time_max`` or
+        ``wait_time_total`` relative to ``borrows`` means requests are queueing
+        for a connection.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats['size'] = self._size
+        stats['idle'] = self._pool.qsize()
+        return stats
+
+
+# Idempotent Airavata API getters whose results are memoized for the duration
+# of a request (see LazyThriftClient)
+AIRAVATA_API_CACHED_METHODS = frozenset([
+    'getApplicationDeployment',
+    'getApplicationInterface',
+    'getApplicationModule',
+    'getComputeResource',
+    'getDataProduct',
+    'getExperiment',
+    'getGatewayGroups',
+    'getGatewayResourceProfile',
+    'getGroupResourceProfile',
+    'getProject',
+    'getStorageResource',
+    'userHasAccess',
+])
+# Method name prefixes of API calls that don't modify anything
+READ_ONLY_METHOD_PREFIXES = (
+    'get', 'search', 'is', 'list', 'doesUser', 'userHas', 'validate')
+
+
+class LazyThriftClient:
+    """
+    Proxy for a Thrift client that borrows a pooled connection on first use.
+
+    The connection is held until release() is called. Calls made after
+    release() borrow and return a connection per call.
+
+    Results of the methods in ``cached_methods`` are memoized by arguments for
+    the lifetime of the proxy. Any other call that isn't read-only invalidates
+    the memoized results that share an id (string) argument with it, or all
+    memoized results if it has no string arguments.
+    """
+
+    def __init__(self, pool, cached_methods=()):
+        self._pool = pool
+        self._conn = None
+        self._released = False
+        self._cached_methods = frozenset(cached_methods)
+        self._cache = {}
+        self._lock = threading.RLock()
+        self.borrow_count = 0
+        self.wait_time = 0.0
+        self.cache_hits = 0
+
+    def _get_connection(self):
+        if self._conn is None:
+            self._conn = self._pool.get_connection()
+            self.borrow_count += 1
+            self.wait_time += self._conn['wait_time']
+        return self._conn
+
+    def _call(self, name, args, kwargs):
+        if self._released:
+            with self._pool.connection() as client:
+                return getattr(client, name)(*args, **kwargs)
+        with self._lock:
+            conn = self._get_connection()
+            try:
+                return getattr(conn['client'], name)(*args, **kwargs)
+            except (TTransport.TTransportException, TProtocolException,
+                    OSError):
+                conn['broken'] = True
+                raise
+
+    def _call_with_spare_connection(self, name, args, kwargs):
+        try:
+            conn = self._pool.get_connection(block=False)
+        except queue.Empty:
+            # Never wait on the pool here: waiting could deadlock when every
+            # connection is held by a request that is fanning out. Use the
+            # connection call_concurrently borrowed instead.
+            with self._lock:
+                if self._conn is None:
+                    raise RuntimeError(
+                        f"No Airavata API connection available for {name}")
+                return self._call(name, args, kwargs)
+        with self._lock:
+            self.borrow_count += 1
+        with simple_thrift_connection_from(self._pool, conn) as client:
+            return getattr(client, name)(*args, **kwargs)
+
+    def _invoke(self, name, args, kwargs, call):
+        if name in self._cached_methods:
+            return self._cached_call(name, args, kwargs, call)
+        if not name.startswith(READ_ONLY_METHOD_PREFIXES):
+            self._invalidate(args, kwargs)
+        return call(name, args, kwargs)
+
+    def call_concurrently(self, calls):
+        """Make several API calls concurrently.
+
+        ``calls`` is a list of ``(method_name, args)`` tuples. Each call is run
+        on the shared thread pool using its own pooled connection when one is
+        available (otherwise this proxy's connection). Returns a list of
+        futures in the same order as ``calls``; a future's result() re-raises
+        the exception of a failed call. After release() the calls are made
+        one at a time on the calling thread.
+        """
+        with self._lock:
+            if self._released:
+                return [_call_now(self._invoke, name, tuple(args), {}, self._call)
+                        for name, args in calls]
+            # Borrow this proxy's connection now, on the request's thread, so
+            # that the calls never have to wait on the pool
+            self._get_connection()
+        return [
+            _concurrent_calls_executor.submit(
+                self._timed_invoke, name, tuple(args), {},
+                self._call_with_spare_connection)
+            for name, args in calls]
+
+    def _timed_invoke(self, name, args, kwargs, call):
+        start = time.monotonic()
+        try:
+            return self._invoke(name, args, kwargs, call)
+        finally:
+            log.debug("{} took {:.3f}s".format(
+                name, time.monotonic() - start))
+
+    def _cached_call(self, name, args, kwargs, call):
+        # Thrift structs (like the AuthzToken) aren't hashable but do have a
+        # stable repr
+        key = (name, repr(args), repr(sorted(kwargs.items())))
+        with self._lock:
+            if key in self._cache:
+                self.cache_hits += 1
+                return copy.deepcopy(self._cache[key][1])
+        result = call(name, args, kwargs)
+        ids = frozenset(_string_args(args, kwargs))
+        with self._lock:
+            self._cache[key] = (ids, copy.deepcopy(result))
+        return result
+
+    def _invalidate(self, args, kwargs):
+        ids = set(_string_args(args, kwargs))
+        with self._lock:
+            if not ids:
+                self._cache.clear()
+                return
+            for key in [k for k, (entry_ids, _) in self._cache.items()
+                        if entry_ids & ids]:
+                del self._cache[key]
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if not callable(getattr(self._pool.service.Client, name, None)):
+            raise AttributeError(name)
+
+        def method(*args, **kwargs):
+            return self._invoke(name, args, kwargs, self._call)
+        method.__name__ = name
+        return method
+
+    def release(self):
+        with self._lock:
+            self._released = True
+            if self._conn is not None:
+                conn, self._conn = self._conn, None
+                self._pool.return_connection(conn)
+
+
+_concurrent_calls_executor = ThreadPoolExecutor(
+    max_workers=settings.THRIFT_CLIENT_CONCURRENT_CALLS_MAX_WORKERS,
+    thread_name_prefix="thrift-client")
+
+
+def _call_now(fn, *args):
+    """Call fn and return a completed future with its result or exception."""
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def _to_millis(seconds):
+    return seconds * 1000 if seconds is not None else None
+
+
+def _string_args(args, kwargs):
+    return [a for a in list(args) + list(kwargs.values())
+            if isinstance(a, str)]
+
 
 class CustomThriftClient(connection_pool.ThriftClient):
     secure = False
@@ -294,7 +612,12 @@ class UserProfileServiceThriftClient(MultiplexThriftClientMixin,
 airavata_api_client_pool = SimpleThriftPool(
     Airavata,
     settings.AIRAVATA_API_HOST,
-    settings.AIRAVATA_API_PORT
+    settings.AIRAVATA_API_PORT,
+    max_lifetime=settings.THRIFT_CLIENT_POOL_MAX_LIFETIME,
+    idle_timeout=settings.THRIFT_CLIENT_POOL_IDLE_TIMEOUT,
+    validate_interval=settings.THRIFT_CLIENT_POOL_VALIDATE_INTERVAL,
+    connect_timeout=settings.THRIFT_CLIENT_POOL_CONNECT_TIMEOUT,
+    read_timeout=settings.THRIFT_CLIENT_POOL_READ_TIMEOUT,
 )
 group_manager_client_pool = connection_pool.ClientPool(
     GroupManagerService,
@@ -5,3 +5,6 @@ class BaseConfig(AppConfig):
     name = 'django_airavata.wagtailapps.base'
     label = 'django_airavata_wagtail_base'
     verbose_name = 'django airavata wagtail base'
+
+    def ready(self):
+        from . import signals  # noqa
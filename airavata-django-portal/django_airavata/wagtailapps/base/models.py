@@ -20,6 +20,7 @@ from wagtail.images.edit_handlers import ImageChooserPanel
 from wagtail.snippets.models import register_snippet
 
 from .blocks import BaseStreamBlock, ContainerChoiceBlock, CssStreamBlock, Nav
+from .page_cache import AnonymousPageCacheMixin
 
 
 @register_snippet
@@ -432,7 +433,7 @@ class JsLink(Orderable):
         verbose_name = 'JS Link'
 
 
-class HomePage(Page):
+class HomePage(AnonymousPageCacheMixin, Page):
     """
     The Home Page. This looks slightly more complicated than it is. You can
     see if you visit your site and edit the homepage that it is split between
@@ -710,7 +711,7 @@ class RowBlankPageRelation(Orderable, BootstrapRow):
                        on_delete=models.CASCADE, related_name='row')
 
 
-class BlankPage(Page):
+class BlankPage(AnonymousPageCacheMixin, Page):
     """
     The Blank Template Page. You can see if you visit your site and edit the blank page. Used to create free form content
     """
@@ -772,7 +773,7 @@ class RowCybergatewayHomePageRelation(Orderable, Row):
                        on_delete=models.CASCADE, related_name='row')
 
 
-class CybergatewayHomePage(Page):
+class CybergatewayHomePage(AnonymousPageCacheMixin, Page):
     """
     The Cybergateway themed template Page
     """
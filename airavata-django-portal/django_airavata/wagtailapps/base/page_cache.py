@@ -0,0 +1,82 @@
+"""
+Full page cache of Wagtail pages rendered for anonymous users.
+
+Pages are cached for WAGTAIL_PAGE_CACHE_TTL seconds, keyed by site, page,
+live revision and path. The cache is versioned with a key in Django's cache:
+publishing, unpublishing, moving or deleting a page and changing snippets
+changes the version, which purges all cached pages. Configure a shared CACHES
+backend so that cached pages and the version are shared across worker
+processes.
+"""
+import hashlib
+import logging
+import uuid
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from wagtail.core.models import Site
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "django_airavata_wagtail_base:page_cache"
+VERSION_CACHE_KEY = f"{KEY_PREFIX}:version"
+
+
+def _get_version():
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_CACHE_KEY)
+    return version
+
+
+def _get_ttl():
+    return getattr(settings, 'WAGTAIL_PAGE_CACHE_TTL', 600)
+
+
+def get_cache_key(page, request):
+    """Return cache key for page's response or None if it can't be cached."""
+    if (_get_ttl() <= 0 or
+            request.method not in ('GET', 'HEAD') or
+            len(request.GET) > 0 or
+            request.user.is_authenticated or
+            # Pending messages are rendered in the page
+            len(get_messages(request)) > 0):
+        return None
+    site = Site.find_for_request(request)
+    site_id = site.pk if site is not None else None
+    path_hash = hashlib.md5(request.path.encode()).hexdigest()
+    return (f"{KEY_PREFIX}:{_get_version()}:{site_id}:{page.pk}:"
+            f"{page.live_revision_id}:{path_hash}")
+
+
+def is_cacheable(request, response):
+    return (response.status_code == 200 and
+            not response.cookies and
+            # Response has a CSRF token for this user
+            not request.META.get('CSRF_COOKIE_USED', False) and
+            'private' not in response.get('Cache-Control', ''))
+
+
+def invalidate():
+    cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+
+
+class AnonymousPageCacheMixin:
+    """Page mixin that caches the page's responses for anonymous users."""
+
+    def serve(self, request, *args, **kwargs):
+        cache_key = get_cache_key(self, request)
+        if cache_key is None:
+            return super().serve(request, *args, **kwargs)
+        response = cache.get(cache_key)
+        if response is not None:
+            return response
+        response = super().serve(request, *args, **kwargs)
+        if hasattr(response, 'render') and callable(response.render):
+            response.render()
+        if is_cacheable(request, response):
+            logger.debug(f"Caching {request.path} as {cache_key}")
+            cache.set(cache_key, response, _get_ttl())
+        return response
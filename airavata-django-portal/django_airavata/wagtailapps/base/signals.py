@@ -0,0 +1,71 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from wagtail.core.models import Page
+from wagtail.core.signals import (
+    page_published,
+    page_unpublished,
+    post_page_move
+)
+from wagtail.snippets.models import get_snippet_models
+
+from . import page_cache, site_chrome
+from .models import (
+    Announcements,
+    CssLink,
+    CustomCss,
+    CustomHeaderLinks,
+    ExtraWebResources,
+    FooterText,
+    GatewayIcon,
+    GatewayTitle,
+    JsLink,
+    Navbar,
+    NavExtra
+)
+
+SITE_CHROME_MODELS = (
+    Announcements,
+    CssLink,
+    CustomCss,
+    CustomHeaderLinks,
+    ExtraWebResources,
+    FooterText,
+    GatewayIcon,
+    GatewayTitle,
+    JsLink,
+    Navbar,
+    NavExtra,
+)
+
+
+def invalidate_site_chrome(sender, **kwargs):
+    site_chrome.invalidate()
+    page_cache.invalidate()
+
+
+def invalidate_page_cache(sender, **kwargs):
+    page_cache.invalidate()
+
+
+for model in SITE_CHROME_MODELS:
+    post_save.connect(invalidate_site_chrome, sender=model,
+                      dispatch_uid=f"site_chrome_post_save_{model.__name__}")
+    post_delete.connect(invalidate_site_chrome, sender=model,
+                        dispatch_uid=f"site_chrome_post_delete_{model.__name__}")
+
+# Other snippets may be rendered in pages, for example in StreamField blocks
+for model in get_snippet_models():
+    if model not in SITE_CHROME_MODELS:
+        post_save.connect(invalidate_page_cache, sender=model,
+                          dispatch_uid=f"page_cache_post_save_{model.__name__}")
+        post_delete.connect(invalidate_page_cache, sender=model,
+                            dispatch_uid=f"page_cache_post_delete_{model.__name__}")
+
+
+@receiver(page_published, dispatch_uid="site_chrome_page_published")
+@receiver(page_unpublished, dispatch_uid="site_chrome_page_unpublished")
+@receiver(post_page_move, dispatch_uid="site_chrome_post_page_move")
+@receiver(post_delete, sender=Page, dispatch_uid="site_chrome_page_deleted")
+def invalidate_site_chrome_for_page(sender, **kwargs):
+    site_chrome.invalidate()
+    page_cache.invalidate()
@@ -0,0 +1,124 @@
+"""
+Cached "site chrome": the snippets and menu pages rendered on every page.
+
+The snippets (announcements, footer text, navbar, custom header links, custom
+CSS, nav extra, gateway icon and title, extra web resources) and the menu
+page tree are loaded once into a SiteChrome bundle that is kept in process.
+The bundle is versioned with a key in Django's cache: saving or deleting one
+of the snippets, or publishing, unpublishing, moving or deleting a page,
+changes the version and every process reloads the bundle on its next request.
+Configure a shared CACHES backend so that the version is shared across worker
+processes. Regardless, a bundle is reloaded after SITE_CHROME_CACHE_TTL
+seconds.
+"""
+import logging
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from wagtail.core.models import Page
+
+from .models import (
+    Announcements,
+    CustomCss,
+    CustomHeaderLinks,
+    ExtraWebResources,
+    FooterText,
+    GatewayIcon,
+    GatewayTitle,
+    Navbar,
+    NavExtra
+)
+
+logger = logging.getLogger(__name__)
+
+VERSION_CACHE_KEY = "django_airavata_wagtail_base:site_chrome_version"
+# Number of levels of the menu tree below a parent page that are loaded at
+# once: the top menu items, their dropdown items and the dropdown items'
+# children
+MENU_TREE_LEVELS = 3
+
+_site_chrome = None
+_site_chrome_lock = threading.Lock()
+
+
+class SiteChrome:
+    def __init__(self, version):
+        self.version = version
+        self.loaded_at = time.time()
+        self.announcements = list(Announcements.objects.all())
+        self.footer_text = FooterText.objects.first()
+        self.navbar = Navbar.objects.select_related('logo').first()
+        self.custom_header_links = list(CustomHeaderLinks.objects.all())
+        self.custom_css = CustomCss.objects.first()
+        self.nav_extra = NavExtra.objects.first()
+        self.gateway_icon = GatewayIcon.objects.select_related('icon').first()
+        self.gateway_title = GatewayTitle.objects.first()
+        self.extra_web_resources = (ExtraWebResources.objects
+                                    .prefetch_related('css_links', 'js_links')
+                                    .first())
+        # Map of page path to the page's live, in menu children
+        self._menu_children = {}
+        self._menu_children_lock = threading.Lock()
+
+    def is_expired(self):
+        ttl = getattr(settings, 'SITE_CHROME_CACHE_TTL', 300)
+        return self.loaded_at + ttl < time.time()
+
+    def get_menu_children(self, parent):
+        """Return list of parent's live, in menu child pages."""
+        children = self._menu_children.get(parent.path)
+        if children is None:
+            menu_children = self._load_menu_tree(parent)
+            with self._menu_children_lock:
+                for path, children in menu_children.items():
+                    self._menu_children.setdefault(path, children)
+                children = self._menu_children[parent.path]
+        return children
+
+    def _load_menu_tree(self, parent):
+        max_depth = parent.depth + MENU_TREE_LEVELS
+        pages = (Page.objects.descendant_of(parent)
+                 .filter(depth__lte=max_depth).live().in_menu()
+                 .order_by('path'))
+        # Children are only completely loaded for pages above max_depth
+        menu_children = {parent.path: []}
+        for page in pages:
+            if page.depth < max_depth:
+                menu_children[page.path] = []
+        for page in pages:
+            parent_path = page.path[:-Page.steplen]
+            # A page whose parent isn't live and in the menu isn't reachable
+            if parent_path in menu_children:
+                menu_children[parent_path].append(page)
+        return menu_children
+
+
+def get_site_chrome(request=None):
+    """Return the current SiteChrome, reusing it for the rest of request."""
+    global _site_chrome
+    if request is not None and hasattr(request, '_site_chrome'):
+        return request._site_chrome
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_CACHE_KEY)
+    site_chrome = _site_chrome
+    if (site_chrome is None or site_chrome.version != version or
+            site_chrome.is_expired()):
+        with _site_chrome_lock:
+            site_chrome = _site_chrome
+            if (site_chrome is None or site_chrome.version != version or
+                    site_chrome.is_expired()):
+                logger.debug(f"Loading site chrome version {version}")
+                site_chrome = SiteChrome(version)
+                _site_chrome = site_chrome
+    if request is not None:
+        request._site_chrome = site_chrome
+    return site_chrome
+
+
+def invalidate():
+    cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, None)
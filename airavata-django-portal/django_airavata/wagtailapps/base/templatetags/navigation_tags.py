@@ -1,18 +1,10 @@
+import copy
+
 from django import template
 from django.conf import settings
 from wagtail.core.models import Page, Site
 
-from django_airavata.wagtailapps.base.models import (
-    Announcements,
-    CustomCss,
-    CustomHeaderLinks,
-    ExtraWebResources,
-    FooterText,
-    GatewayIcon,
-    GatewayTitle,
-    Navbar,
-    NavExtra
-)
+from django_airavata.wagtailapps.base import site_chrome
 
 register = template.Library()
 # https://docs.djangoproject.com/en/1.9/howto/custom-template-tags/
@@ -26,13 +18,6 @@ def get_site_root(context):
     return Site.find_for_request(context['request']).root_page
 
 
-def has_menu_children(page):
-    # This is used by the top_menu property
-    # get_children is a Treebeard API thing
-    # https://tabo.pe/projects/django-treebeard/docs/4.0.1/api.html
-    return page.get_children().live().in_menu().exists()
-
-
 def has_children(page):
     # Generically allow index pages to list their children
     return page.get_children().live().exists()
@@ -44,18 +29,22 @@ def is_active(page, current_page):
 
 
 # Retrieves the top menu items - the immediate children of the parent page
-# The has_menu_children method is necessary because the Foundation menu requires
+# The show_dropdown flag is necessary because the Foundation menu requires
 # a dropdown class to be applied to a parent
 @register.inclusion_tag('tags/top_menu.html', takes_context=True)
 def top_menu(context, parent, calling_page=None):
-    menuitems = parent.get_children().live().in_menu()
-    for menuitem in menuitems:
-        menuitem.show_dropdown = has_menu_children(menuitem)
+    chrome = site_chrome.get_site_chrome(context['request'])
+    menuitems = []
+    for page in chrome.get_menu_children(parent):
+        # Copy the page since the menu pages are shared across requests
+        menuitem = copy.copy(page)
+        menuitem.show_dropdown = len(chrome.get_menu_children(page)) > 0
         # We don't directly check if calling_page is None since the template
         # engine can pass an empty string to calling_page
         # if the variable passed as calling_page does not exist.
         menuitem.active = (calling_page.url.startswith(menuitem.url)
                            if calling_page else False)
+        menuitems.append(menuitem)
     return {
         'calling_page': calling_page,
         'menuitems': menuitems,
@@ -67,16 +56,18 @@ def top_menu(context, parent, calling_page=None):
 # Retrieves the children of the top menu items for the drop downs
 @register.inclusion_tag('tags/top_menu_children.html', takes_context=True)
 def top_menu_children(context, parent, calling_page=None):
-    menuitems_children = parent.get_children()
-    menuitems_children = menuitems_children.live().in_menu()
-    for menuitem in menuitems_children:
-        menuitem.has_dropdown = has_menu_children(menuitem)
+    chrome = site_chrome.get_site_chrome(context['request'])
+    menuitems_children = []
+    for page in chrome.get_menu_children(parent):
+        menuitem = copy.copy(page)
+        menuitem.children = chrome.get_menu_children(page)
+        menuitem.has_dropdown = len(menuitem.children) > 0
         # We don't directly check if calling_page is None since the template
         # engine can pass an empty string to calling_page
         # if the variable passed as calling_page does not exist.
         menuitem.active = (calling_page.url.startswith(menuitem.url)
                            if calling_page else False)
-        menuitem.children = menuitem.get_children().live().in_menu()
+        menuitems_children.append(menuitem)
     return {
         'parent': parent,
         'menuitems_children': menuitems_children,
@@ -102,20 +93,16 @@ def breadcrumbs(context):
 
 @register.inclusion_tag('django_airavata_wagtail_base/includes/announcement_list.html', takes_context=True)
 def get_announcements(context):
-    announcementObjects = None
-    if Announcements.objects.first() is not None:
-        announcementObjects = Announcements.objects.all()
+    announcements = site_chrome.get_site_chrome(context.get('request')).announcements
 
     return {
-        'announcements': announcementObjects,
+        'announcements': announcements if len(announcements) > 0 else None,
     }
 
 
 @register.inclusion_tag('django_airavata_wagtail_base/includes/footer_text.html', takes_context=True)
 def get_footer_text(context):
-    footer_text = None
-    if FooterText.objects.first() is not None:
-        footer_text = FooterText.objects.first()
+    footer_text = site_chrome.get_site_chrome(context.get('request')).footer_text
 
     return {
         'footer_text': footer_text,
@@ -124,9 +111,7 @@ def get_footer_text(context):
 
 @register.inclusion_tag('django_airavata_wagtail_base/includes/navbar.html', takes_context=True)
 def get_navbar(context):
-    navbar = None
-    if Navbar.objects.first() is not None:
-        navbar = Navbar.objects.first()
+    navbar = site_chrome.get_site_chrome(context.get('request')).navbar
 
     return {
         'navbar': navbar,
@@ -135,35 +120,29 @@ def get_navbar(context):
 
 @register.inclusion_tag('django_airavata_wagtail_base/includes/custom_header_links.html', takes_context=True)
 def get_custom_header_links(context):
-    custom_header_links = ""
-    if CustomHeaderLinks.objects.first() is not None:
-        custom_header_links = CustomHeaderLinks.objects.all()
+    custom_header_links = site_chrome.get_site_chrome(context.get('request')).custom_header_links
 
     return {
-        'custom_header_links': custom_header_links,
+        'custom_header_links': custom_header_links if len(custom_header_links) > 0 else "",
     }
 
 
 @register.inclusion_tag('django_airavata_wagtail_base/includes/custom_css.html', takes_context=True)
 def get_css(context):
-    custom_css = ""
-    if CustomCss.objects.first() is not None:
-        custom_css = CustomCss.objects.first()
+    custom_css = site_chrome.get_site_chrome(context.get('request')).custom_css
 
     return {
-        'custom_css': custom_css,
+        'custom_css': custom_css if custom_css is not None else "",
     }
 
 
 @register.inclusion_tag(
     'django_airavata_wagtail_base/includes/nav_extra.html', takes_context=True)
 def get_nav_extra(context):
-    nav_extra = ""
-    if NavExtra.objects.first() is not None:
-        nav_extra = NavExtra.objects.first()
+    nav_extra = site_chrome.get_site_chrome(context.get('request')).nav_extra
 
     return {
-        'navextra': nav_extra,
+        'navextra': nav_extra if nav_extra is not None else "",
         'request': context['request'],
     }
 
@@ -173,8 +152,8 @@ def get_nav_extra(context):
 def main_menu_navs(context):
     """NavExtra nav items that are 'include_in_main_menu' == yes"""
     nav_items = []
-    if NavExtra.objects.first() is not None:
-        nav_extra = NavExtra.objects.first()
+    nav_extra = site_chrome.get_site_chrome(context.get('request')).nav_extra
+    if nav_extra is not None:
         # only return the nav_items that have 'include_in_main_menu' == yes
         if nav_extra.nav and len(nav_extra.nav) > 0:
             nav = nav_extra.nav[0]
@@ -189,7 +168,7 @@ def main_menu_navs(context):
 
 @register.inclusion_tag('django_airavata_wagtail_base/includes/gateway_icon.html', takes_context=True)
 def gateway_icon(context):
-    gateway_icon = GatewayIcon.objects.first()
+    gateway_icon = site_chrome.get_site_chrome(context.get('request')).gateway_icon
 
     return {
         'gateway_icon': gateway_icon
@@ -198,7 +177,7 @@ def gateway_icon(context):
 
 @register.inclusion_tag('django_airavata_wagtail_base/includes/gateway_title.html', takes_context=True)
 def gateway_title(context):
-    gateway_title = GatewayTitle.objects.first()
+    gateway_title = site_chrome.get_site_chrome(context.get('request')).gateway_title
 
     return {
         'gateway_title': gateway_title,
@@ -208,7 +187,7 @@ def gateway_title(context):
 
 @register.inclusion_tag('django_airavata_wagtail_base/includes/favicon.html', takes_context=True)
 def favicon(context):
-    gateway_icon = GatewayIcon.objects.first()
+    gateway_icon = site_chrome.get_site_chrome(context.get('request')).gateway_icon
     return {
         'gateway_icon': gateway_icon
     }
@@ -217,7 +196,7 @@ def favicon(context):
 @register.inclusion_tag('django_airavata_wagtail_base/includes/extra_web_resources.html',
                         takes_context=True)
 def extra_web_resources(context):
-    extra_web_resources = ExtraWebResources.objects.first()
+    extra_web_resources = site_chrome.get_site_chrome(context.get('request')).extra_web_resources
     return {
         'extra_web_resources': extra_web_resources,
     }
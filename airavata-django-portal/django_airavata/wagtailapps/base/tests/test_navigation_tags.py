@@ -0,0 +1,79 @@
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from wagtail.core.models import Page
+
+from django_airavata.wagtailapps.base import site_chrome
+from django_airavata.wagtailapps.base.models import Announcements
+from django_airavata.wagtailapps.base.templatetags import navigation_tags
+
+
+class NavigationTagsTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.root = Page.objects.get(depth=1)
+        self.home = self.root.add_child(
+            instance=Page(title="Home", slug="home-test", show_in_menus=True))
+        self.about = self.home.add_child(
+            instance=Page(title="About", slug="about", show_in_menus=True))
+        self.team = self.about.add_child(
+            instance=Page(title="Team", slug="team", show_in_menus=True))
+        self.news = self.home.add_child(
+            instance=Page(title="News", slug="news", show_in_menus=True))
+        self.home.add_child(
+            instance=Page(title="Hidden", slug="hidden", show_in_menus=False))
+        self.factory = RequestFactory()
+
+    def _context(self):
+        return {'request': self.factory.get("/")}
+
+    def test_top_menu(self):
+        result = navigation_tags.top_menu(self._context(), self.home)
+        menuitems = result['menuitems']
+        self.assertEqual(["About", "News"], [m.title for m in menuitems])
+        self.assertEqual([True, False], [m.show_dropdown for m in menuitems])
+
+        result = navigation_tags.top_menu_children(
+            self._context(), menuitems[0])
+        self.assertEqual(["Team"],
+                         [m.title for m in result['menuitems_children']])
+        self.assertEqual(
+            [False], [m.has_dropdown for m in result['menuitems_children']])
+
+    def test_site_chrome_is_cached(self):
+        navigation_tags.top_menu(self._context(), self.home)
+        navigation_tags.get_announcements(self._context())
+        with self.assertNumQueries(0):
+            context = self._context()
+            navigation_tags.top_menu(context, self.home)
+            navigation_tags.get_announcements(context)
+            navigation_tags.get_footer_text(context)
+            navigation_tags.gateway_title(context)
+
+    def test_site_chrome_invalidated_by_snippet_save(self):
+        self.assertIsNone(
+            navigation_tags.get_announcements(self._context())['announcements'])
+        Announcements.objects.create(announcement_text="Maintenance")
+        announcements = navigation_tags.get_announcements(
+            self._context())['announcements']
+        self.assertEqual(["Maintenance"],
+                         [a.announcement_text for a in announcements])
+
+    def test_site_chrome_invalidated_by_page_publish(self):
+        navigation_tags.top_menu(self._context(), self.home)
+        events = self.home.add_child(
+            instance=Page(title="Events", slug="events", show_in_menus=True,
+                          live=False))
+        events.save_revision().publish()
+        result = navigation_tags.top_menu(self._context(), self.home)
+        self.assertEqual(["About", "News", "Events"],
+                         [m.title for m in result['menuitems']])
+
+    def test_site_chrome_reused_for_request(self):
+        context = self._context()
+        chrome = site_chrome.get_site_chrome(context['request'])
+        site_chrome.invalidate()
+        self.assertIs(chrome, site_chrome.get_site_chrome(context['request']))
+        self.assertIsNot(chrome, site_chrome.get_site_chrome(
+            self._context()['request']))
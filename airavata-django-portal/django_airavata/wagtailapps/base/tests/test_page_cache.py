@@ -0,0 +1,70 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from wagtail.core.models import Page
+
+from django_airavata.wagtailapps.base.models import Announcements, BlankPage
+
+
+@override_settings(WAGTAIL_PAGE_CACHE_TTL=600)
+class AnonymousPageCacheTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        root = Page.objects.get(depth=1)
+        self.page = root.add_child(
+            instance=BlankPage(title="Workshop", slug="workshop"))
+        self.factory = RequestFactory()
+        self.render_count = 0
+        patcher = patch.object(Page, 'serve', autospec=True,
+                               side_effect=self._serve)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _serve(self, page, request, *args, **kwargs):
+        self.render_count += 1
+        return HttpResponse(f"{page.title} {self.render_count}")
+
+    def _get(self, user=None, path="/workshop/", data=None):
+        request = self.factory.get(path, data=data)
+        request.user = user if user is not None else AnonymousUser()
+        return self.page.serve(request)
+
+    def test_anonymous_response_is_cached(self):
+        self.assertEqual(b"Workshop 1", self._get().content)
+        self.assertEqual(b"Workshop 1", self._get().content)
+        self.assertEqual(1, self.render_count)
+
+    def test_authenticated_response_is_not_cached(self):
+        user = get_user_model().objects.create_user("testuser")
+        self._get(user=user)
+        self._get(user=user)
+        self.assertEqual(2, self.render_count)
+
+    def test_query_string_is_not_cached(self):
+        self._get(data={'q': "test"})
+        self._get(data={'q': "test"})
+        self.assertEqual(2, self.render_count)
+
+    def test_purged_on_publish(self):
+        self._get()
+        self.page.title = "Workshop 2023"
+        self.page.save_revision().publish()
+        self.assertEqual(b"Workshop 2023 2", self._get().content)
+
+    def test_purged_on_snippet_change(self):
+        self._get()
+        Announcements.objects.create(announcement_text="Maintenance")
+        self._get()
+        self.assertEqual(2, self.render_count)
+
+    @override_settings(WAGTAIL_PAGE_CACHE_TTL=0)
+    def test_disabled(self):
+        self._get()
+        self._get()
+        self.assertEqual(2, self.render_count)
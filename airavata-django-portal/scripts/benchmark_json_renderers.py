@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""
+Benchmark FastJSONRenderer against DRF's JSONRenderer on representative API
+payloads: a page of 1,000 experiment summaries and a user storage listing of
+10,000 files.
+
+Run from the airavata-django-portal directory:
+
+    python scripts/benchmark_json_renderers.py
+"""
+import os
+import sys
+import timeit
+from collections import OrderedDict
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
+django.setup()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from django_airavata.apps.api import renderers  # noqa: E402
+
+API_URL = "https://gateway.example.org/api"
+
+
+def experiment_summaries(count=1000):
+    results = [OrderedDict([
+        ('experimentId', f"Experiment_{i}_{'a' * 36}"),
+        ('projectId', f"Project_{i % 20}_{'b' * 36}"),
+        ('gatewayId', "default"),
+        ('creationTime', "2023-01-01T12:00:00.000000Z"),
+        ('userName', "testuser"),
+        ('name', f"Experiment {i}"),
+        ('description', "A description of the experiment"),
+        ('executionId', f"Application_{i % 5}_{'c' * 36}"),
+        ('resourceHostId', "compute.example.org_" + 'd' * 36),
+        ('experimentStatus', "COMPLETED"),
+        ('statusUpdateTime', "2023-01-01T13:00:00.000000Z"),
+        ('url', f"{API_URL}/experiments/Experiment_{i}/"),
+        ('project', f"{API_URL}/projects/Project_{i % 20}/"),
+        ('userHasWriteAccess', True),
+    ]) for i in range(count)]
+    return OrderedDict([
+        ('next', f"{API_URL}/experiment-search/?limit={count}&offset={count}"),
+        ('previous', None),
+        ('results', results),
+        ('limit', count),
+        ('offset', 0),
+    ])
+
+
+def storage_files(count=10000):
+    files = [OrderedDict([
+        ('name', f"output_{i}.dat"),
+        ('path', f"/tmp/experiment-data-dir/testuser/Project/Exp/output_{i}.dat"),
+        ('dataProductURI', f"airavata-dp://{i:032x}"),
+        ('createdTime', "2023-01-01T12:00:00.000000Z"),
+        ('modifiedTime', "2023-01-01T12:00:00.000000Z"),
+        ('mimeType', "application/octet-stream"),
+        ('size', 1024 * i),
+        ('hidden', False),
+        ('userHasWriteAccess', True),
+        ('downloadURL', f"{API_URL}/download?data-product-uri=airavata-dp://{i:032x}"),
+    ]) for i in range(count)]
+    return OrderedDict([
+        ('isDir', True),
+        ('directories', []),
+        ('files', files),
+        ('parts', ["Project", "Exp"]),
+    ])
+
+
+def benchmark(name, data, number):
+    drf_renderer = JSONRenderer()
+    fast_renderer = renderers.FastJSONRenderer()
+    assert len(drf_renderer.render(data)) == len(fast_renderer.render(data))
+    drf = timeit.timeit(lambda: drf_renderer.render(data), number=number)
+    fast = timeit.timeit(lambda: fast_renderer.render(data), number=number)
+    print(f"{name} x {number}")
+    print(f"  JSONRenderer:     {drf * 1000 / number:.2f} ms/op")
+    print(f"  FastJSONRenderer: {fast * 1000 / number:.2f} ms/op")
+    print(f"  speedup:          {drf / fast:.1f}x")
+
+
+def main():
+    if renderers.orjson is None:
+        print("orjson is not installed, FastJSONRenderer falls back to "
+              "JSONRenderer")
+    benchmark("1,000 experiment summaries", experiment_summaries(), 50)
+    benchmark("10,000 storage files", storage_files(), 10)
+
+
+if __name__ == '__main__':
+    main()
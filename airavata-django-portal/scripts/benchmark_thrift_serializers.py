@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""
+Benchmark the compiled thrift_spec representation of the generated Thrift
+serializers against the Django Rest Framework field based representation.
+
+Run from the airavata-django-portal directory:
+
+    python scripts/benchmark_thrift_serializers.py
+"""
+import os
+import sys
+import timeit
+from unittest.mock import patch
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
+django.setup()
+
+from airavata.model.application.io.ttypes import (  # noqa: E402
+    DataType,
+    InputDataObjectType,
+    OutputDataObjectType
+)
+from airavata.model.experiment.ttypes import (  # noqa: E402
+    ExperimentModel,
+    ExperimentType,
+    UserConfigurationDataModel
+)
+from airavata.model.scheduling.ttypes import (  # noqa: E402
+    ComputationalResourceSchedulingModel
+)
+from airavata.model.status.ttypes import (  # noqa: E402
+    ExperimentState,
+    ExperimentStatus
+)
+
+from django_airavata.apps.api import thrift_utils  # noqa: E402
+
+
+def create_experiment(num_inputs=50, num_outputs=50, num_statuses=10):
+    return ExperimentModel(
+        experimentId="exp-1",
+        projectId="proj-1",
+        gatewayId="gateway",
+        experimentType=ExperimentType.SINGLE_APPLICATION,
+        userName="testuser",
+        experimentName="Benchmark experiment",
+        creationTime=1600000000123,
+        emailAddresses=["a@example.com"],
+        userConfigurationData=UserConfigurationDataModel(
+            airavataAutoSchedule=False,
+            overrideManualScheduledParams=False,
+            computationalResourceScheduling=(
+                ComputationalResourceSchedulingModel(
+                    resourceHostId="host", totalCPUCount=4, nodeCount=1,
+                    queueName="normal", wallTimeLimit=30))),
+        experimentInputs=[
+            InputDataObjectType(name=f"in{i}", value=str(i),
+                                type=DataType.STRING, inputOrder=i,
+                                metaData='{"editor": {}}')
+            for i in range(num_inputs)],
+        experimentOutputs=[
+            OutputDataObjectType(name=f"out{i}", type=DataType.URI,
+                                 value=f"airavata-dp://{i}")
+            for i in range(num_outputs)],
+        experimentStatus=[
+            ExperimentStatus(state=ExperimentState.EXECUTING,
+                             timeOfStateChange=1600000000456 + i,
+                             reason="status")
+            for i in range(num_statuses)])
+
+
+def main(number=200):
+    experiment = create_experiment()
+    serializer_class = thrift_utils.create_serializer_class(
+        ExperimentModel, True)
+
+    def serialize():
+        return serializer_class(instance=experiment).data
+
+    compiled = timeit.timeit(serialize, number=number)
+    with patch.object(thrift_utils, 'COMPILED_REPRESENTATION_ENABLED', False):
+        drf = timeit.timeit(serialize, number=number)
+    print(f"ExperimentModel x {number}")
+    print(f"  DRF fields:           {drf * 1000 / number:.3f} ms/op")
+    print(f"  compiled thrift_spec: {compiled * 1000 / number:.3f} ms/op")
+    print(f"  speedup:              {drf / compiled:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -40,6 +40,9 @@ setup(
         ],
         'mysql': [
             'mysqlclient'
+        ],
+        'fastjson': [
+            'orjson'
         ]
     },
     classifiers=[